@@ -1,11 +1,11 @@
 #! /bin/env bash
 # Build moves
-pyinstaller -F -n moves_editor moves/src/app.py &
-wineconsole pyinstaller -F -n moves_editor.exe moves/src/app.py &
+pyinstaller -F -p . -n moves_editor moves/src/app.py &
+wineconsole pyinstaller -F -p . -n moves_editor.exe moves/src/app.py &
 
 # Build pokemon
-pyinstaller -F -n pokemon_editor pokemon/src/app.py &
-wineconsole pyinstaller -F -n pokemon_editor.exe pokemon/src/app.py &
+pyinstaller -F -p . -n pokemon_editor pokemon/src/app.py &
+wineconsole pyinstaller -F -p . -n pokemon_editor.exe pokemon/src/app.py &
 
 wait
 echo "Done!"
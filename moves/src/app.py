@@ -1,12 +1,38 @@
+import multiprocessing
+import sqlite3
 import sys
 from os import path
 from typing import Any, Tuple
 from pathlib import Path
 
-import rtoml as toml
-from PySide6.QtWidgets import QApplication, QMainWindow, QFileDialog
+from PySide6 import QtGui
+from PySide6.QtWidgets import QApplication, QCheckBox, QMainWindow, QFileDialog
 from window import Ui_MainWindow
 
+# Make the shared pkdb package importable when running from source
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+from pkdb.codec import Codec, get_codec
+from pkdb.dirty import DirtyTable
+from pkdb.index import LazyTable
+from pkdb.integrity import FILES, References
+from pkdb.loader import ENTRY_STORES, Job, database_exists, format_timings
+from pkdb.loader import load_all, load_document
+from pkdb.qt.autosave import Autosave
+from pkdb.qt.bulk import BulkEditDialog
+from pkdb.qt.completer import SearchCompleter
+from pkdb.qt.form import EntryLoader
+from pkdb.qt.integrity import ReferenceCheck
+from pkdb.qt.learners import LearnersPanel
+from pkdb.qt.names import NameList
+from pkdb.qt.rename import ask_new_name, rename_action
+from pkdb.qt.undo import UndoActions
+from pkdb.qt.writer import BackgroundWriter
+from pkdb.records import Move
+from pkdb.rename import Database, ReverseIndex, rename, save_all
+from pkdb.scan import load_keys
+from pkdb.undo import UndoStack
+from table import MovesModel, MovesTable
+
 
 def under_to_space(text: str) -> str:
     return text.replace("_", " ")
@@ -16,12 +42,49 @@ class Window(Ui_MainWindow, QMainWindow):
     root_path: Path
     moves_path: Path
     moves_parse: dict[str, dict[str, dict[str, Any]]]
-    moves: dict[str, dict[str, Any]]
+    moves: DirtyTable
+    codec: Codec
+    writer: BackgroundWriter
+    autosave: Autosave
+    undo: UndoActions
+    move_names: NameList
+    loader: EntryLoader
+    type_names: NameList
+    check: ReferenceCheck
+    rename_action: QtGui.QAction
+    learners: LearnersPanel
+    table: MovesTable | None
 
     def __init__(self):
         super().__init__()
         self.setupUi(self)
         self.connect_slots()
+        # Show the move named in the "Name" entry once typing stops
+        self.loader = EntryLoader(
+            self.combo_name,
+            lambda text: self.moves.get(text.replace(" ", "_")),
+            self.show_move,
+            [
+                self.combo_type1,
+                self.combo_type2,
+                self.combo_category,
+                self.spin_power,
+                self.spin_accuracy,
+                self.spin_pp,
+                self.combo_target,
+                self.spin_priority,
+                self.check_flag_a,
+                self.check_flag_b,
+                self.check_flag_c,
+                self.check_flag_d,
+                self.check_flag_e,
+                self.check_flag_f,
+                self.check_flag_g,
+                self.check_flag_h,
+                self.txtedit_description,
+            ],
+            self,
+        )
 
         # Get root path based on type of executable
         if getattr(sys, "frozen", False):
@@ -31,23 +94,63 @@ class Window(Ui_MainWindow, QMainWindow):
 
         # If path does not exist, ask the user to select it
         (self.root_path, self.moves_path) = self.get_file_path("moves.toml.bytes")
+        types_path = self.get_file_path("types.toml.bytes")[1]
 
-        # Load moves.toml
-        self.moves_parse = toml.load(self.moves_path)
+        # Load moves.toml and the type names at once
+        self.codec = get_codec("rtoml")
+        (loaded, timings) = load_all(
+            {
+                "moves": Job(load_document, self.moves_path, (("Moves",), self.codec)),
+                "types": Job(load_keys, types_path, (("Types",), self.codec.loads)),
+            }
+        )
+        self.statusBar().showMessage(format_timings(timings), 5000)
+        self.moves_parse = loaded["moves"]
         self.moves_parse.setdefault("Moves", {})
-        self.moves = self.moves_parse["Moves"]
+        self.moves = DirtyTable(self.moves_parse["Moves"], self.write_moves)
+        self.writer = BackgroundWriter(
+            self.moves_path, self.codec.dump, self, self.moves.stats
+        )
+        self.writer.pending.connect(lambda: self.statusBar().showMessage("Saving..."))  # type: ignore
+        self.writer.saved.connect(self.show_saved)  # type: ignore
+        self.writer.failed.connect(self.show_failed)  # type: ignore
+        self.writer.unsaved.connect(self.moves.mark)  # type: ignore
+        # Saved moves are written when the autosave mode says so
+        self.autosave = Autosave(self.moves, self)
+        self.autosave.flushed.connect(self.show_flushed)  # type: ignore
+        self.autosave.failed.connect(self.show_failed)  # type: ignore
+        # Saved moves can be undone, the history only keeps changed fields
+        self.undo = UndoActions(UndoStack(self.moves), self)
+        self.undo.applied.connect(self.undone)  # type: ignore
+        toolbar = self.addToolBar("Edit")
+        toolbar.addActions([self.undo.undo_action, self.undo.redo_action])
 
         # Add existing moves to the "Name" entry
-        items = map(under_to_space, self.moves.keys())
-        self.combo_name.addItems(list(items))
+        self.move_names = NameList(map(under_to_space, self.moves.keys()), self)
+        self.move_names.attach(self.combo_name)
+        # Typing a name only searches an index of the names
+        SearchCompleter(self.move_names.search_index(), self).attach(self.combo_name)
         # Add existing types to the "Type 1" and "Type 2" entries
-        types_path = self.get_file_path("types.toml.bytes")[1]
-        if types := toml.load(types_path).get("Types"):
-            self.combo_type1.addItems(types.keys())
-            self.combo_type2.addItems(types.keys())
+        self.type_names = NameList(loaded["types"], self)
+        if self.type_names.names:
+            self.type_names.attach(self.combo_type1, self.combo_type2)
+        # Types that do not exist are counted in the status bar
+        references = References({"types": self.type_names})
+        self.check = ReferenceCheck(
+            references, self.moves_path.name, self.moves, references.check_move, self
+        )
+        toolbar.addAction(self.check.action)
+        # Renaming a move renames it in every learnset too
+        self.rename_action = rename_action(self)
+        self.rename_action.triggered.connect(self.rename_move)  # type: ignore
+        toolbar.addAction(self.rename_action)
+        # Pokemon learning the move shown, read in the background
+        pokemon_path = self.root_path / "pokemon.toml.bytes"
+        self.learners = LearnersPanel(pokemon_path, get_codec("tomli"), self)
+        # The table of every move is built when first opened
+        self.table = None
 
     def connect_slots(self):
-        self.combo_name.currentTextChanged.connect(self.name_changed)  # type: ignore
         self.combo_type1.currentTextChanged.connect(self.type1_changed)  # type: ignore
         self.combo_type2.currentTextChanged.connect(self.type2_changed)  # type: ignore
         self.combo_category.currentTextChanged.connect(self.category_changed)  # type: ignore
@@ -55,29 +158,37 @@ class Window(Ui_MainWindow, QMainWindow):
         self.spin_accuracy.valueChanged.connect(self.accuracy_changed)  # type: ignore
         self.spin_pp.valueChanged.connect(self.pp_changed)  # type: ignore
         self.button_save.clicked.connect(self.save_move)  # type: ignore
+        self.button_table.clicked.connect(self.show_table)  # type: ignore
         self.button_cancel.clicked.connect(self.close)  # type: ignore
 
-    def name_changed(self):
-        text = self.combo_name.currentText()
-        # If move is found in dictionary
-        if move := self.moves.get(text.replace(" ", "_")):
-            self.combo_type1.setCurrentText(move["type1"])
-            self.combo_type2.setCurrentText(move["type2"])
-            self.combo_category.setCurrentText(move["category"])
-            self.spin_power.setValue(move["power"])
-            self.spin_accuracy.setValue(move["accuracy"])
-            self.spin_pp.setValue(move["pp"])
-            self.combo_target.setCurrentText(move["target"])
-            self.spin_priority.setValue(move["priority"])
-            self.check_flag_a.setChecked(move["flags"] & 1)
-            self.check_flag_b.setChecked(move["flags"] & 2)
-            self.check_flag_c.setChecked(move["flags"] & 4)
-            self.check_flag_d.setChecked(move["flags"] & 8)
-            self.check_flag_e.setChecked(move["flags"] & 16)
-            self.check_flag_f.setChecked(move["flags"] & 32)
-            self.check_flag_g.setChecked(move["flags"] & 64)
-            self.check_flag_h.setChecked(move["flags"] & 128)
-            self.txtedit_description.setText(move["description"])
+    def show_move(self, entry: dict[str, Any]):
+        move = Move.from_dict(entry)
+        self.combo_type1.setCurrentText(move.type1)
+        self.combo_type2.setCurrentText(move.type2)
+        self.combo_category.setCurrentText(move.category)
+        self.spin_power.setValue(move.power)
+        self.spin_accuracy.setValue(move.accuracy)
+        self.spin_pp.setValue(move.pp)
+        self.combo_target.setCurrentText(move.target)
+        self.spin_priority.setValue(move.priority)
+        for bit, check in enumerate(self.flag_checks()):
+            check.setChecked(move.has_flag(bit))
+        self.txtedit_description.setText(move.description)
+        self.check.show_entry(self.combo_name.currentText().replace(" ", "_"), entry)
+        self.learners.show_move(self.combo_name.currentText())
+
+    def flag_checks(self) -> list[QCheckBox]:
+        # Check boxes of the flags, from the lowest bit
+        return [
+            self.check_flag_a,
+            self.check_flag_b,
+            self.check_flag_c,
+            self.check_flag_d,
+            self.check_flag_e,
+            self.check_flag_f,
+            self.check_flag_g,
+            self.check_flag_h,
+        ]
 
     def type1_changed(self):
         text = self.combo_type1.currentText()
@@ -98,45 +209,174 @@ class Window(Ui_MainWindow, QMainWindow):
         value = self.spin_pp.value()
 
     def save_move(self):
-        # Get move flags mask
-        flags = (
-            self.check_flag_a.isChecked()
-            + self.check_flag_b.isChecked() * 2
-            + self.check_flag_c.isChecked() * 4
-            + self.check_flag_d.isChecked() * 8
-            + self.check_flag_e.isChecked() * 16
-            + self.check_flag_f.isChecked() * 32
-            + self.check_flag_g.isChecked() * 64
-            + self.check_flag_h.isChecked() * 128
+        move = Move(
+            name=self.combo_name.currentText(),
+            type1=self.combo_type1.currentText(),
+            type2=self.combo_type2.currentText(),
+            category=self.combo_category.currentText(),
+            power=self.spin_power.value(),
+            accuracy=self.spin_accuracy.value(),
+            pp=self.spin_pp.value(),
+            target=self.combo_target.currentText(),
+            priority=self.spin_priority.value(),
+            flags=Move.flags_from(check.isChecked() for check in self.flag_checks()),
+            description=self.txtedit_description.toPlainText(),
         )
         # Update move definition (if it does not exist it will be created)
-        self.moves.update(
-            {
-                self.combo_name.currentText().replace(" ", "_"): {
-                    "name": self.combo_name.currentText(),
-                    "type1": self.combo_type1.currentText(),
-                    "type2": self.combo_type2.currentText(),
-                    "category": self.combo_category.currentText(),
-                    "power": self.spin_power.value(),
-                    "accuracy": self.spin_accuracy.value(),
-                    "pp": self.spin_pp.value(),
-                    "target": self.combo_target.currentText(),
-                    "priority": self.spin_priority.value(),
-                    "flags": flags,
-                    "description": self.txtedit_description.toPlainText(),
-                }
+        key = move.name.replace(" ", "_")
+        old = {key: self.moves.get(key)}
+        self.moves[key] = move.to_dict()
+        self.undo.record(f"save {self.combo_name.currentText()}", old)
+        # Add new move to the "Name" entry
+        self.move_names.add(self.combo_name.currentText())
+        if self.table:
+            self.table.model.entry_saved(key)
+        self.check.show_entry(key, self.moves[key])
+        self.autosave.changed()
+
+    def show_table(self):
+        if self.table is None:
+            model = MovesModel(self.moves, self)
+            model.edited.connect(self.table_edited)  # type: ignore
+            categories = NameList(
+                map(self.combo_category.itemText, range(self.combo_category.count())),
+                self,
+            )
+            names = {
+                "type1": self.type_names,
+                "type2": self.type_names,
+                "category": categories,
             }
+            self.table = MovesTable(model, names, self)
+            self.table.button_bulk.clicked.connect(lambda: self.bulk_edit(self.table.selected_keys()))  # type: ignore
+        self.table.show()
+        self.table.raise_()
+
+    def bulk_edit(self, selected: list[str]):
+        dialog = BulkEditDialog(self.moves, Move().to_dict(), selected, self.table)
+        if not dialog.exec() or not dialog.changed:
+            return
+        self.undo.record(f"bulk edit of {len(dialog.changed)} moves", dialog.changed)
+        # Every edited move is written by a single save
+        self.autosave.flush()
+        self.table.model.refresh()
+        self.loader.load()
+
+    def table_edited(self, key: str, old: dict[str, Any]):
+        # Edits in the table are saved like the form's, and shown by the form
+        # when they change the move it shows
+        self.undo.record(f"edit of {under_to_space(key)}", {key: old})
+        if key == self.combo_name.currentText().replace(" ", "_"):
+            self.loader.load()
+        self.autosave.changed()
+
+    def rename_move(self):
+        old = self.combo_name.currentText()
+        if old.replace(" ", "_") not in self.moves:
+            self.statusBar().showMessage(f"No move named {old}", 3000)
+            return
+        if (new := ask_new_name(self, "move", old)) is None:
+            return
+        # Pending saves are written first, then the moves and every Pokemon
+        # learning the move are saved together
+        self.autosave.flush()
+        self.writer.wait()
+        self.materialize_moves()
+        pokemon_path = self.get_file_path("pokemon.toml.bytes")[1]
+        moves = Database(self.moves_path, self.codec, self.moves_parse, self.moves)
+        pokemon = Database.open(pokemon_path, FILES["pokemon"][1], get_codec("tomli"))
+        try:
+            index = ReverseIndex()
+            index.add_table("pokemon", pokemon.entries)
+            tables = {"moves": self.moves, "pokemon": pokemon.entries}
+            changed = rename(tables, index, "moves", old, new)
+            try:
+                save_all([moves, pokemon])
+            except (OSError, sqlite3.Error):
+                # The learnsets are dropped unsaved, the move gets its old
+                # name back in the same place
+                (old_key, new_key) = (old.replace(" ", "_"), new.replace(" ", "_"))
+                self.moves.rename(new_key, old_key, changed["moves"][old_key])
+                raise
+        except (OSError, sqlite3.Error, ValueError) as error:
+            self.statusBar().showMessage(f"Rename failed: {error}")
+            return
+        finally:
+            pokemon.close()
+        self.learners.update_pokemon(
+            (key, pokemon.entries.get(key)) for key in changed["pokemon"]
         )
-        # Add new move to the "Name" entry
-        self.combo_name.addItem(self.combo_name.currentText())
-        # Save move to file
-        with open(self.moves_path, "w", encoding="utf-8") as file:
-            print(toml.dump(self.moves_parse, file))
-            file.close()
+        # Undoing would only change the moves back, not the learnsets
+        self.undo.clear()
+        self.move_names.remove(old)
+        self.move_names.add(new)
+        if self.table:
+            self.table.model.entry_removed(old.replace(" ", "_"))
+            self.table.model.entry_saved(new.replace(" ", "_"))
+        self.combo_name.setCurrentText(new)
+        self.loader.load()
+        learnsets = len(changed["pokemon"])
+        self.statusBar().showMessage(
+            f"Renamed {old} to {new} in {learnsets} Pokémon learnsets", 3000
+        )
+
+    def undone(self, keys: list[str], message: str):
+        for key in keys:
+            if key in self.moves:
+                self.move_names.add(under_to_space(key))
+            else:
+                self.move_names.remove(under_to_space(key))
+            if self.table and key in self.moves:
+                self.table.model.entry_saved(key)
+            elif self.table:
+                self.table.model.entry_removed(key)
+        self.autosave.changed()
+        self.loader.load()
+        self.statusBar().showMessage(f"{message} ({self.undo.stack.summary()})", 3000)
+
+    def write_moves(self, keys: list[str]) -> int | None:
+        # Writes the changed moves, returning the number of bytes written or
+        # None when the background writer records its own write
+        table = self.moves.table
+        # Split and SQLite databases only write the edited moves
+        if isinstance(table, ENTRY_STORES):
+            return table.save_entries(keys)
+        # Save moves in the background (entries are replaced, never mutated,
+        # so shallow copies are a consistent snapshot)
+        self.materialize_moves()
+        self.writer.save({**self.moves_parse, "Moves": dict(self.moves.table)}, keys)
+        return None
+
+    def materialize_moves(self):
+        # Saving writes every move, so a lazy database is fully parsed once
+        if isinstance(table := self.moves.table, LazyTable):
+            self.moves_parse = table.materialize()
+            self.moves.table = self.moves_parse["Moves"]
+
+    def show_flushed(self):
+        # Whole-file saves are reported once the background writer is done
+        if isinstance(self.moves.table, ENTRY_STORES):
+            self.show_saved()
+
+    def show_saved(self):
+        self.statusBar().showMessage(f"Saved ({self.moves.stats.summary()})", 3000)
+
+    def show_failed(self, error: str):
+        self.statusBar().showMessage(f"Save failed: {error}")
+
+    def closeEvent(self, event: QtGui.QCloseEvent):
+        # Do not exit before the last save reached the disk
+        if autosave := getattr(self, "autosave", None):
+            autosave.close()
+        if writer := getattr(self, "writer", None):
+            writer.wait()
+        if learners := getattr(self, "learners", None):
+            learners.wait()
+        super().closeEvent(event)
 
     def get_file_path(self, file_name: str) -> Tuple[Path, Path]:
         path = self.root_path / file_name
-        if not path.exists():
+        if not database_exists(path):
             # Ask the user to select the moves.toml file
             selected: str = QFileDialog.getOpenFileName(
                 self, caption=f"Select {file_name}", filter=file_name
@@ -150,6 +390,8 @@ class Window(Ui_MainWindow, QMainWindow):
 
 
 if __name__ == "__main__":
+    # Database loading may run in worker processes, also when frozen
+    multiprocessing.freeze_support()
     app = QApplication(sys.argv)
     ui = Window()
     ui.show()
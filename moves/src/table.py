@@ -0,0 +1,285 @@
+"""Spreadsheet view of every move, sorted and filtered through a proxy model.
+
+Rows are the keys of the moves table and cells are read from the entries
+when painted, so only the visible rows are touched while scrolling. Sorting
+is done by the model itself with one ``list.sort`` over the keys, instead of
+the proxy comparing cells pair by pair, which keeps sorting 100k moves fast.
+"""
+from collections.abc import MutableMapping
+from typing import Any
+
+from PySide6.QtCore import (
+    QAbstractTableModel,
+    QModelIndex,
+    QObject,
+    QPersistentModelIndex,
+    QSortFilterProxyModel,
+    Qt,
+    QTimer,
+    Signal,
+)
+from PySide6.QtWidgets import (
+    QComboBox,
+    QHeaderView,
+    QHBoxLayout,
+    QLineEdit,
+    QPushButton,
+    QStyledItemDelegate,
+    QStyleOptionViewItem,
+    QTableView,
+    QVBoxLayout,
+    QWidget,
+)
+
+from pkdb.qt.names import NameList
+
+Index = QModelIndex | QPersistentModelIndex
+
+COLUMNS = (
+    ("name", "Name"),
+    ("type1", "Type 1"),
+    ("type2", "Type 2"),
+    ("category", "Category"),
+    ("power", "Power"),
+    ("accuracy", "Accuracy"),
+    ("pp", "PP"),
+    ("priority", "Priority"),
+    ("flags", "Flags"),
+)
+FIELDS = tuple(field for field, _ in COLUMNS)
+
+
+class MovesModel(QAbstractTableModel):
+    """One row per move, edits replace the entry in the moves table."""
+
+    # Key of a move edited in the table, and its entry before the edit
+    edited = Signal(str, object)
+
+    def __init__(self, moves: MutableMapping[str, Any], parent: QObject | None = None):
+        super().__init__(parent)
+        self.moves = moves
+        self.keys = list(moves)
+        # Row of each key, rebuilt when needed after sorting
+        self._rows: dict[str, int] | None = None
+        # Sorting of the keys, the view may ask for the same one twice
+        self.sorted: tuple[int, Qt.SortOrder] | None = None
+
+    @property
+    def rows(self) -> dict[str, int]:
+        if self._rows is None:
+            self._rows = {key: i for i, key in enumerate(self.keys)}
+        return self._rows
+
+    def rowCount(self, parent: Index = QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self.keys)
+
+    def columnCount(self, parent: Index = QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(COLUMNS)
+
+    def headerData(
+        self, section: int, orientation: Qt.Orientation, role: int = Qt.DisplayRole
+    ) -> Any:
+        if orientation == Qt.Horizontal and role == Qt.DisplayRole:
+            return COLUMNS[section][1]
+        return None
+
+    def data(self, index: Index, role: int = Qt.DisplayRole) -> Any:
+        if not index.isValid() or role not in (Qt.DisplayRole, Qt.EditRole):
+            return None
+        key = self.keys[index.row()]
+        if index.column() == 0:
+            return key.replace("_", " ")
+        return self.moves[key].get(FIELDS[index.column()])
+
+    def setData(self, index: Index, value: Any, role: int = Qt.EditRole) -> bool:
+        if not index.isValid() or role != Qt.EditRole or index.column() == 0:
+            return False
+        key = self.keys[index.row()]
+        field = FIELDS[index.column()]
+        entry = self.moves[key]
+        if entry.get(field) == value:
+            return False
+        # Entries are replaced, never mutated, so the change is tracked
+        self.moves[key] = {**entry, field: value}
+        self.sorted = None
+        self.dataChanged.emit(index, index)
+        self.edited.emit(key, entry)
+        return True
+
+    def flags(self, index: Index) -> Qt.ItemFlag:
+        flags = super().flags(index)
+        if index.column() != 0:
+            flags |= Qt.ItemIsEditable
+        return flags
+
+    def sort(self, column: int, order: Qt.SortOrder = Qt.AscendingOrder):
+        if (column, order) == self.sorted:
+            return
+        self.sorted = (column, order)
+        field = FIELDS[column] if column >= 0 else None
+
+        def sort_key(key: str) -> tuple[bool, Any]:
+            value = key if column == 0 else self.moves[key].get(field)
+            # Missing values go last
+            return (value is None, value)
+
+        self.layoutAboutToBeChanged.emit()
+        persistent = self.persistentIndexList()
+        keys = [self.keys[index.row()] for index in persistent]
+        if field is None:
+            # Unsorted, back in file order
+            self.keys = list(self.moves)
+        else:
+            self.keys.sort(key=sort_key, reverse=order == Qt.DescendingOrder)
+        self._rows = None
+        self.changePersistentIndexList(
+            persistent,
+            [
+                self.index(self.rows[key], index.column())
+                for key, index in zip(keys, persistent)
+            ],
+        )
+        self.layoutChanged.emit()
+
+    def entry_saved(self, key: str):
+        # A move saved from the form, shown as a new row when it is new
+        if (row := self.rows.get(key)) is not None:
+            last = len(COLUMNS) - 1
+            self.dataChanged.emit(self.index(row, 0), self.index(row, last))
+            return
+        row = len(self.keys)
+        self.beginInsertRows(QModelIndex(), row, row)
+        self.keys.append(key)
+        self.rows[key] = row
+        self.sorted = None
+        self.endInsertRows()
+
+    def entry_removed(self, key: str):
+        if (row := self.rows.get(key)) is None:
+            return
+        self.beginRemoveRows(QModelIndex(), row, row)
+        del self.keys[row]
+        self._rows = None
+        self.endRemoveRows()
+
+    def refresh(self):
+        # Entries changed outside the table, by a bulk edit
+        self.sorted = None
+        last = self.index(len(self.keys) - 1, len(COLUMNS) - 1)
+        self.dataChanged.emit(self.index(0, 0), last)
+
+
+class MovesProxy(QSortFilterProxyModel):
+    """Filters by name and leaves sorting to the moves model.
+
+    Whether a key matches is remembered per filter, so accepting a row again
+    is a dict lookup instead of a call back into the model for its name.
+    Keys added or renamed later are matched when they are first shown.
+    """
+
+    def __init__(self, parent: QObject | None = None):
+        super().__init__(parent)
+        self.query = ""
+        self.matches: dict[str, bool] = {}
+
+    def set_filter(self, text: str):
+        self.query = text.strip().replace(" ", "_").casefold()
+        self.matches = {}
+        self.invalidateRowsFilter()
+
+    def filterAcceptsRow(self, source_row: int, source_parent: Index) -> bool:
+        if not self.query:
+            return True
+        model: MovesModel = self.sourceModel()
+        key = model.keys[source_row]
+        if (match := self.matches.get(key)) is None:
+            match = self.matches[key] = self.query in key.casefold()
+        return match
+
+    def sort(self, column: int, order: Qt.SortOrder = Qt.AscendingOrder):
+        self.sourceModel().sort(column, order)
+
+
+class MovesDelegate(QStyledItemDelegate):
+    """Picks types and categories from their name lists."""
+
+    def __init__(self, names: dict[str, NameList], parent: QObject | None = None):
+        super().__init__(parent)
+        self.names = names
+
+    def createEditor(
+        self, parent: QWidget, option: QStyleOptionViewItem, index: QModelIndex
+    ) -> QWidget:
+        if names := self.names.get(FIELDS[index.column()]):
+            combo = QComboBox(parent)
+            combo.setEditable(True)
+            names.attach_editor(combo)
+            return combo
+        return super().createEditor(parent, option, index)
+
+    def setEditorData(self, editor: QWidget, index: QModelIndex):
+        if isinstance(editor, QComboBox):
+            editor.setCurrentText(str(index.data(Qt.EditRole) or ""))
+        else:
+            super().setEditorData(editor, index)
+
+    def setModelData(
+        self, editor: QWidget, model: QAbstractTableModel, index: QModelIndex
+    ):
+        if isinstance(editor, QComboBox):
+            model.setData(index, editor.currentText(), Qt.EditRole)
+        else:
+            super().setModelData(editor, model, index)
+
+
+class MovesTable(QWidget):
+    """Window listing every move, with a name filter above the table."""
+
+    def __init__(
+        self,
+        model: MovesModel,
+        names: dict[str, NameList],
+        parent: QWidget | None = None,
+    ):
+        super().__init__(parent, Qt.Window)
+        self.setWindowTitle("Moves")
+        self.resize(900, 600)
+        self.model = model
+        self.proxy = MovesProxy(self)
+        self.proxy.setSourceModel(model)
+
+        self.filter = QLineEdit(self)
+        self.filter.setPlaceholderText("Filter by name")
+        self.filter.setClearButtonEnabled(True)
+        # Filter once typing stops, each filter reads every name
+        self.filter_timer = QTimer(self)
+        self.filter_timer.setSingleShot(True)
+        self.filter_timer.setInterval(150)
+        self.filter_timer.timeout.connect(lambda: self.proxy.set_filter(self.filter.text()))  # type: ignore
+        self.filter.textChanged.connect(lambda: self.filter_timer.start())  # type: ignore
+        self.button_bulk = QPushButton("Bulk edit", self)
+
+        self.view = QTableView(self)
+        self.view.setModel(self.proxy)
+        self.view.setItemDelegate(MovesDelegate(names, self))
+        self.view.setSortingEnabled(True)
+        self.view.setAlternatingRowColors(True)
+        # Fixed row heights, so scrolling never measures the rows
+        rows = self.view.verticalHeader()
+        rows.setSectionResizeMode(QHeaderView.Fixed)
+        rows.setDefaultSectionSize(self.fontMetrics().height() + 8)
+        self.view.horizontalHeader().setStretchLastSection(True)
+
+        tools = QHBoxLayout()
+        tools.addWidget(self.filter)
+        tools.addWidget(self.button_bulk)
+        layout = QVBoxLayout(self)
+        layout.addLayout(tools)
+        layout.addWidget(self.view)
+
+    def selected_keys(self) -> list[str]:
+        rows = dict.fromkeys(
+            self.proxy.mapToSource(index).row()
+            for index in self.view.selectionModel().selectedIndexes()
+        )
+        return [self.model.keys[row] for row in rows]
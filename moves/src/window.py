@@ -456,10 +456,16 @@ class Ui_MainWindow(object):
         sizePolicy2.setVerticalStretch(0)
         sizePolicy2.setHeightForWidth(self.saveclose.sizePolicy().hasHeightForWidth())
         self.saveclose.setSizePolicy(sizePolicy2)
-        self.saveclose.setMaximumSize(QSize(180, 32))
+        self.saveclose.setMaximumSize(QSize(275, 32))
         self.horizontalLayout = QHBoxLayout(self.saveclose)
         self.horizontalLayout.setObjectName("horizontalLayout")
         self.horizontalLayout.setContentsMargins(-1, 0, -1, 0)
+        self.button_table = QPushButton(self.saveclose)
+        self.button_table.setObjectName("button_table")
+        self.button_table.setMaximumSize(QSize(91, 32))
+
+        self.horizontalLayout.addWidget(self.button_table)
+
         self.button_cancel = QPushButton(self.saveclose)
         self.button_cancel.setObjectName("button_cancel")
         self.button_cancel.setMaximumSize(QSize(91, 32))
@@ -616,6 +622,9 @@ class Ui_MainWindow(object):
             QCoreApplication.translate("MainWindow", "Description", None)
         )
         self.txtedit_description.setPlaceholderText("")
+        self.button_table.setText(
+            QCoreApplication.translate("MainWindow", "Table", None)
+        )
         self.button_cancel.setText(
             QCoreApplication.translate("MainWindow", "Close", None)
         )
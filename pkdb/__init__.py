@@ -0,0 +1 @@
+"""Shared data layer for the Pokemon and moves editors."""
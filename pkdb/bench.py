@@ -0,0 +1,223 @@
+"""Benchmarks on large synthetic databases.
+
+Usage: python -m pkdb.bench {scan,codec,search,memory} [--entries N] [--repeat N] [FILE...]
+
+``codec`` also checks that every backend reads what every other one writes
+back to the same data, and exits with status 1 when one does not. It runs on
+the given database files, or on synthetic moves and Pokemon databases when
+none are given.
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Callable
+
+import tomli
+import tomli_w
+
+from pkdb.codec import CODECS, Codec, CodecMismatch, check_round_trip, load_codec
+from pkdb.records import Move, Pokemon, from_table
+from pkdb.scan import scan_keys
+from pkdb.search import MODES, SearchIndex
+
+REFERENCE_TABLES = ("Moves", "Items", "Abilities", "Types")
+
+
+def synthetic_entry(table: str, i: int) -> dict[str, Any]:
+    return {
+        "name": f"{table} {i}",
+        "power": i % 250,
+        "flags": i % 256,
+        "description": f"Synthetic {table.lower()} number {i}.\n[Not a table]",
+    }
+
+
+def synthetic_pokemon(i: int) -> dict[str, Any]:
+    return {
+        "name": f"Pokémon {i}",
+        "type1": "Grass",
+        "type2": "Poison",
+        "hp": 45 + i % 100,
+        "moves": [{"lvl": lvl, "move": f"Moves {lvl * i % 900}"} for lvl in range(40)],
+        "evolutions": [{"pkm": f"Pokémon {i + 1}", "method": "Level", "value": 16}],
+        "weight": 6.9 + i / 10,
+        "pokedex_num": i,
+        "pokedex": "A strange seed was planted on its back at birth.",
+    }
+
+
+def synthetic_move(i: int) -> dict[str, Any]:
+    return synthetic_entry("Moves", i) | {
+        "type1": "Fire",
+        "type2": "",
+        "category": "Physical",
+        "accuracy": 100,
+        "pp": 5 + i % 35,
+        "target": "Selected",
+        "priority": 0,
+    }
+
+
+def write_synthetic(path: Path, table: str, entries: int, inline: bool = False):
+    data = {table: {f"{table}_{i}": synthetic_entry(table, i) for i in range(entries)}}
+    if not inline:
+        with open(path, "wb") as file:
+            tomli_w.dump(data, file)
+        return
+    # One "Key = { ... }" line per entry under a single [Table] header
+    with open(path, "w", encoding="utf-8") as file:
+        file.write(f"[{table}]\n")
+        for key, entry in data[table].items():
+            # JSON scalars are valid TOML values
+            values = ", ".join(f"{k} = {json.dumps(v)}" for k, v in entry.items())
+            file.write(f"{key} = {{ {values} }}\n")
+
+
+def best_of(repeat: int, function: Callable[[], Any]) -> float:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def bench_scan(entries: int, repeat: int):
+    print(f"{'file':<32}{'tomli':>10}{'scan_keys':>12}{'speedup':>10}")
+    with tempfile.TemporaryDirectory() as directory:
+        for table in REFERENCE_TABLES:
+            for inline in (False, True):
+                path = Path(directory) / f"{table.lower()}.toml.bytes"
+                write_synthetic(path, table, entries, inline)
+
+                def parse():
+                    with open(path, "rb") as file:
+                        return list(tomli.load(file)[table].keys())
+
+                if scan_keys(path, (table,)) != parse():
+                    raise ValueError(f"{path.name}: scanned keys differ")
+                parsed = best_of(repeat, parse)
+                scanned = best_of(repeat, lambda: scan_keys(path, (table,)))
+                name = f"{path.name}{' (inline)' if inline else ''}"
+                print(
+                    f"{name:<32}{parsed:>9.3f}s{scanned:>11.3f}s"
+                    f"{parsed / scanned:>9.1f}x"
+                )
+
+
+def available_codecs() -> list[Codec]:
+    codecs = []
+    for name in CODECS:
+        try:
+            codecs.append(load_codec(name))
+        except ImportError:
+            print(f"{name}: not installed, skipped")
+    return codecs
+
+
+def bench_codec(paths: list[Path], entries: int, repeat: int):
+    codecs = available_codecs()
+    with tempfile.TemporaryDirectory() as directory:
+        if not paths:
+            paths = [Path(directory) / "moves.toml.bytes"]
+            write_synthetic(paths[0], "Moves", entries)
+            paths.append(Path(directory) / "pokemon.toml.bytes")
+            pokemon = {f"Pokemon_{i}": synthetic_pokemon(i) for i in range(entries)}
+            with open(paths[1], "wb") as file:
+                tomli_w.dump(pokemon, file)
+        for path in paths:
+            text = path.read_text(encoding="utf-8")
+            size = len(text.encode("utf-8")) / (1 << 20)
+            print(f"\n{path.name} ({size:.1f} MiB)")
+            try:
+                outputs = check_round_trip(codecs, text)
+            except CodecMismatch as error:
+                raise CodecMismatch(f"{path.name}: {error}") from None
+            expected = codecs[0].loads(text)
+            print(f"{'codec':<10}{'load':>12}{'dump':>12}  output")
+            for codec in codecs:
+                load = best_of(repeat, lambda: codec.loads(text))
+                dump = best_of(repeat, lambda: codec.dumps(expected))
+                same = [
+                    name for name, out in outputs.items() if out == outputs[codec.name]
+                ]
+                print(
+                    f"{codec.name:<10}{size / load:>8.1f}MB/s{size / dump:>8.1f}MB/s"
+                    f"  same as {', '.join(same)}"
+                )
+        print("\nRound trip: every backend reads every backend's output")
+
+
+def bench_search(entries: int, repeat: int):
+    # Time every keystroke of typing names that match in different ways
+    names = [synthetic_entry("Moves", i)["name"] for i in range(entries)]
+    names += ["Fire Punch", "Ice Punch", "Thunder Punch"]
+    queries = ["Moves 9999", "punch", "thpu", "no such move"]
+    print(f"{'mode':<12}{'query':<16}{'results':>8}{'worst key':>12}")
+    for mode in MODES:
+        os.environ["PKDB_SEARCH"] = mode
+        index = SearchIndex(names)
+        for query in queries:
+            prefixes = [query[:i] for i in range(1, len(query) + 1)]
+            worst = max(best_of(repeat, lambda: index.search(p)) for p in prefixes)
+            results = len(index.search(query))
+            print(f"{mode:<12}{query:<16}{results:>8}{worst * 1000:>10.2f}ms")
+
+
+def allocated(function: Callable[[], Any]) -> tuple[Any, int]:
+    # The result of the function and the bytes it still holds
+    tracemalloc.start()
+    result = function()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return (result, size)
+
+
+def bench_memory(entries: int):
+    # Memory of whole tables held as dicts against slotted records
+    def moves():
+        return {f"Moves_{i}": synthetic_move(i) for i in range(entries)}
+
+    def pokemon():
+        return {f"Pokemon_{i}": synthetic_pokemon(i) for i in range(entries)}
+
+    print(f"{'table':<10}{'dicts':>12}{'records':>12}{'saved':>8}")
+    for name, cls, build in (("moves", Move, moves), ("pokemon", Pokemon, pokemon)):
+        (table, dicts) = allocated(build)
+        del table
+        # Built from fresh dicts, so the records' own strings are counted
+        (records, size) = allocated(lambda: from_table(cls, build()))
+        del records
+        print(
+            f"{name:<10}{dicts / (1 << 20):>9.1f}MiB{size / (1 << 20):>9.1f}MiB"
+            f"{1 - size / dicts:>7.0%}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m pkdb.bench")
+    parser.add_argument("benchmark", choices=["scan", "codec", "search", "memory"])
+    parser.add_argument("files", nargs="*", type=Path)
+    parser.add_argument("--entries", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    match args.benchmark:
+        case "scan":
+            bench_scan(args.entries, args.repeat)
+        case "codec":
+            try:
+                bench_codec(args.files, args.entries, args.repeat)
+            except CodecMismatch as error:
+                parser.exit(1, f"Round trip failed: {error}\n")
+        case "search":
+            bench_search(args.entries, args.repeat)
+        case "memory":
+            bench_memory(args.entries)
+
+
+if __name__ == "__main__":
+    main()
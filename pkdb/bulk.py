@@ -0,0 +1,193 @@
+"""Edits many entries at once.
+
+A filter such as ``type1 = Fire, power >= 50`` selects entries, and
+assignments such as ``pp = 10, power *= 1.1`` change them. Every changed
+entry is replaced in the table, so a DirtyTable writes all of them in the
+next flush, and the work is linear in the number of entries touched.
+"""
+import ast
+import operator
+import re
+from collections.abc import Iterable, Mapping, MutableMapping
+from typing import Any, Callable, NamedTuple
+
+CONDITION = re.compile(r"^\s*(\w+)\s*(==|!=|>=|<=|=|>|<|~)\s*(.*?)\s*$")
+ASSIGNMENT = re.compile(r"^\s*(\w+)\s*([-+*/]?=)\s*(.*?)\s*$")
+# Values starting like an operator come from a mistyped one, as in "pp == 1"
+OPERATOR_CHARS = "=!<>~+-*/"
+
+COMPARISONS: dict[str, Callable[[Any, Any], bool]] = {
+    "=": operator.eq,
+    "==": operator.eq,
+    "!=": operator.ne,
+    ">=": operator.ge,
+    "<=": operator.le,
+    ">": operator.gt,
+    "<": operator.lt,
+    "~": lambda value, text: str(text).casefold() in str(value).casefold(),
+}
+ARITHMETIC: dict[str, Callable[[Any, Any], Any]] = {
+    "+=": operator.add,
+    "-=": operator.sub,
+    "*=": operator.mul,
+    "/=": operator.truediv,
+}
+
+
+class Condition(NamedTuple):
+    field: str
+    op: str
+    value: Any
+
+    def matches(self, entry: Mapping[str, Any]) -> bool:
+        if self.field not in entry:
+            return False
+        try:
+            return COMPARISONS[self.op](entry[self.field], self.value)
+        except TypeError:
+            # A number compared with text
+            return False
+
+
+class Assignment(NamedTuple):
+    field: str
+    op: str
+    value: Any
+    # Value of the field in entries that do not have it, None when the
+    # record type is not known
+    default: Any = None
+
+    def apply(self, entry: Mapping[str, Any]) -> Any:
+        # Returns the new value of the field, or None to leave it alone.
+        # Raises ValueError for a field the entry does not have, or a value
+        # the field cannot hold
+        old = entry.get(self.field, self.default)
+        if self.op == "=":
+            return coerce(self.field, old, self.value)
+        if not is_number(old) or not is_number(self.value):
+            return None
+        new = ARITHMETIC[self.op](old, self.value)
+        # Integer fields stay integers
+        return round(new) if isinstance(old, int) else new
+
+
+def is_number(value: Any) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def coerce(field: str, old: Any, value: Any) -> Any:
+    # The value as the type of the field's current value
+    if old is None:
+        # Most likely a mistyped name, which the game would not know
+        raise ValueError(f"{field} is not a field of every entry")
+    if type(value) is type(old):
+        return value
+    if isinstance(old, str) and is_number(value):
+        return str(value)
+    if isinstance(old, float) and is_number(value):
+        return float(value)
+    if is_number(old) and is_number(value) and float(value).is_integer():
+        return int(value)
+    raise ValueError(f"{field} needs {type(old).__name__}, got {value!r}")
+
+
+def parse_value(text: str) -> Any:
+    # Numbers, booleans and quoted strings, anything else is taken as text
+    try:
+        return ast.literal_eval(text)
+    except (ValueError, SyntaxError):
+        return text
+
+
+def valid_value(text: str) -> bool:
+    return bool(text) and (text[0] not in OPERATOR_CHARS or text[1:2].isdigit())
+
+
+def split_terms(text: str) -> list[str]:
+    return [term for term in text.split(",") if term.strip()]
+
+
+def parse_filter(text: str) -> list[Condition]:
+    conditions = []
+    for term in split_terms(text):
+        if not (match := CONDITION.match(term)) or not valid_value(match[3]):
+            raise ValueError(f"Invalid condition {term.strip()!r}")
+        field, op, value = match.groups()
+        conditions.append(Condition(field, op, parse_value(value)))
+    return conditions
+
+
+def parse_assignments(
+    text: str, fields: Mapping[str, Any] | None = None
+) -> list[Assignment]:
+    # ``fields`` maps the fields of the record type to their defaults, other
+    # names are refused
+    assignments = []
+    for term in split_terms(text):
+        if not (match := ASSIGNMENT.match(term)) or not valid_value(match[3]):
+            raise ValueError(f"Invalid assignment {term.strip()!r}")
+        field, op, value = match.groups()
+        value = parse_value(value)
+        if op != "=" and not is_number(value):
+            raise ValueError(f"{field} {op} needs a number, got {value!r}")
+        if op == "/=" and value == 0:
+            raise ValueError(f"{field} {op} cannot divide by zero")
+        if fields is not None and field not in fields:
+            raise ValueError(f"{field} is not a field")
+        default = None if fields is None else fields[field]
+        assignments.append(Assignment(field, op, value, default))
+    if not assignments:
+        raise ValueError("Nothing to change")
+    return assignments
+
+
+def select(
+    table: Mapping[str, Mapping[str, Any]],
+    conditions: list[Condition],
+    keys: Iterable[str] | None = None,
+) -> list[str]:
+    # Keys of the entries matching every condition, among ``keys`` if given
+    candidates = table if keys is None else keys
+    return [
+        key
+        for key in candidates
+        if all(condition.matches(table[key]) for condition in conditions)
+    ]
+
+
+def changes(entry: Mapping[str, Any], assignments: list[Assignment]) -> dict[str, Any]:
+    # Fields whose value the assignments change, applied in order
+    new: dict[str, Any] = {}
+    for assignment in assignments:
+        value = assignment.apply({**entry, **new})
+        if value is None:
+            continue
+        if value != entry.get(assignment.field):
+            new[assignment.field] = value
+        else:
+            new.pop(assignment.field, None)
+    return new
+
+
+def preview(
+    table: Mapping[str, Mapping[str, Any]],
+    keys: list[str],
+    assignments: list[Assignment],
+) -> int:
+    # Number of the given entries the assignments would change
+    return sum(1 for key in keys if changes(table[key], assignments))
+
+
+def apply(
+    table: MutableMapping[str, dict[str, Any]],
+    keys: list[str],
+    assignments: list[Assignment],
+) -> dict[str, dict[str, Any]]:
+    # Replaces the changed entries, returning them as they were by key. Every
+    # change is computed first, so a ValueError leaves the table unchanged
+    updates = {key: new for key in keys if (new := changes(table[key], assignments))}
+    changed = {}
+    for key, new in updates.items():
+        changed[key] = table[key]
+        table[key] = {**changed[key], **new}
+    return changed
@@ -0,0 +1,54 @@
+"""Persistent cache of parsed databases, stored next to each source file.
+
+A cache file holds two pickles: a header identifying the source file it was
+built from (path, mtime, size and content hash) and the parsed structure. The
+payload is only unpickled when the header matches the file on disk.
+"""
+import hashlib
+import pickle
+from pathlib import Path
+from typing import Any
+
+from pkdb.config import get_flag
+from pkdb.files import Loader
+
+# Bump whenever the cached structure changes shape
+CACHE_VERSION = 1
+
+
+def cache_path(path: Path) -> Path:
+    return path.with_name(path.name + ".cache")
+
+
+def cache_key(path: Path) -> tuple[Any, ...]:
+    stat = path.stat()
+    with open(path, "rb") as file:
+        digest = hashlib.blake2b(file.read()).hexdigest()
+    return (CACHE_VERSION, str(path.resolve()), stat.st_mtime_ns, stat.st_size, digest)
+
+
+def load_cached(path: Path, load: Loader) -> dict[str, Any]:
+    if not get_flag("CACHE", True):
+        return load(path)
+    key = cache_key(path)
+    try:
+        with open(cache_path(path), "rb") as file:
+            if pickle.load(file) == key:
+                return pickle.load(file)
+    except (OSError, EOFError, pickle.UnpicklingError):
+        pass
+    data = load(path)
+    store_cache(path, key, data)
+    return data
+
+
+def store_cache(path: Path, key: tuple[Any, ...], data: dict[str, Any]):
+    tmp_path = path.with_name(path.name + ".cache.tmp")
+    try:
+        with open(tmp_path, "wb") as file:
+            pickle.dump(key, file, pickle.HIGHEST_PROTOCOL)
+            pickle.dump(data, file, pickle.HIGHEST_PROTOCOL)
+        tmp_path.replace(cache_path(path))
+    except OSError:
+        # A read-only game folder only means the next start parses again
+        tmp_path.unlink(missing_ok=True)
@@ -0,0 +1,71 @@
+"""TOML codecs the editors can load and save their databases with.
+
+``rtoml`` is the fastest, ``tomli`` is pure Python and ``tomllib`` is the
+standard library parser (3.11+). ``tomllib`` cannot write, so it dumps with
+``tomli_w`` just like ``tomli``. ``PKDB_CODEC`` overrides the backend each
+editor uses by default. ``check_round_trip`` checks that backends read each
+other's output back to the same data.
+"""
+from pathlib import Path
+from typing import Any, Callable, Iterable, Mapping, NamedTuple
+
+from pkdb.config import get_str
+
+CODECS = ("rtoml", "tomli", "tomllib")
+
+
+class CodecMismatch(ValueError):
+    pass
+
+
+class Codec(NamedTuple):
+    name: str
+    loads: Callable[[str], dict[str, Any]]
+    dumps: Callable[[Mapping[str, Any]], str]
+
+    def load(self, path: Path) -> dict[str, Any]:
+        with open(path, "rb") as file:
+            return self.loads(file.read().decode("utf-8"))
+
+    def dump(self, path: Path, data: Mapping[str, Any]):
+        with open(path, "wb") as file:
+            file.write(self.dumps(data).encode("utf-8"))
+
+
+def load_codec(name: str) -> Codec:
+    # Backends are optional dependencies, only the selected one is imported
+    match name:
+        case "rtoml":
+            import rtoml
+
+            return Codec(name, rtoml.loads, rtoml.dumps)
+        case "tomli":
+            import tomli
+            import tomli_w
+
+            return Codec(name, tomli.loads, tomli_w.dumps)
+        case "tomllib":
+            import tomllib
+            import tomli_w
+
+            return Codec(name, tomllib.loads, tomli_w.dumps)
+    raise ValueError(f"Unknown TOML codec {name!r}, expected one of {CODECS}")
+
+
+def get_codec(default: str) -> Codec:
+    return load_codec(get_str("CODEC", default) or default)
+
+
+def check_round_trip(codecs: Iterable[Codec], text: str) -> dict[str, str]:
+    # The output of every backend, once each has read the text and every
+    # output back to the data the first one read. Raises CodecMismatch
+    codecs = list(codecs)
+    expected = codecs[0].loads(text)
+    outputs = {codec.name: codec.dumps(expected) for codec in codecs}
+    for codec in codecs:
+        if codec.loads(text) != expected:
+            raise CodecMismatch(f"{codec.name} misreads the file")
+        for writer, output in outputs.items():
+            if codec.loads(output) != expected:
+                raise CodecMismatch(f"{codec.name} misreads what {writer} wrote")
+    return outputs
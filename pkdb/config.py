@@ -0,0 +1,20 @@
+"""Editor settings, read from ``PKDB_*`` environment variables."""
+import os
+
+
+def get_str(name: str, default: str = "") -> str:
+    return os.environ.get(f"PKDB_{name}", default).strip()
+
+
+def get_flag(name: str, default: bool = False) -> bool:
+    value = get_str(name)
+    if not value:
+        return default
+    return value.lower() in ("1", "true", "yes", "on")
+
+
+def get_int(name: str, default: int) -> int:
+    value = get_str(name)
+    if not value:
+        return default
+    return int(value)
@@ -0,0 +1,327 @@
+"""Compares and merges databases entry by entry and field by field.
+
+Entries are compared as values, so the key order, the formatting and the
+codec that wrote a file make no difference. TOML files are indexed instead
+of parsed (pkdb.index), then the entries are read in key order one chunk at
+a time and dropped once compared, so memory holds the keys of the files but
+not their entries. Only the entries of the table are compared.
+
+A three-way merge applies the changes both sides made to a common base.
+Entries and fields changed on one side only are taken from it, and a change
+made on both sides is taken once. A field changed differently on both
+sides, or an entry removed on one side and changed on the other, is a
+conflict: the merged database keeps ours, and the conflicts are listed.
+
+Usage: python -m pkdb.diff diff OLD NEW [--table TABLE] [--json]
+       python -m pkdb.diff merge BASE OURS THEIRS OUTPUT [--table TABLE] [--json]
+
+Exits with status 1 when the databases differ or the merge has conflicts.
+"""
+import argparse
+import difflib
+import json
+import mmap
+import sys
+import time
+from collections.abc import Iterable, Iterator, Mapping
+from pathlib import Path
+from typing import Any, NamedTuple
+
+from pkdb.codec import CODECS, Codec, load_codec
+from pkdb.config import get_str
+from pkdb.index import IndexingError, TableIndex
+from pkdb.integrity import FILES
+from pkdb.loader import ENTRY_STORES, database_exists, load_document
+from pkdb.rename import CODECS as DEFAULT_CODECS
+from pkdb.shards import get_table, load_base, shard_dir
+from pkdb.sqlite import SqliteTable, batched, dump_entries, sqlite_path
+from pkdb.undo import MISSING, EntryDiff, diff
+
+Entry = dict[str, Any]
+
+
+class IndexedTable(Mapping[str, Entry]):
+    """Entries of a TOML file, each parsed whenever it is read."""
+
+    def __init__(self, index: TableIndex):
+        self.index = index
+
+    def __getitem__(self, key: str) -> Entry:
+        return self.index.load_entry(key)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.index.ranges)
+
+    def __len__(self) -> int:
+        return len(self.index.ranges)
+
+    def __contains__(self, key: object) -> bool:
+        return key in self.index.ranges
+
+    def base(self) -> dict[str, Any]:
+        # The document without its entries, from the text around them
+        with open(self.index.path, "rb") as file:
+            if not self.index.ranges:
+                return self.index.loads(file.read().decode("utf-8"))
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                (pieces, pos) = ([], 0)
+                for start, end in sorted(self.index.ranges.values()):
+                    pieces.append(data[pos:start])
+                    pos = end
+                pieces.append(data[pos:])
+        document = self.index.loads(b"".join(pieces).decode("utf-8"))
+        get_table(document, self.index.table)
+        return document
+
+
+def open_table(path: Path, table: tuple[str, ...], codec: Codec) -> Mapping[str, Entry]:
+    if shard_dir(path).is_dir() or sqlite_path(path).exists():
+        return get_table(load_document(path, table, codec), table)
+    try:
+        return IndexedTable(TableIndex(path, table, codec.loads))
+    except IndexingError:
+        # Entries that are not all tables of their own are parsed at once
+        return get_table(codec.load(path), table)
+
+
+def table_base(
+    path: Path, entries: Mapping[str, Entry], table: tuple[str, ...], codec: Codec
+) -> dict[str, Any]:
+    # The document of a database without its entries
+    if isinstance(entries, ENTRY_STORES):
+        return load_base(entries.base)
+    if isinstance(entries, IndexedTable):
+        return entries.base()
+    document = load_base(codec.load(path))
+    get_table(document, table).clear()
+    return document
+
+
+def read_chunks(
+    tables: list[Mapping[str, Entry]], keys: Iterable[str]
+) -> Iterator[tuple[str, list[Entry | None]]]:
+    # Each key with its entry in every table, None where it has none. Split
+    # and SQLite databases drop each chunk once it has been read
+    for chunk in batched(iter(keys)):
+        for entries in tables:
+            if isinstance(entries, SqliteTable):
+                entries.preload(key for key in chunk if key in entries)
+        rows = [[entries.get(key) for entries in tables] for key in chunk]
+        yield from zip(chunk, rows)
+        for entries in tables:
+            if isinstance(entries, ENTRY_STORES):
+                entries.unload(chunk)
+
+
+def diff_tables(
+    old: Mapping[str, Entry], new: Mapping[str, Entry]
+) -> Iterator[tuple[str, EntryDiff]]:
+    # Changed entries in key order
+    for key, (old_entry, new_entry) in read_chunks([old, new], sorted({*old, *new})):
+        change = diff(old_entry, new_entry)
+        if change.fields or change.existed != change.exists:
+            yield (key, change)
+
+
+class Conflict(NamedTuple):
+    key: str
+    # None when the entry was removed on one side and changed on the other
+    field: str | None
+    base: Any
+    ours: Any
+    theirs: Any
+
+
+def merge_entry(
+    key: str, base: Entry | None, ours: Entry | None, theirs: Entry | None
+) -> tuple[Entry | None, list[Conflict]]:
+    # The merged entry, None when it is removed, and its conflicts
+    if ours == theirs or theirs == base:
+        return (ours, [])
+    if ours == base:
+        return (theirs, [])
+    if ours is None or theirs is None:
+        return (ours, [Conflict(key, None, base, ours, theirs)])
+    (merged, conflicts) = (dict(ours), [])
+    base_fields = base or {}
+    for field in [*ours, *(field for field in theirs if field not in ours)]:
+        ours_value = ours.get(field, MISSING)
+        theirs_value = theirs.get(field, MISSING)
+        base_value = base_fields.get(field, MISSING)
+        if theirs_value in (ours_value, base_value):
+            continue
+        if ours_value == base_value:
+            if theirs_value is MISSING:
+                del merged[field]
+            else:
+                merged[field] = theirs_value
+            continue
+        conflicts.append(Conflict(key, field, base_value, ours_value, theirs_value))
+    return (merged, conflicts)
+
+
+def merge_tables(
+    base: Mapping[str, Entry],
+    ours: Mapping[str, Entry],
+    theirs: Mapping[str, Entry],
+    conflicts: list[Conflict],
+) -> Iterator[tuple[str, Entry]]:
+    # Merged entries in the order of ours, then those only theirs added.
+    # Conflicts are appended to ``conflicts`` as they are found
+    keys = [*ours, *(key for key in theirs if key not in ours)]
+    for key, entries in read_chunks([base, ours, theirs], keys):
+        (merged, found) = merge_entry(key, *entries)
+        conflicts += found
+        if merged is not None:
+            yield (key, merged)
+
+
+def to_json(value: Any) -> str:
+    # TOML dates and times are written as text
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"), default=str)
+
+
+def change_lines(key: str, change: EntryDiff) -> Iterator[str]:
+    # Human readable lines of a changed entry, lists shown item by item
+    if not change.existed:
+        yield f"+ {key}"
+    elif not change.exists:
+        yield f"- {key}"
+    else:
+        yield f"~ {key}"
+    for field, (old, new) in change.fields.items():
+        if isinstance(old, list) and isinstance(new, list):
+            yield f"    {field}:"
+            (old_items, new_items) = (list(map(to_json, old)), list(map(to_json, new)))
+            matcher = difflib.SequenceMatcher(None, old_items, new_items, False)
+            for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+                if tag != "equal":
+                    yield from (f"      - {item}" for item in old_items[i1:i2])
+                    yield from (f"      + {item}" for item in new_items[j1:j2])
+        elif old is MISSING:
+            yield f"    {field}: {to_json(new)}"
+        elif new is MISSING and change.exists:
+            yield f"    {field}: {to_json(old)} -> (removed)"
+        elif new is not MISSING:
+            yield f"    {field}: {to_json(old)} -> {to_json(new)}"
+
+
+def change_record(key: str, change: EntryDiff) -> dict[str, Any]:
+    status = (
+        "added" if not change.existed else "changed" if change.exists else "removed"
+    )
+    fields = {
+        field: {
+            name: value
+            for name, value in (("old", old), ("new", new))
+            if value is not MISSING
+        }
+        for field, (old, new) in change.fields.items()
+    }
+    return {"key": key, "status": status, "fields": fields}
+
+
+def conflict_line(conflict: Conflict) -> str:
+    if conflict.field is None:
+        (removed, changed) = (
+            ("ours", "theirs") if conflict.ours is None else ("theirs", "ours")
+        )
+        return f"! {conflict.key}: removed in {removed}, changed in {changed}"
+    (base, ours, theirs) = (
+        "(none)" if value is MISSING else to_json(value)
+        for value in (conflict.base, conflict.ours, conflict.theirs)
+    )
+    return (
+        f"! {conflict.key}.{conflict.field}: base {base}, ours {ours}, theirs {theirs}"
+    )
+
+
+def conflict_record(conflict: Conflict) -> dict[str, Any]:
+    record = {"key": conflict.key, "field": conflict.field}
+    for name in ("base", "ours", "theirs"):
+        if (value := getattr(conflict, name)) is not MISSING:
+            record[name] = value
+    return record
+
+
+def guess_kind(paths: list[Path]) -> str | None:
+    # Copies made by git tools keep the file name in theirs
+    for path in paths:
+        for kind, (file, _) in FILES.items():
+            if file in path.name:
+                return kind
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m pkdb.diff")
+    commands = parser.add_subparsers(dest="command", required=True)
+    diff_parser = commands.add_parser("diff", help="compare two databases")
+    diff_parser.add_argument("old", type=Path)
+    diff_parser.add_argument("new", type=Path)
+    merge_parser = commands.add_parser("merge", help="three-way merge")
+    merge_parser.add_argument("base", type=Path)
+    merge_parser.add_argument("ours", type=Path)
+    merge_parser.add_argument("theirs", type=Path)
+    merge_parser.add_argument("output", type=Path, help="may be OURS")
+    for command in (diff_parser, merge_parser):
+        command.add_argument(
+            "--table", help="table holding the entries, by default from the name"
+        )
+        command.add_argument("--codec", choices=CODECS)
+        command.add_argument(
+            "--json", action="store_true", help="print JSON lines instead of text"
+        )
+    args = parser.parse_args()
+    paths = [args.old, args.new] if args.command == "diff" else [args.base]
+    if args.command == "merge":
+        paths += [args.ours, args.theirs]
+    for path in paths:
+        if not database_exists(path):
+            parser.error(f"{path} not found")
+    kind = guess_kind(paths)
+    if args.table is None:
+        table = FILES[kind][1] if kind else ()
+    else:
+        table = tuple(args.table.split(".")) if args.table else ()
+    default_codec = DEFAULT_CODECS.get(kind or "", "tomli")
+    codec = load_codec(args.codec or get_str("CODEC", default_codec) or default_codec)
+
+    start = time.perf_counter()
+    tables = [open_table(path, table, codec) for path in paths]
+    try:
+        match args.command:
+            case "diff":
+                counts = {"added": 0, "changed": 0, "removed": 0}
+                for key, change in diff_tables(*tables):
+                    record = change_record(key, change)
+                    counts[record["status"]] += 1
+                    if args.json:
+                        print(to_json(record))
+                    else:
+                        print("\n".join(change_lines(key, change)))
+                summary = ", ".join(f"{count} {name}" for name, count in counts.items())
+                failed = any(counts.values())
+            case "merge":
+                conflicts: list[Conflict] = []
+                base = table_base(args.ours, tables[1], table, codec)
+                rows = merge_tables(*tables, conflicts)
+                dump_entries(args.output, codec, table, base, rows)
+                for conflict in conflicts:
+                    if args.json:
+                        print(to_json(conflict_record(conflict)))
+                    else:
+                        print(conflict_line(conflict))
+                summary = f"{len(conflicts)} conflicts, merged into {args.output}"
+                failed = bool(conflicts)
+    finally:
+        for entries in tables:
+            if isinstance(entries, SqliteTable):
+                entries.close()
+    elapsed = time.perf_counter() - start
+    print(f"{summary} ({elapsed:.2f}s)", file=sys.stderr)
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""Write-back layer that remembers which entries changed since the last save.
+
+Edits only update the table in memory and mark the entry dirty. ``flush``
+hands the dirty keys to the editor's writer, which saves just those entries
+when the database supports it, and records how often and how much was
+written and how long it took.
+"""
+import logging
+import threading
+import time
+from collections.abc import MutableMapping
+from typing import Any, Callable, Iterable, Iterator
+
+log = logging.getLogger(__name__)
+
+# Saves the given keys, returning the bytes written, or None when the write
+# finishes later and is recorded by whoever runs it
+Writer = Callable[[list[str]], int | None]
+
+
+def rename_key(table: MutableMapping[str, Any], old: str, new: str, entry: Any):
+    # Replaces the entry at ``old`` by ``entry`` at ``new``, in the same
+    # position for plain dicts, at the end for other tables
+    if type(table) is not dict:
+        del table[old]
+        table[new] = entry
+        return
+    items = [
+        (new, entry) if key == old else (key, value) for key, value in table.items()
+    ]
+    table.clear()
+    table.update(items)
+
+
+class FlushStats:
+    def __init__(self):
+        self.flushes = 0
+        self.entries = 0
+        self.writes = 0
+        self.bytes_written = 0
+        self.seconds = 0.0
+        self.max_seconds = 0.0
+        # Background writers record their writes from another thread
+        self._lock = threading.Lock()
+
+    def flushed(self, entries: int):
+        with self._lock:
+            self.flushes += 1
+            self.entries += entries
+
+    def wrote(self, bytes_written: int, seconds: float):
+        with self._lock:
+            self.writes += 1
+            self.bytes_written += bytes_written
+            self.seconds += seconds
+            self.max_seconds = max(self.max_seconds, seconds)
+        log.info("Wrote %d bytes in %.3fs", bytes_written, seconds)
+
+    def summary(self) -> str:
+        with self._lock:
+            average = self.seconds / self.writes if self.writes else 0.0
+            return (
+                f"{self.flushes} flushes, {self.entries} entries, "
+                f"{self.bytes_written / 1024:.1f} KiB written, "
+                f"{average * 1000:.1f} ms average, {self.max_seconds * 1000:.1f} ms max"
+            )
+
+
+class DirtyTable(MutableMapping[str, dict[str, Any]]):
+    """Mapping over a database table that tracks the entries set or deleted.
+
+    Entries must be replaced, not mutated in place, to be marked dirty.
+    """
+
+    def __init__(self, table: MutableMapping[str, Any], write: Writer):
+        self.table = table
+        self.write = write
+        self.stats = FlushStats()
+        # Insertion ordered set of changed keys
+        self.dirty: dict[str, None] = {}
+
+    def __getitem__(self, key: str) -> dict[str, Any]:
+        return self.table[key]
+
+    def __setitem__(self, key: str, entry: dict[str, Any]):
+        self.table[key] = entry
+        self.dirty[key] = None
+
+    def __delitem__(self, key: str):
+        del self.table[key]
+        self.dirty[key] = None
+
+    def rename(self, old: str, new: str, entry: dict[str, Any]):
+        rename_key(self.table, old, new, entry)
+        self.dirty[old] = None
+        self.dirty[new] = None
+
+    def mark(self, keys: Iterable[str]):
+        # Entries a write handed over did not save, kept ahead of newer edits
+        self.dirty = dict.fromkeys(keys) | self.dirty
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.table)
+
+    def __len__(self) -> int:
+        return len(self.table)
+
+    def flush(self, write: Writer | None = None) -> int:
+        # Returns the number of entries handed to the writer. ``write``
+        # replaces it for saves made together with other databases
+        if not self.dirty:
+            return 0
+        keys = list(self.dirty)
+        self.dirty.clear()
+        start = time.perf_counter()
+        try:
+            written = (write or self.write)(keys)
+        except Exception:
+            # Keep them dirty so the next flush tries again
+            self.mark(keys)
+            raise
+        self.stats.flushed(len(keys))
+        if written is not None:
+            self.stats.wrote(written, time.perf_counter() - start)
+        return len(keys)
@@ -0,0 +1,32 @@
+"""File helpers shared by the database writers."""
+import os
+from pathlib import Path
+from typing import Any, Callable, Iterable
+
+
+Loader = Callable[[Path], dict[str, Any]]
+Dumper = Callable[[Path, dict[str, Any]], None]
+
+
+def atomic_dump(dump: Dumper, path: Path, data: dict[str, Any]):
+    # Write next to the target and rename, so readers never see a partial file
+    atomic_dump_all([(dump, path, data)])
+
+
+def atomic_dump_all(files: Iterable[tuple[Dumper, Path, dict[str, Any]]]):
+    # Every file is written next to its target before any is renamed, so a
+    # failed write leaves all of them as they were
+    renames = []
+    try:
+        for dump, path, data in files:
+            tmp_path = path.with_name(path.name + ".tmp")
+            renames.append((tmp_path, path))
+            dump(tmp_path, data)
+            with open(tmp_path, "ab") as file:
+                os.fsync(file.fileno())
+    except BaseException:
+        for tmp_path, _ in renames:
+            tmp_path.unlink(missing_ok=True)
+        raise
+    for tmp_path, path in renames:
+        os.replace(tmp_path, path)
@@ -0,0 +1,237 @@
+"""Byte-offset index over the entries of a TOML database.
+
+Scanning only looks at table headers, so it is much cheaper than parsing the
+file. Each entry (``[Moves.Tackle]``, ``[Bulbasaur]`` together with all of its
+sub-tables) is then parsed on its own, the first time it is needed.
+"""
+import heapq
+import itertools
+import json
+import mmap
+import os
+import re
+from collections.abc import MutableMapping
+from pathlib import Path
+from typing import Any, Callable, Iterator
+
+
+Loads = Callable[[str], dict[str, Any]]
+
+# Table header lines and the delimiters of multi-line strings that may hide them
+HEADER = re.compile(rb"\n[ \t]*(\[[^\n]*)")
+FIRST_HEADER = re.compile(rb"[ \t]*(\[[^\n]*)")
+# Last characters of a line that may be followed by more array elements
+CONTINUED = (b",", b"[", b"\n", b"\r", b" ", b"\t")
+QUOTES = (re.compile(rb'"""'), re.compile(rb"'''"))
+SIMPLE_HEADER = re.compile(r"\[\[?([A-Za-z0-9_.-]+)\]\]?\s*")
+KEY_PART = re.compile(r"\s*(?:([A-Za-z0-9_-]+)|\"((?:[^\"\\]|\\.)*)\"|'([^']*)')\s*")
+
+
+class IndexingError(ValueError):
+    """The file uses a layout the index cannot split into entries."""
+
+
+def parse_key(text: str, pos: int = 0) -> tuple[tuple[str, ...], int]:
+    # Parses a dotted key like 'a."b c".d', returning its parts and end offset
+    parts: list[str] = []
+    while match := KEY_PART.match(text, pos):
+        bare, basic, literal = match.groups()
+        if basic is not None and "\\" in basic:
+            basic = json.loads(f'"{basic}"')
+        parts.append(bare or basic or literal or "")
+        pos = match.end()
+        if not text.startswith(".", pos):
+            return (tuple(parts), pos)
+        pos += 1
+    raise IndexingError(f"Not a key: {text!r}")
+
+
+def parse_header(line: str) -> tuple[tuple[str, ...], bool]:
+    # Returns the key path of a "[a.b]" or "[[a.b]]" header
+    array = line.startswith("[[")
+    if match := SIMPLE_HEADER.fullmatch(line):
+        if line.endswith("]]" if array else "]") and ".." not in line:
+            return (tuple(match.group(1).split(".")), array)
+    close = "]]" if array else "]"
+    parts, pos = parse_key(line, len(close))
+    rest = line[pos + len(close) :].strip()
+    if not line.startswith(close, pos) or (rest and not rest.startswith("#")):
+        raise IndexingError(f"Not a table header: {line!r}")
+    return (parts, array)
+
+
+def is_blank(data: bytes) -> bool:
+    lines = (line.strip() for line in data.splitlines())
+    return all(not line or line.startswith(b"#") for line in lines)
+
+
+def string_spans(data: bytes | mmap.mmap) -> list[tuple[int, int]]:
+    # Byte ranges covered by multi-line strings
+    spans: list[tuple[int, int]] = []
+    opened: tuple[bytes, int] | None = None
+    finds = (quotes.finditer(data) for quotes in QUOTES)
+    matches = heapq.merge(*finds, key=lambda match: match.start())
+    for match in matches:
+        token = match.group()
+        start = match.start()
+        line_start = data.rfind(b"\n", 0, start) + 1
+        before = data[line_start:start]
+        if opened is None:
+            # Only a value can open one, not a comment or a single-line string
+            before = before.rstrip()
+            if not before or before.endswith((b"=", b",", b"[")):
+                opened = (token, start)
+        elif token == opened[0]:
+            escapes = len(before) - len(before.rstrip(b"\\"))
+            if token == b"'''" or escapes % 2 == 0:
+                spans.append((opened[1], match.end()))
+                opened = None
+    if opened is not None:
+        spans.append((opened[1], len(data)))
+    return spans
+
+
+def iter_headers(
+    data: bytes | mmap.mmap, spans: list[tuple[int, int]] | None = None
+) -> Iterator[tuple[int, int, str]]:
+    # Yields (start, end, text) of every header line outside multi-line strings
+    remaining = iter(string_spans(data) if spans is None else spans)
+    span = next(remaining, None)
+    first = FIRST_HEADER.match(data)
+    for match in itertools.chain([first] if first else [], HEADER.finditer(data)):
+        start = match.start(1)
+        while span is not None and span[1] <= start:
+            span = next(remaining, None)
+        if span is not None and span[0] < start:
+            continue
+        line_start = match.start() + 1 if match is not first else 0
+        # Lines opening a nested array inside a multi-line array
+        if line_start and data[line_start - 2 : line_start - 1] in CONTINUED:
+            previous = data[max(0, line_start - 256) : line_start].rstrip()
+            if previous.endswith((b",", b"[")):
+                continue
+        end = match.end() + 1
+        yield (line_start, min(end, len(data)), match.group(1).decode("utf-8").strip())
+
+
+def scan_entries(
+    data: bytes | mmap.mmap, table: tuple[str, ...]
+) -> dict[str, tuple[int, int]]:
+    ranges: dict[str, tuple[int, int]] = {}
+    current: str | None = None
+    blank_from: int | None = 0
+    depth = len(table)
+    for start, end, text in iter_headers(data):
+        if blank_from is not None and not is_blank(data[blank_from:start]):
+            raise IndexingError("Entries must be written as tables")
+        blank_from = None
+        path, array = parse_header(text)
+        if len(path) > depth and path[:depth] == table:
+            key = path[depth]
+            if key == current:
+                continue
+            if current is not None:
+                ranges[current] = (ranges[current][0], start)
+            if key in ranges:
+                raise IndexingError(f"Entry {key!r} is split across the file")
+            current = key
+            ranges[key] = (start, len(data))
+            continue
+        # Any other table ends the current entry
+        if current is not None:
+            ranges[current] = (ranges[current][0], start)
+            current = None
+        # Key/value pairs directly inside the table would define entries too
+        if path == table and not array:
+            blank_from = end
+    if blank_from is not None and not is_blank(data[blank_from:]):
+        raise IndexingError("Entries must be written as tables")
+    return ranges
+
+
+class TableIndex:
+    path: Path
+    table: tuple[str, ...]
+    ranges: dict[str, tuple[int, int]]
+
+    def __init__(self, path: Path, table: tuple[str, ...], loads: Loads):
+        self.path = path
+        self.table = table
+        self.loads = loads
+        with open(path, "rb") as file:
+            self.scan(file.fileno())
+
+    def scan(self, fd: int):
+        stat = os.fstat(fd)
+        self.stamp = (stat.st_mtime_ns, stat.st_size)
+        if not stat.st_size:
+            self.ranges = {}
+            return
+        with mmap.mmap(fd, 0, access=mmap.ACCESS_READ) as data:
+            self.ranges = scan_entries(data, self.table)
+
+    def keys(self) -> list[str]:
+        return list(self.ranges)
+
+    def read(self, key: str) -> bytes:
+        with open(self.path, "rb") as file:
+            # The database may have been rewritten since it was indexed
+            stat = os.fstat(file.fileno())
+            if (stat.st_mtime_ns, stat.st_size) != self.stamp:
+                self.scan(file.fileno())
+            start, end = self.ranges[key]
+            file.seek(start)
+            return file.read(end - start)
+
+    def load_entry(self, key: str) -> dict[str, Any]:
+        entry = self.loads(self.read(key).decode("utf-8"))
+        for part in self.table + (key,):
+            entry = entry[part]
+        return entry
+
+    def load(self) -> dict[str, Any]:
+        with open(self.path, "rb") as file:
+            return self.loads(file.read().decode("utf-8"))
+
+
+class LazyTable(MutableMapping[str, dict[str, Any]]):
+    """Mapping of entries that are parsed the first time they are read."""
+
+    def __init__(self, index: TableIndex):
+        self.index = index
+        # Unparsed entries are None, keeping the file order for new keys
+        self.entries: dict[str, dict[str, Any] | None] = dict.fromkeys(index.keys())
+
+    def __getitem__(self, key: str) -> dict[str, Any]:
+        entry = self.entries[key]
+        if entry is None:
+            entry = self.entries[key] = self.index.load_entry(key)
+        return entry
+
+    def __setitem__(self, key: str, entry: dict[str, Any]):
+        self.entries[key] = entry
+
+    def __delitem__(self, key: str):
+        del self.entries[key]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.entries)
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def materialize(self) -> dict[str, Any]:
+        # Parse the whole file once and return it with every change applied
+        document = self.index.load()
+        parent = document
+        for part in self.index.table[:-1]:
+            parent = parent.setdefault(part, {})
+        table = parent.get(self.index.table[-1], {}) if self.index.table else document
+        merged = {
+            key: table[key] if entry is None else entry
+            for key, entry in self.entries.items()
+        }
+        if not self.index.table:
+            return merged
+        parent[self.index.table[-1]] = merged
+        return document
@@ -0,0 +1,204 @@
+"""Checks that the names entries refer to exist in the other databases.
+
+Pokemon refer to types, abilities, moves (their learnset), other Pokemon and
+items (their evolutions), and moves to types. The names of every database
+are put in hash sets once, then all entries are checked in a single pass, so
+checking costs one set lookup per reference.
+
+Usage: python -m pkdb.integrity [DIRECTORY]
+
+Prints every dangling reference and exits with status 1 if there are any.
+"""
+import argparse
+import sys
+import time
+from collections.abc import Container, Iterable, Iterator, Mapping
+from pathlib import Path
+from typing import Any, Callable, NamedTuple
+
+from pkdb.codec import Codec, get_codec
+from pkdb.journal import Journal
+from pkdb.loader import ENTRY_STORES, database_exists, load_document
+from pkdb.scan import load_keys
+from pkdb.shards import get_table
+
+# Database file and table of each kind of name
+FILES = {
+    "pokemon": ("pokemon.toml.bytes", ()),
+    "moves": ("moves.toml.bytes", ("Moves",)),
+    "items": ("items.toml.bytes", ("Items",)),
+    "abilities": ("abilities.toml.bytes", ("Abilities",)),
+    "types": ("types.toml.bytes", ("Types",)),
+}
+# Fields naming an entry of another database
+POKEMON_FIELDS = {
+    "type1": "types",
+    "type2": "types",
+    "first": "abilities",
+    "second": "abilities",
+    "hidden": "abilities",
+}
+MOVE_FIELDS = {"type1": "types", "type2": "types"}
+
+
+def learnset_fields(move: Mapping[str, Any]) -> dict[str, str]:
+    return {"move": "moves"}
+
+
+def evolution_fields(evolution: Mapping[str, Any]) -> dict[str, str]:
+    if evolution.get("method") == "Item":
+        return {"pkm": "pokemon", "value": "items"}
+    return {"pkm": "pokemon"}
+
+
+RowFields = Callable[[Mapping[str, Any]], dict[str, str]]
+# Fields of each kind of entry naming another entry, and its lists of rows
+# with such fields
+SCHEMAS: dict[str, tuple[dict[str, str], dict[str, RowFields]]] = {
+    "pokemon": (
+        POKEMON_FIELDS,
+        {"moves": learnset_fields, "evolutions": evolution_fields},
+    ),
+    "moves": (MOVE_FIELDS, {}),
+}
+
+
+def references(kind: str, entry: Mapping[str, Any]) -> Iterator[tuple[str, Any, str]]:
+    # (field, value, target) of every field of the entry naming another entry
+    (fields, lists) = SCHEMAS[kind]
+    for field, target in fields.items():
+        yield (field, entry.get(field), target)
+    for name, row_fields in lists.items():
+        for i, row in enumerate(entry.get(name) or ()):
+            for field, target in row_fields(row).items():
+                yield (f"{name}[{i}].{field}", row.get(field), target)
+
+
+class Problem(NamedTuple):
+    file: str
+    key: str
+    # Path of the field in the entry, such as "moves[3].move"
+    field: str
+    value: Any
+    target: str
+
+    def __str__(self) -> str:
+        return (
+            f"{self.file}: {self.key}: {self.field}: {self.value!r} is not in "
+            f"{FILES[self.target][0]}"
+        )
+
+
+class References:
+    """Names of every database, any container with a hash lookup.
+
+    Keys use "_" where names shown in the editors use spaces, and both
+    spellings resolve.
+    """
+
+    def __init__(self, names: Mapping[str, Container[str]]):
+        self.names = names
+
+    def resolves(self, target: str, value: Any) -> bool:
+        # Empty fields refer to nothing
+        if value is None or value == "":
+            return True
+        if not isinstance(value, str):
+            return False
+        names = self.names[target]
+        return (
+            value in names
+            or value.replace(" ", "_") in names
+            or value.replace("_", " ") in names
+        )
+
+    def dangling(
+        self, row: Mapping[str, Any], fields: Mapping[str, str], prefix: str = ""
+    ) -> Iterator[tuple[str, Any, str]]:
+        # (field, value, target) of the fields of a row that do not resolve
+        for field, target in fields.items():
+            value = row.get(field)
+            if not self.resolves(target, value):
+                yield (prefix + field, value, target)
+
+    def check_pokemon(self, entry: Mapping[str, Any]) -> Iterator[tuple[str, Any, str]]:
+        yield from self.dangling(entry, POKEMON_FIELDS)
+        # Learnsets hold most references, the lookup is inlined for them
+        moves = self.names["moves"]
+        for i, move in enumerate(entry.get("moves") or ()):
+            value = move.get("move")
+            if not (isinstance(value, str) and value in moves):
+                if not self.resolves("moves", value):
+                    yield (f"moves[{i}].move", value, "moves")
+        for i, evolution in enumerate(entry.get("evolutions") or ()):
+            fields = evolution_fields(evolution)
+            yield from self.dangling(evolution, fields, f"evolutions[{i}].")
+
+    def check_move(self, entry: Mapping[str, Any]) -> Iterator[tuple[str, Any, str]]:
+        yield from self.dangling(entry, MOVE_FIELDS)
+
+    def check_table(
+        self,
+        file: str,
+        table: Mapping[str, Mapping[str, Any]],
+        check: Callable[[Mapping[str, Any]], Iterable[tuple[str, Any, str]]],
+    ) -> Iterator[Problem]:
+        for key, entry in table.items():
+            for field, value, target in check(entry):
+                yield Problem(file, key, field, value, target)
+
+
+def load_table(
+    path: Path, table: tuple[str, ...], codec: Codec
+) -> Mapping[str, Mapping[str, Any]]:
+    entries = get_table(load_document(path, table, codec), table)
+    # Saves still in the Pokemon editor's journal, without folding them in
+    if not isinstance(entries, ENTRY_STORES):
+        Journal(path, codec.load, codec.dump).replay(entries)
+    return entries
+
+
+def check_directory(directory: Path) -> tuple[list[Problem], int]:
+    # Returns the dangling references and the number of entries checked
+    (pkm_file, pkm_table) = FILES["pokemon"]
+    (moves_file, moves_table) = FILES["moves"]
+    pokemon = load_table(directory / pkm_file, pkm_table, get_codec("tomli"))
+    moves = load_table(directory / moves_file, moves_table, get_codec("rtoml"))
+    loads = get_codec("tomli").loads
+    names: dict[str, Container[str]] = {"pokemon": set(pokemon), "moves": set(moves)}
+    for target in ("items", "abilities", "types"):
+        (file, table) = FILES[target]
+        names[target] = set(load_keys(directory / file, table, loads))
+    references = References(names)
+    problems = [
+        *references.check_table(pkm_file, pokemon, references.check_pokemon),
+        *references.check_table(moves_file, moves, references.check_move),
+    ]
+    return (problems, len(pokemon) + len(moves))
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m pkdb.integrity")
+    parser.add_argument(
+        "directory", nargs="?", type=Path, default=Path("."), help="database folder"
+    )
+    args = parser.parse_args()
+    missing = [
+        file for file, _ in FILES.values() if not database_exists(args.directory / file)
+    ]
+    if missing:
+        parser.error(f"{', '.join(missing)} not found in {args.directory}")
+    start = time.perf_counter()
+    (problems, checked) = check_directory(args.directory)
+    for problem in problems:
+        print(problem)
+    elapsed = time.perf_counter() - start
+    print(
+        f"{len(problems)} dangling references in {checked} entries ({elapsed:.2f}s)",
+        file=sys.stderr,
+    )
+    sys.exit(1 if problems else 0)
+
+
+if __name__ == "__main__":
+    main()
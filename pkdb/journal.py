@@ -0,0 +1,174 @@
+"""Append-only change journal kept next to a TOML database.
+
+Saving an entry appends one JSON line to ``<file>.journal`` instead of
+rewriting the whole database, with a null entry when it was removed. The
+journal is replayed over the parsed file on load and folded back into it by
+a background compaction, which re-serializes the database exactly like a full
+save would.
+"""
+import json
+import os
+import threading
+from collections.abc import Iterable, Iterator, MutableMapping
+from pathlib import Path
+from typing import Any
+
+from pkdb.files import Dumper, Loader, atomic_dump
+
+
+class Journal:
+    path: Path
+    log_path: Path
+    compacting_path: Path
+
+    def __init__(self, path: Path, load: Loader, dump: Dumper):
+        self.path = path
+        self.log_path = path.with_name(path.name + ".journal")
+        self.compacting_path = path.with_name(path.name + ".journal.compacting")
+        self.load = load
+        self.dump = dump
+        self._lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+
+    def size(self) -> int:
+        try:
+            return self.log_path.stat().st_size
+        except FileNotFoundError:
+            return 0
+
+    def pending(self) -> bool:
+        return self.log_path.exists() or self.compacting_path.exists()
+
+    def replay(self, data: dict[str, Any]) -> dict[str, Any]:
+        # Records being compacted are older than the ones in the live log
+        for log in (self.compacting_path, self.log_path):
+            apply_records(data, read_records(log))
+        return data
+
+    def append(self, key: str, entry: dict[str, Any] | None) -> int:
+        # Returns the number of bytes appended
+        line = json.dumps({"key": key, "entry": entry}, separators=(",", ":"))
+        data = (line + "\n").encode("utf-8")
+        with self._lock:
+            with open(self.log_path, "ab") as file:
+                file.write(data)
+                file.flush()
+                os.fsync(file.fileno())
+        return len(data)
+
+    def compact(self, block: bool = False):
+        with self._lock:
+            running = self._thread is not None and self._thread.is_alive()
+            if not running and self.pending():
+                self._thread = threading.Thread(target=self._compact, daemon=False)
+                self._thread.start()
+        if block:
+            self.wait()
+            # Entries appended while the last compaction was running
+            while self.pending():
+                self._compact()
+
+    def wait(self):
+        if self._thread is not None:
+            self._thread.join()
+
+    def _compact(self):
+        with self._lock:
+            # Rotate the live log so new saves keep appending while we fold
+            if not self.compacting_path.exists():
+                if not self.log_path.exists():
+                    return
+                os.replace(self.log_path, self.compacting_path)
+        data = self.load(self.path)
+        apply_records(data, read_records(self.compacting_path))
+        atomic_dump(self.dump, self.path, data)
+        # Replaying this file again would be harmless, so a crash here is safe
+        self.compacting_path.unlink()
+
+
+def apply_records(
+    data: MutableMapping[str, Any], records: Iterable[tuple[str, dict[str, Any] | None]]
+):
+    for key, entry in records:
+        if entry is None:
+            data.pop(key, None)
+        else:
+            data[key] = entry
+
+
+class JournalReader:
+    """Reads the records appended to a journal since the last read.
+
+    Other processes follow the saves of the editor writing the journal this
+    way, reading each record once.
+    """
+
+    def __init__(self, journal: Journal):
+        self.journal = journal
+        # Inode of the log read last, and the offset read up to
+        self.inode: int | None = None
+        self.offset = 0
+        # Stamp of the database when it was read, compactions rewrite it
+        self.stamp: tuple[int, int] | None = None
+
+    def read_new(self) -> list[tuple[str, dict[str, Any] | None]] | None:
+        # None when records may have been missed, because the log read last
+        # was folded into the database since
+        records = []
+        # A new log may reuse the inode of a folded one
+        if self.stamp is not None and self.database_stamp() != self.stamp:
+            return None
+        self.stamp = self.database_stamp()
+        if self.inode is not None and not self.same_file(self.journal.log_path):
+            # Rotated for compaction, its end is read from the compacting file
+            if not self.same_file(self.journal.compacting_path):
+                return None
+            records += self.read(self.journal.compacting_path)
+            (self.inode, self.offset) = (None, 0)
+        records += self.read(self.journal.log_path)
+        return records
+
+    def database_stamp(self) -> tuple[int, int]:
+        try:
+            stat = os.stat(self.journal.path)
+        except FileNotFoundError:
+            return (0, 0)
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def same_file(self, path: Path) -> bool:
+        try:
+            return os.stat(path).st_ino == self.inode
+        except FileNotFoundError:
+            return False
+
+    def read(self, path: Path) -> list[tuple[str, dict[str, Any] | None]]:
+        try:
+            file = open(path, "rb")
+        except FileNotFoundError:
+            return []
+        with file:
+            self.inode = os.fstat(file.fileno()).st_ino
+            file.seek(self.offset)
+            data = file.read()
+        # A line without its newline is still being written, it is read next
+        lines = data.split(b"\n")[:-1]
+        self.offset += sum(len(line) + 1 for line in lines)
+        return [parse_record(line.decode("utf-8")) for line in lines]
+
+
+def parse_record(line: str) -> tuple[str, dict[str, Any] | None]:
+    record = json.loads(line)
+    return (record["key"], record["entry"])
+
+
+def read_records(path: Path) -> Iterator[tuple[str, dict[str, Any] | None]]:
+    try:
+        file = open(path, "r", encoding="utf-8")
+    except FileNotFoundError:
+        return
+    with file:
+        for line in file:
+            # A missing newline means the last write was interrupted
+            if not line.endswith("\n"):
+                break
+            yield parse_record(line)
@@ -0,0 +1,120 @@
+"""Pokemon learning each move, and at which levels.
+
+The index maps the key of every move to the Pokemon learning it, so looking
+a move up costs one dict lookup whatever the number of Pokemon. It also
+keeps the moves of each Pokemon, so a saved Pokemon is updated by dropping
+its old rows and adding the new ones, without going over the others.
+
+Usage: python -m pkdb.learners MOVE [DIRECTORY]
+"""
+import argparse
+import os
+from collections.abc import Iterable, Mapping
+from pathlib import Path
+from typing import Any
+
+from pkdb.codec import Codec, get_codec
+from pkdb.integrity import FILES
+from pkdb.journal import Journal, JournalReader, apply_records, read_records
+from pkdb.loader import ENTRY_STORES, database_exists, load_document
+from pkdb.rename import name_key
+from pkdb.shards import get_table, shard_dir
+from pkdb.sqlite import SqliteTable, sqlite_path
+from pkdb.transfer import iter_entries
+
+Stamp = tuple[tuple[int, int, int] | None, ...]
+
+
+class Learners:
+    """Pokemon key to the levels it learns a move at, by move key."""
+
+    def __init__(self):
+        self.by_move: dict[str, dict[str, tuple[int, ...]]] = {}
+        # Keys of the moves each Pokemon learns
+        self.moves_of: dict[str, tuple[str, ...]] = {}
+
+    def __len__(self) -> int:
+        return len(self.moves_of)
+
+    def update(self, key: str, entry: Mapping[str, Any] | None):
+        # Replaces the moves of a Pokemon, None when it was removed
+        for move in self.moves_of.pop(key, ()):
+            pokemon = self.by_move[move]
+            del pokemon[key]
+            if not pokemon:
+                del self.by_move[move]
+        if entry is None:
+            return
+        levels: dict[str, list[int]] = {}
+        for row in entry.get("moves") or ():
+            if (move := row.get("move")) and isinstance(move, str):
+                levels.setdefault(name_key(move), []).append(row.get("lvl", 1))
+        for move, move_levels in levels.items():
+            self.by_move.setdefault(move, {})[key] = tuple(move_levels)
+        if levels:
+            self.moves_of[key] = tuple(levels)
+
+    def update_all(self, entries: Iterable[tuple[str, Mapping[str, Any] | None]]):
+        for key, entry in entries:
+            self.update(key, entry)
+
+    def find(self, move: str) -> dict[str, tuple[int, ...]]:
+        return self.by_move.get(name_key(move), {})
+
+
+def database_stamp(path: Path) -> Stamp:
+    # Changes whenever the database is saved, except by appending to the
+    # journal of the Pokemon editor
+    wal_path = sqlite_path(path).with_name(sqlite_path(path).name + "-wal")
+    stamps = []
+    for file in (path, sqlite_path(path), wal_path, shard_dir(path)):
+        try:
+            stat = os.stat(file)
+        except FileNotFoundError:
+            stamps.append(None)
+            continue
+        stamps.append((stat.st_mtime_ns, stat.st_size, stat.st_ino))
+    return tuple(stamps)
+
+
+def load_learners(
+    path: Path, codec: Codec
+) -> tuple[Learners, JournalReader | None, Stamp]:
+    # The index, a reader of the saves appended to the journal after those
+    # read here (None for split and SQLite databases, which have none), and
+    # the stamp of the database it was built from
+    stamp = database_stamp(path)
+    entries = get_table(load_document(path, (), codec), ())
+    learners = Learners()
+    if isinstance(entries, ENTRY_STORES):
+        try:
+            learners.update_all(iter_entries(entries))
+        finally:
+            if isinstance(entries, SqliteTable):
+                entries.close()
+        return (learners, None, stamp)
+    journal = Journal(path, codec.load, codec.dump)
+    apply_records(entries, read_records(journal.compacting_path))
+    reader = JournalReader(journal)
+    apply_records(entries, reader.read_new() or ())
+    learners.update_all(entries.items())
+    return (learners, reader, stamp)
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m pkdb.learners")
+    parser.add_argument("move", help="name of the move")
+    parser.add_argument(
+        "directory", nargs="?", type=Path, default=Path("."), help="database folder"
+    )
+    args = parser.parse_args()
+    path = args.directory / FILES["pokemon"][0]
+    if not database_exists(path):
+        parser.error(f"{path.name} not found in {args.directory}")
+    (learners, _, _) = load_learners(path, get_codec("tomli"))
+    for key, levels in learners.find(args.move).items():
+        print(f"{key.replace('_', ' ')}: {', '.join(map(str, levels))}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""Loads the databases an editor opens at start-up concurrently.
+
+Parsing is CPU bound, so the largest file is loaded in the calling process
+while other large files are parsed in worker processes. Small files are not
+worth starting a process for and are loaded in between. ``PKDB_LOADER``
+forces ``process``, ``thread`` or ``serial`` loading of all other files.
+"""
+import concurrent.futures
+import contextlib
+import logging
+import multiprocessing
+import os
+import time
+from pathlib import Path
+from typing import Any, Callable, MutableMapping, NamedTuple
+
+from pkdb.cache import load_cached
+from pkdb.codec import Codec
+from pkdb.config import get_flag, get_int, get_str
+from pkdb.index import IndexingError, LazyTable, TableIndex
+from pkdb.shards import ShardedTable, nest, shard_dir
+from pkdb.sqlite import SqliteTable, sqlite_path
+
+log = logging.getLogger(__name__)
+
+# Databases that save single entries instead of rewriting the whole file
+ENTRY_STORES = (ShardedTable, SqliteTable)
+
+
+class Job(NamedTuple):
+    function: Callable[..., Any]
+    path: Path
+    args: tuple[Any, ...] = ()
+
+
+def load_document(
+    path: Path, table: tuple[str, ...], codec: Codec
+) -> MutableMapping[str, Any]:
+    # A split database is read from its shards, each one when it is first used
+    if shard_dir(path).is_dir():
+        shards = ShardedTable(shard_dir(path), codec)
+        if shards.table != table:
+            raise ValueError(f"{shard_dir(path)} does not hold the {table} table")
+        return nest(table, shards)
+    if sqlite_path(path).exists():
+        rows = SqliteTable(sqlite_path(path))
+        if rows.table != table:
+            raise ValueError(f"{sqlite_path(path)} does not hold the {table} table")
+        return nest(table, rows)
+    # In lazy mode only the entries of `table` are indexed, without parsing
+    if get_flag("LAZY"):
+        try:
+            return nest(table, LazyTable(TableIndex(path, table, codec.loads)))
+        except IndexingError:
+            pass
+    return load_cached(path, codec.load)
+
+
+def timed(job: Job) -> tuple[Any, float]:
+    start = time.perf_counter()
+    result = job.function(job.path, *job.args)
+    return (result, time.perf_counter() - start)
+
+
+def database_exists(path: Path) -> bool:
+    return path.exists() or shard_dir(path).is_dir() or sqlite_path(path).exists()
+
+
+def file_size(path: Path) -> int:
+    # Split and SQLite databases only read their keys at start-up, and must
+    # stay in this process as they are opened for saving
+    if shard_dir(path).is_dir() or sqlite_path(path).exists() or not path.exists():
+        return 0
+    return path.stat().st_size
+
+
+def plan(jobs: dict[str, Job]) -> tuple[concurrent.futures.Executor | None, set[str]]:
+    # Picks an executor and the jobs it runs, the largest file stays here
+    sizes = {name: file_size(job.path) for name, job in jobs.items()}
+    largest = max(sizes, key=sizes.__getitem__, default=None)
+    mode = get_str("LOADER", "auto")
+    offload = {name for name in jobs if name != largest and sizes[name]}
+    if mode == "auto":
+        # Starting a worker process only pays off for large files
+        threshold = get_int("PARALLEL_BYTES", 4 << 20)
+        offload = {name for name in offload if sizes[name] >= threshold}
+        mode = "process" if offload and (os.cpu_count() or 1) > 1 else "serial"
+    if not offload:
+        return (None, offload)
+    match mode:
+        case "process":
+            # Forking a process that runs Qt threads is unsafe, always spawn
+            context = multiprocessing.get_context("spawn")
+            return (
+                concurrent.futures.ProcessPoolExecutor(len(offload), context),
+                offload,
+            )
+        case "thread":
+            return (concurrent.futures.ThreadPoolExecutor(len(offload)), offload)
+    return (None, set())
+
+
+def load_all(jobs: dict[str, Job]) -> tuple[dict[str, Any], dict[str, float]]:
+    # Returns the result and the load time of every job
+    start = time.perf_counter()
+    (executor, offload) = plan(jobs)
+    done: dict[str, tuple[Any, float]] = {}
+    with executor or contextlib.nullcontext():
+        futures = {name: executor.submit(timed, jobs[name]) for name in offload}
+        # The remaining files are loaded here while the workers parse theirs
+        for name in jobs.keys() - offload:
+            done[name] = timed(jobs[name])
+        for name, future in futures.items():
+            done[name] = future.result()
+    results = {name: done[name][0] for name in jobs}
+    timings = {name: done[name][1] for name in jobs}
+    for name, seconds in timings.items():
+        log.info("Loaded %s in %.3fs", jobs[name].path.name, seconds)
+    timings["total"] = time.perf_counter() - start
+    log.info("Loaded %d files in %.3fs", len(jobs), timings["total"])
+    return (results, timings)
+
+
+def format_timings(timings: dict[str, float]) -> str:
+    files = ", ".join(
+        f"{name} {seconds:.2f}s" for name, seconds in timings.items() if name != "total"
+    )
+    return f"Loaded in {timings['total']:.2f}s ({files})"
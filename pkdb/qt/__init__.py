@@ -0,0 +1 @@
+"""Qt helpers shared by both editors (the rest of pkdb does not import Qt)."""
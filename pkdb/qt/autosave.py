@@ -0,0 +1,55 @@
+"""Autosave scheduler flushing a DirtyTable from the Qt event loop."""
+from PySide6.QtCore import QObject, QTimer, Signal
+
+from pkdb.config import get_int, get_str
+from pkdb.dirty import DirtyTable
+
+MODES = ("save", "interval", "idle", "close")
+
+
+class Autosave(QObject):
+    """Flushes the dirty entries of a table as ``PKDB_AUTOSAVE`` selects.
+
+    ``save`` writes on every save, ``interval`` every ``PKDB_AUTOSAVE_MS``,
+    ``idle`` once no entry was saved for ``PKDB_AUTOSAVE_IDLE_MS`` and
+    ``close`` only when the editor is closed, which every mode does too.
+    """
+
+    flushed = Signal(int)
+    failed = Signal(str)
+
+    def __init__(self, table: DirtyTable, parent: QObject | None = None):
+        super().__init__(parent)
+        self.table = table
+        self.mode = get_str("AUTOSAVE", "save")
+        if self.mode not in MODES:
+            raise ValueError(f"Unknown autosave mode {self.mode!r}, expected {MODES}")
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.flush)  # type: ignore
+        match self.mode:
+            case "interval":
+                self.timer.start(get_int("AUTOSAVE_MS", 30000))
+            case "idle":
+                self.timer.setSingleShot(True)
+                self.timer.setInterval(get_int("AUTOSAVE_IDLE_MS", 2000))
+
+    def changed(self):
+        # Called after every edit of the table
+        match self.mode:
+            case "save":
+                self.flush()
+            case "idle":
+                self.timer.start()
+
+    def flush(self):
+        try:
+            count = self.table.flush()
+        except Exception as error:
+            self.failed.emit(str(error))
+            return
+        if count:
+            self.flushed.emit(count)
+
+    def close(self):
+        self.timer.stop()
+        self.flush()
@@ -0,0 +1,108 @@
+"""Dialog editing every entry matching a filter, or the selected ones."""
+from collections.abc import Mapping, MutableMapping
+from typing import Any
+
+from PySide6.QtCore import QTimer
+from PySide6.QtWidgets import (
+    QCheckBox,
+    QDialog,
+    QDialogButtonBox,
+    QFormLayout,
+    QLabel,
+    QLineEdit,
+    QWidget,
+)
+
+from pkdb import bulk
+
+
+class BulkEditDialog(QDialog):
+    """Previews and applies assignments to many entries.
+
+    Accepting replaces the changed entries in ``table`` and leaves them as
+    they were in ``changed``, by key; the caller writes them all in one save.
+    Only the names in ``fields``, the defaults of the record type, can be
+    assigned.
+    """
+
+    def __init__(
+        self,
+        table: MutableMapping[str, dict[str, Any]],
+        fields: Mapping[str, Any],
+        selected: list[str] | None = None,
+        parent: QWidget | None = None,
+    ):
+        super().__init__(parent)
+        self.setWindowTitle("Bulk edit")
+        self.table = table
+        self.fields = fields
+        self.selected = selected or []
+        self.changed: dict[str, dict[str, Any]] = {}
+
+        self.filter = QLineEdit(self)
+        self.filter.setPlaceholderText("type1 = Fire, power >= 50 (empty for all)")
+        self.assignments = QLineEdit(self)
+        self.assignments.setPlaceholderText("pp = 10, power *= 1.1")
+        self.only_selected = QCheckBox(f"{len(self.selected)} selected only", self)
+        self.only_selected.setChecked(bool(self.selected))
+        self.only_selected.setVisible(bool(self.selected))
+        self.preview = QLabel(self)
+        self.buttons = QDialogButtonBox(
+            QDialogButtonBox.Apply | QDialogButtonBox.Cancel, self
+        )
+        self.buttons.button(QDialogButtonBox.Apply).clicked.connect(self.apply)  # type: ignore
+        self.buttons.rejected.connect(self.reject)  # type: ignore
+
+        layout = QFormLayout(self)
+        layout.addRow("Filter", self.filter)
+        layout.addRow("Change", self.assignments)
+        layout.addRow(self.only_selected)
+        layout.addRow(self.preview)
+        layout.addRow(self.buttons)
+
+        # Count the matches once typing stops, each count reads every entry
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(200)
+        self.timer.timeout.connect(self.update_preview)  # type: ignore
+        self.filter.textChanged.connect(lambda: self.timer.start())  # type: ignore
+        self.assignments.textChanged.connect(lambda: self.timer.start())  # type: ignore
+        self.only_selected.toggled.connect(lambda: self.timer.start())  # type: ignore
+        self.update_preview()
+
+    def parse(self) -> tuple[list[str], list[bulk.Assignment] | None]:
+        # Raises ValueError for an invalid filter or assignment, previews and
+        # applies also for a value a field cannot hold
+        conditions = bulk.parse_filter(self.filter.text())
+        keys = self.selected if self.only_selected.isChecked() else None
+        matched = bulk.select(self.table, conditions, keys)
+        if not self.assignments.text().strip():
+            return (matched, None)
+        return (matched, bulk.parse_assignments(self.assignments.text(), self.fields))
+
+    def update_preview(self):
+        apply_button = self.buttons.button(QDialogButtonBox.Apply)
+        try:
+            (keys, assignments) = self.parse()
+            if assignments is not None:
+                count = bulk.preview(self.table, keys, assignments)
+        except ValueError as error:
+            self.preview.setText(str(error))
+            apply_button.setEnabled(False)
+            return
+        if assignments is None:
+            self.preview.setText(f"{len(keys)} entries match")
+            apply_button.setEnabled(False)
+            return
+        self.preview.setText(f"{len(keys)} entries match, {count} would change")
+        apply_button.setEnabled(count > 0)
+
+    def apply(self):
+        try:
+            (keys, assignments) = self.parse()
+            if assignments:
+                self.changed = bulk.apply(self.table, keys, assignments)
+        except ValueError as error:
+            self.preview.setText(str(error))
+            return
+        self.accept()
@@ -0,0 +1,33 @@
+"""Completer feeding an editable combo box from a SearchIndex."""
+from PySide6.QtCore import QObject, QStringListModel, Qt
+from PySide6.QtWidgets import QComboBox, QCompleter
+
+from pkdb.search import SearchIndex
+
+
+class SearchCompleter(QCompleter):
+    """Popup showing the best matches of the text typed so far.
+
+    Its model only ever holds the current results, so Qt never filters or
+    lays out the whole list of names.
+    """
+
+    def __init__(self, index: SearchIndex, parent: QObject | None = None):
+        self.results = QStringListModel()
+        super().__init__(self.results, parent)
+        self.results.setParent(self)
+        self.search = index
+        self.setCompletionMode(QCompleter.CompletionMode.UnfilteredPopupCompletion)
+        self.setCaseSensitivity(Qt.CaseSensitivity.CaseInsensitive)
+
+    def attach(self, combo: QComboBox):
+        combo.setCompleter(self)
+        combo.lineEdit().textEdited.connect(self.update_results)  # type: ignore
+
+    def update_results(self, text: str):
+        results = self.search.search(text) if text else []
+        self.results.setStringList(results)
+        if results:
+            self.complete()
+        else:
+            self.popup().hide()
@@ -0,0 +1,59 @@
+"""Fills an editor's form with the entry named in its "Name" box."""
+from contextlib import contextmanager
+from typing import Any, Callable, Iterable, Iterator
+
+from PySide6.QtCore import QObject, QTimer
+from PySide6.QtWidgets import QComboBox
+
+from pkdb.config import get_int
+
+
+@contextmanager
+def signals_blocked(objects: Iterable[QObject]) -> Iterator[None]:
+    blocked = [(obj, obj.blockSignals(True)) for obj in objects]
+    try:
+        yield
+    finally:
+        for obj, was_blocked in blocked:
+            obj.blockSignals(was_blocked)
+
+
+class EntryLoader(QObject):
+    """Shows the entry named in ``combo`` once typing stops.
+
+    Choosing a name from the list shows it at once, typing waits for
+    ``PKDB_LOAD_DELAY_MS`` without keystrokes. The form is only filled when
+    the name resolves to another entry than the one shown, with the signals
+    of ``widgets`` blocked so filling it does not trigger their handlers.
+    """
+
+    def __init__(
+        self,
+        combo: QComboBox,
+        lookup: Callable[[str], Any],
+        show: Callable[[Any], None],
+        widgets: Iterable[QObject],
+        parent: QObject | None = None,
+    ):
+        super().__init__(parent)
+        self.combo = combo
+        self.lookup = lookup
+        self.show = show
+        self.widgets = list(widgets)
+        # Entries are replaced when saved, so identity tells a changed entry
+        self.shown: Any = None
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(get_int("LOAD_DELAY_MS", 150))
+        self.timer.timeout.connect(self.load)  # type: ignore
+        combo.currentTextChanged.connect(lambda: self.timer.start())  # type: ignore
+        combo.activated.connect(self.load)  # type: ignore
+
+    def load(self):
+        self.timer.stop()
+        entry = self.lookup(self.combo.currentText())
+        if entry is None or entry is self.shown:
+            return
+        self.shown = entry
+        with signals_blocked(self.widgets):
+            self.show(entry)
@@ -0,0 +1,62 @@
+"""Reference checks of an editor window."""
+from collections.abc import Iterable, Mapping
+from typing import Any, Callable
+
+from PySide6.QtGui import QAction
+from PySide6.QtWidgets import QLabel, QMainWindow, QMessageBox
+
+from pkdb.integrity import Problem, References
+
+Check = Callable[[Mapping[str, Any]], Iterable[tuple[str, Any, str]]]
+
+
+class ReferenceCheck:
+    """Dangling references of the entry shown, and of every entry on demand.
+
+    The status bar counts those of the entry shown or saved last, listed in
+    its tooltip, and ``action`` checks the whole table.
+    """
+
+    def __init__(
+        self,
+        references: References,
+        file: str,
+        table: Mapping[str, Mapping[str, Any]],
+        check: Check,
+        window: QMainWindow,
+    ):
+        self.references = references
+        self.file = file
+        self.table = table
+        self.check = check
+        self.window = window
+        self.label = QLabel(window)
+        self.label.setStyleSheet("color: red")
+        window.statusBar().addPermanentWidget(self.label)
+        self.action = QAction("Check references", window)
+        self.action.triggered.connect(self.check_all)  # type: ignore
+
+    def show_entry(self, key: str, entry: Mapping[str, Any] | None):
+        problems = self.problems({key: entry} if entry else {})
+        count = len(problems)
+        if count:
+            self.label.setText(f"{count} dangling reference{'' if count == 1 else 's'}")
+        else:
+            self.label.clear()
+        self.label.setToolTip("\n".join(map(str, problems)))
+
+    def check_all(self):
+        problems = self.problems(self.table)
+        box = QMessageBox(self.window)
+        box.setWindowTitle("Check references")
+        if problems:
+            keys = len({problem.key for problem in problems})
+            box.setIcon(QMessageBox.Warning)
+            box.setText(f"{len(problems)} dangling references in {keys} entries")
+            box.setDetailedText("\n".join(map(str, problems)))
+        else:
+            box.setText(f"Every reference of the {len(self.table)} entries exists")
+        box.exec()
+
+    def problems(self, table: Mapping[str, Mapping[str, Any]]) -> list[Problem]:
+        return list(self.references.check_table(self.file, table, self.check))
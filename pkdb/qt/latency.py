@@ -0,0 +1,57 @@
+"""Measures how long an action takes to show up on screen."""
+import logging
+import statistics
+import time
+from collections import deque
+
+from PySide6.QtCore import QEvent, QObject, QTimer, Signal
+from PySide6.QtWidgets import QWidget
+
+log = logging.getLogger(__name__)
+
+
+class RenderLatency(QObject):
+    """Time from ``start()`` until the widgets it changed are repainted.
+
+    Changed widgets are painted together while their window handles its next
+    UpdateRequest, which Qt delivers after the zero timers queued before it.
+    A zero timer queued from that event fires once the painting is done.
+    """
+
+    measured = Signal(float)
+
+    def __init__(self, name: str, window: QWidget, parent: QObject | None = None):
+        super().__init__(parent)
+        self.name = name
+        self.window = window
+        self.samples: deque[float] = deque(maxlen=100)
+        self.started: float | None = None
+
+    def start(self):
+        # Only the first action before a repaint is measured
+        if self.started is None:
+            self.started = time.perf_counter()
+            self.window.installEventFilter(self)
+
+    def eventFilter(self, watched: QObject, event: QEvent) -> bool:
+        if event.type() == QEvent.Type.UpdateRequest:
+            self.window.removeEventFilter(self)
+            QTimer.singleShot(0, self.finish)
+        return False
+
+    def finish(self):
+        if self.started is None:
+            return
+        self.samples.append(time.perf_counter() - self.started)
+        self.started = None
+        log.info("%s rendered in %.1f ms", self.name, self.samples[-1] * 1000)
+        self.measured.emit(self.samples[-1])
+
+    def summary(self) -> str:
+        if not self.samples:
+            return f"{self.name}: no samples"
+        median = statistics.median(self.samples) * 1000
+        return (
+            f"{self.name}: {median:.1f} ms median, "
+            f"{max(self.samples) * 1000:.1f} ms max of {len(self.samples)}"
+        )
@@ -0,0 +1,206 @@
+"""Side panel listing the Pokemon that learn the move shown."""
+from collections.abc import Iterable, Mapping
+from pathlib import Path
+from typing import Any
+
+from PySide6.QtCore import (
+    QAbstractTableModel,
+    QFileSystemWatcher,
+    QModelIndex,
+    QObject,
+    QPersistentModelIndex,
+    QSortFilterProxyModel,
+    Qt,
+    QThreadPool,
+    QTimer,
+    Signal,
+)
+from PySide6.QtWidgets import (
+    QDockWidget,
+    QHeaderView,
+    QLabel,
+    QMainWindow,
+    QTableView,
+    QVBoxLayout,
+    QWidget,
+)
+
+from pkdb.codec import Codec
+from pkdb.journal import Journal, JournalReader
+from pkdb.learners import Learners, Stamp, database_stamp, load_learners
+from pkdb.shards import shard_dir
+from pkdb.sqlite import sqlite_path
+
+Index = QModelIndex | QPersistentModelIndex
+
+# Wait for the file system to settle before reading a save
+REFRESH_MS = 200
+
+
+class LearnersModel(QAbstractTableModel):
+    """One row per Pokemon and level."""
+
+    HEADERS = ("Pokémon", "Level")
+
+    def __init__(self, parent: QObject | None = None):
+        super().__init__(parent)
+        self.rows: list[tuple[str, int]] = []
+
+    def set_learners(self, learners: Mapping[str, tuple[int, ...]]):
+        self.beginResetModel()
+        self.rows = [
+            (key.replace("_", " "), level)
+            for key, levels in learners.items()
+            for level in levels
+        ]
+        self.endResetModel()
+
+    def rowCount(self, parent: Index = QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self.rows)
+
+    def columnCount(self, parent: Index = QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self.HEADERS)
+
+    def data(self, index: Index, role: int = Qt.DisplayRole) -> Any:
+        if role == Qt.DisplayRole and index.isValid():
+            return self.rows[index.row()][index.column()]
+        return None
+
+    def headerData(
+        self, section: int, orientation: Qt.Orientation, role: int = Qt.DisplayRole
+    ) -> Any:
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self.HEADERS[section]
+        return None
+
+
+class LearnersPanel(QDockWidget):
+    """Pokemon learning the move shown, from an index of pokemon.toml.bytes.
+
+    The index is built on a worker thread, and built again when another
+    editor saves the database. Saves appended to the Pokemon editor's journal
+    only update the Pokemon they hold.
+    """
+
+    # Result of load_learners, or the error, from the worker thread
+    loaded = Signal(object)
+
+    def __init__(self, path: Path, codec: Codec, window: QMainWindow):
+        super().__init__("Learned by", window)
+        self.path = path
+        self.codec = codec
+        self.journal = Journal(path, codec.load, codec.dump)
+        self.learners = Learners()
+        self.reader: JournalReader | None = None
+        self.stamp: Stamp | None = None
+        self.shown = ""
+        (self.loading, self.stale) = (False, False)
+
+        self.model = LearnersModel(self)
+        proxy = QSortFilterProxyModel(self)
+        proxy.setSourceModel(self.model)
+        view = QTableView(self)
+        view.setModel(proxy)
+        view.setSortingEnabled(True)
+        view.sortByColumn(1, Qt.AscendingOrder)
+        view.verticalHeader().hide()
+        view.horizontalHeader().setSectionResizeMode(0, QHeaderView.Stretch)
+        self.label = QLabel(self)
+        widget = QWidget(self)
+        layout = QVBoxLayout(widget)
+        layout.addWidget(self.label)
+        layout.addWidget(view)
+        self.setWidget(widget)
+        window.addDockWidget(Qt.RightDockWidgetArea, self)
+
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(1)
+        self.loaded.connect(self.swap)  # type: ignore
+        # Saves of other editors are noticed through the file system
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(REFRESH_MS)
+        self.timer.timeout.connect(self.refresh)  # type: ignore
+        self.watcher = QFileSystemWatcher(self)
+        self.watcher.directoryChanged.connect(self.changed)  # type: ignore
+        self.watcher.fileChanged.connect(self.changed)  # type: ignore
+        self.watch()
+        self.reload()
+
+    def show_move(self, name: str):
+        self.shown = name
+        learners = self.learners.find(name)
+        self.model.set_learners(learners)
+        if self.loading and self.stamp is None:
+            self.label.setText(f"Reading {self.path.name}...")
+        elif name:
+            count = len(learners)
+            self.label.setText(
+                f"{count} Pokémon learn{'s' if count == 1 else ''} {name}"
+            )
+        else:
+            self.label.clear()
+
+    def update_pokemon(self, entries: Iterable[tuple[str, Mapping[str, Any] | None]]):
+        # Pokemon saved by this editor, such as learnsets renaming a move
+        self.learners.update_all(entries)
+        self.show_move(self.shown)
+
+    def watch(self):
+        # Files replaced by a save are no longer watched, and the journal or
+        # databases may be created later
+        paths = (
+            self.path.parent,
+            self.path,
+            self.journal.log_path,
+            sqlite_path(self.path),
+            shard_dir(self.path),
+        )
+        watched = set(self.watcher.files() + self.watcher.directories())
+        new = [str(path) for path in paths if path.exists()]
+        if new := [path for path in new if path not in watched]:
+            self.watcher.addPaths(new)
+
+    def changed(self):
+        self.watch()
+        self.timer.start()
+
+    def refresh(self):
+        if self.loading:
+            self.stale = True
+            return
+        if database_stamp(self.path) != self.stamp:
+            self.reload()
+            return
+        # Only the saves appended to the journal since are read
+        if self.reader is not None:
+            records = self.reader.read_new()
+            if records is None:
+                self.reload()
+            elif records:
+                self.update_pokemon(records)
+
+    def reload(self):
+        (self.loading, self.stale) = (True, False)
+        self.pool.start(self.load)
+        self.show_move(self.shown)
+
+    def load(self):
+        try:
+            self.loaded.emit(load_learners(self.path, self.codec))
+        except Exception as error:
+            self.loaded.emit(error)
+
+    def swap(self, result: Any):
+        self.loading = False
+        if isinstance(result, Exception):
+            self.label.setText(f"Could not read {self.path.name}: {result}")
+            return
+        (self.learners, self.reader, self.stamp) = result
+        self.show_move(self.shown)
+        # Saved again while it was being read
+        if self.stale or database_stamp(self.path) != self.stamp:
+            self.timer.start()
+
+    def wait(self):
+        self.pool.waitForDone()
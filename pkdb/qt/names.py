@@ -0,0 +1,73 @@
+"""Name lists shared by every combo box choosing from the same names."""
+from typing import Iterable
+
+from PySide6.QtCore import QObject, QStringListModel
+from PySide6.QtWidgets import QComboBox, QListView
+
+from pkdb.search import SearchIndex
+
+
+class NameList(QStringListModel):
+    """List model of unique names, shown by any number of combo boxes.
+
+    Combo boxes only point at the model, so building one costs the same
+    whatever the number of names, and a name added once shows up in all of
+    them.
+    """
+
+    def __init__(self, names: Iterable[str] = (), parent: QObject | None = None):
+        names = list(dict.fromkeys(names))
+        super().__init__(names, parent)
+        self.names = set(names)
+        # Not "index", which would hide QStringListModel.index()
+        self.search: SearchIndex | None = None
+        self.combos: list[QComboBox] = []
+
+    def __contains__(self, name: object) -> bool:
+        return name in self.names
+
+    def add(self, name: str):
+        if not name or name in self.names:
+            return
+        self.names.add(name)
+        if self.search is not None:
+            self.search.add(name)
+        row = self.rowCount()
+        self.insertRows(row, 1)
+        self.setData(self.index(row), name)
+
+    def remove(self, name: str):
+        if name not in self.names:
+            return
+        self.names.discard(name)
+        if self.search is not None:
+            self.search.remove(name)
+        # Editable combo boxes showing the removed row would show the next one
+        texts = [combo.currentText() for combo in self.combos]
+        self.removeRows(self.stringList().index(name), 1)
+        for combo, text in zip(self.combos, texts):
+            if combo.currentText() != text:
+                combo.setCurrentText(text)
+
+    def attach(self, *combos: QComboBox):
+        # Combo boxes living as long as the list, which keeps their text when
+        # a name is removed
+        self.combos.extend(combos)
+        for combo in combos:
+            self.attach_editor(combo)
+
+    def attach_editor(self, combo: QComboBox):
+        # Short-lived delegate editors are not kept, they are deleted once
+        # their cell is committed. Typed text must not be inserted into a
+        # list other combos share
+        combo.setInsertPolicy(QComboBox.InsertPolicy.NoInsert)
+        combo.setModel(self)
+        # Rows of the same height are laid out without measuring each one
+        if isinstance(view := combo.view(), QListView):
+            view.setUniformItemSizes(True)
+
+    def search_index(self) -> SearchIndex:
+        # Built on first use, then kept up to date by add()
+        if self.search is None:
+            self.search = SearchIndex(self.names)
+        return self.search
@@ -0,0 +1,18 @@
+"""Rename action of an editor window."""
+from PySide6.QtGui import QAction
+from PySide6.QtWidgets import QInputDialog, QWidget
+
+
+def rename_action(parent: QWidget) -> QAction:
+    action = QAction("Rename", parent)
+    action.setToolTip("Rename the entry shown and every name referring to it")
+    return action
+
+
+def ask_new_name(parent: QWidget, what: str, old: str) -> str | None:
+    # The new name typed, None when cancelled or left unchanged
+    (new, ok) = QInputDialog.getText(
+        parent, f"Rename {what}", f"New name of {old}:", text=old
+    )
+    new = new.strip()
+    return new if ok and new and new != old else None
@@ -0,0 +1,56 @@
+"""Undo and redo actions of an editor window."""
+from collections.abc import Mapping
+from typing import Any
+
+from PySide6.QtCore import QObject, Signal
+from PySide6.QtGui import QAction, QKeySequence
+from PySide6.QtWidgets import QWidget
+
+from pkdb.undo import UndoStack
+
+
+class UndoActions(QObject):
+    """Undo/redo actions over an UndoStack, kept enabled and labelled."""
+
+    # Keys of the entries an undo or redo changed, and a description
+    applied = Signal(list, str)
+
+    def __init__(self, stack: UndoStack, parent: QWidget):
+        super().__init__(parent)
+        self.stack = stack
+        self.undo_action = QAction("Undo", parent)
+        self.undo_action.setShortcut(QKeySequence.Undo)
+        self.undo_action.triggered.connect(self.undo)  # type: ignore
+        self.redo_action = QAction("Redo", parent)
+        self.redo_action.setShortcut(QKeySequence.Redo)
+        self.redo_action.triggered.connect(self.redo)  # type: ignore
+        self.update()
+
+    def record(self, label: str, old: Mapping[str, dict[str, Any] | None]):
+        self.stack.record(label, old)
+        self.update()
+
+    def clear(self):
+        self.stack.clear()
+        self.update()
+
+    def undo(self):
+        label = self.stack.undo_label()
+        if keys := self.stack.undo():
+            self.update()
+            self.applied.emit(keys, f"Undone {label}")
+
+    def redo(self):
+        label = self.stack.redo_label()
+        if keys := self.stack.redo():
+            self.update()
+            self.applied.emit(keys, f"Redone {label}")
+
+    def update(self):
+        self.undo_action.setEnabled(self.stack.can_undo())
+        self.undo_action.setText(f"Undo {self.stack.undo_label()}".strip())
+        self.redo_action.setEnabled(self.stack.can_redo())
+        self.redo_action.setText(f"Redo {self.stack.redo_label()}".strip())
+        summary = self.stack.summary()
+        self.undo_action.setToolTip(f"{self.undo_action.text()} ({summary})")
+        self.redo_action.setToolTip(f"{self.redo_action.text()} ({summary})")
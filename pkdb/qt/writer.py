@@ -0,0 +1,88 @@
+"""Coalescing background writer for whole-database saves."""
+import threading
+import time
+from collections.abc import Iterable
+from pathlib import Path
+from typing import Any
+
+from PySide6.QtCore import QObject, QThreadPool, Signal
+
+from pkdb.dirty import FlushStats
+from pkdb.files import Dumper, atomic_dump
+
+
+class BackgroundWriter(QObject):
+    """Writes snapshots of a database on a worker thread.
+
+    Only the newest snapshot is kept, so saves requested while a write is
+    running are merged into a single write once it finishes. When a write
+    fails and no newer snapshot holds its edits, ``unsaved`` hands back the
+    keys it was saving so they can be marked dirty again.
+    """
+
+    pending = Signal()
+    saved = Signal()
+    failed = Signal(str)
+    unsaved = Signal(list)
+
+    def __init__(
+        self,
+        path: Path,
+        dump: Dumper,
+        parent: QObject | None = None,
+        stats: FlushStats | None = None,
+    ):
+        super().__init__(parent)
+        self.path = path
+        self.dump = dump
+        self.stats = stats
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(1)
+        self._lock = threading.Lock()
+        self._data: dict[str, Any] | None = None
+        # Keys changed in the pending snapshot since the last write
+        self._keys: dict[str, None] = {}
+        self._running = False
+
+    def save(self, data: dict[str, Any], keys: Iterable[str] = ()):
+        # The snapshot must not be mutated after it has been handed over
+        with self._lock:
+            self._data = data
+            self._keys.update(dict.fromkeys(keys))
+            start = not self._running
+            self._running = True
+        self.pending.emit()
+        if start:
+            self.pool.start(self._run)
+
+    def wait(self):
+        self.pool.waitForDone()
+
+    def _run(self):
+        while True:
+            with self._lock:
+                data, self._data = self._data, None
+                keys, self._keys = list(self._keys), {}
+                if data is None:
+                    self._running = False
+                    break
+            start = time.perf_counter()
+            try:
+                atomic_dump(self.dump, self.path, data)
+            except Exception as error:
+                with self._lock:
+                    # A newer snapshot holds these edits too
+                    if self._data is not None:
+                        self._keys = dict.fromkeys(keys) | self._keys
+                        keys = []
+                self.failed.emit(str(error))
+                if keys:
+                    self.unsaved.emit(keys)
+                continue
+            if self.stats is not None:
+                seconds = time.perf_counter() - start
+                self.stats.wrote(self.path.stat().st_size, seconds)
+            with self._lock:
+                done = self._data is None
+            if done:
+                self.saved.emit()
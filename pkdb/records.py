@@ -0,0 +1,246 @@
+"""Record types of the moves and Pokemon databases.
+
+The editors keep entries as the dicts the TOML files hold, which is what
+the storage layers save and diff. These slotted records are the typed view
+of an entry: the forms are filled from them and build them back, and tools
+that hold many entries at once can load whole tables of them, which take a
+fraction of the memory of the dicts (``python -m pkdb.bench memory``).
+
+Fields the records do not know are kept in ``extra`` and written back after
+the known ones, so loading and saving records never drops data.
+"""
+from collections.abc import Mapping
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Iterable, Protocol, TypeVar
+
+from pkdb.codec import Codec
+from pkdb.files import atomic_dump
+from pkdb.shards import get_table, load_base
+
+FLAG_COUNT = 8
+EVOLUTION_METHODS = ("Level", "Item", "Custom")
+
+
+def extra_fields(entry: Mapping[str, Any], known: frozenset[str]) -> dict | None:
+    return {k: v for k, v in entry.items() if k not in known} or None
+
+
+@dataclass(slots=True)
+class Move:
+    name: str = ""
+    type1: str = ""
+    type2: str = ""
+    category: str = ""
+    power: int = 0
+    accuracy: int = 0
+    pp: int = 0
+    target: str = ""
+    priority: int = 0
+    flags: int = 0
+    description: str = ""
+    extra: dict[str, Any] | None = None
+
+    KEYS = frozenset(
+        ("name", "type1", "type2", "category", "power", "accuracy", "pp")
+        + ("target", "priority", "flags", "description")
+    )
+
+    @classmethod
+    def from_dict(cls, entry: Mapping[str, Any]) -> "Move":
+        get = entry.get
+        return cls(
+            get("name", ""),
+            get("type1", ""),
+            get("type2", ""),
+            get("category", ""),
+            get("power", 0),
+            get("accuracy", 0),
+            get("pp", 0),
+            get("target", ""),
+            get("priority", 0),
+            get("flags", 0),
+            get("description", ""),
+            extra_fields(entry, cls.KEYS),
+        )
+
+    def to_dict(self) -> dict[str, Any]:
+        entry = {
+            "name": self.name,
+            "type1": self.type1,
+            "type2": self.type2,
+            "category": self.category,
+            "power": self.power,
+            "accuracy": self.accuracy,
+            "pp": self.pp,
+            "target": self.target,
+            "priority": self.priority,
+            "flags": self.flags,
+            "description": self.description,
+        }
+        return entry | self.extra if self.extra else entry
+
+    def has_flag(self, bit: int) -> bool:
+        return bool(self.flags & (1 << bit))
+
+    @staticmethod
+    def flags_from(checked: Iterable[bool]) -> int:
+        # Bit mask of the flags, the first one being the lowest bit
+        return sum(1 << bit for bit, on in enumerate(checked) if on)
+
+
+@dataclass(slots=True)
+class LearnsetEntry:
+    lvl: int = 1
+    move: str = ""
+
+    @classmethod
+    def from_dict(cls, entry: Mapping[str, Any]) -> "LearnsetEntry":
+        return cls(entry.get("lvl", 1), entry.get("move", ""))
+
+    def to_dict(self) -> dict[str, Any]:
+        return {"lvl": self.lvl, "move": self.move}
+
+
+@dataclass(slots=True)
+class Evolution:
+    pkm: str = ""
+    method: str = "Level"
+    # Level or item, only kept for the methods that have one
+    value: int | str | None = None
+
+    @classmethod
+    def from_dict(cls, entry: Mapping[str, Any]) -> "Evolution":
+        return cls(
+            entry.get("pkm", ""), entry.get("method", "Level"), entry.get("value")
+        )
+
+    def to_dict(self) -> dict[str, Any]:
+        entry: dict[str, Any] = {"pkm": self.pkm, "method": self.method}
+        if has_value(self.method) and self.value:
+            entry["value"] = self.value
+        return entry
+
+
+def has_value(method: str) -> bool:
+    # Only "Level" and "Item" evolutions have a value
+    return method in ("Level", "Item")
+
+
+@dataclass(slots=True)
+class Pokemon:
+    name: str = ""
+    type1: str = ""
+    type2: str = ""
+    first: str = ""
+    second: str = ""
+    hidden: str = ""
+    hp: int = 0
+    atk: int = 0
+    # Saved as "def"
+    defense: int = 0
+    sp_atk: int = 0
+    sp_def: int = 0
+    speed: int = 0
+    moves: list[LearnsetEntry] = field(default_factory=list)
+    evolutions: list[Evolution] = field(default_factory=list)
+    growth_rate: int = 100
+    gender_rate: int = 50
+    base_xp: int = 30
+    weight: float = 0.0
+    height: float = 0.0
+    pokedex_num: int = 0
+    pokedex: str = ""
+    extra: dict[str, Any] | None = None
+
+    KEYS = frozenset(
+        ("name", "type1", "type2", "first", "second", "hidden", "hp", "atk", "def")
+        + ("sp_atk", "sp_def", "speed", "moves", "evolutions", "growth_rate")
+        + ("gender_rate", "base_xp", "weight", "height", "pokedex_num", "pokedex")
+    )
+
+    @classmethod
+    def from_dict(cls, entry: Mapping[str, Any]) -> "Pokemon":
+        get = entry.get
+        return cls(
+            get("name", ""),
+            get("type1", ""),
+            get("type2", ""),
+            get("first", ""),
+            get("second", ""),
+            get("hidden", ""),
+            get("hp", 0),
+            get("atk", 0),
+            get("def", 0),
+            get("sp_atk", 0),
+            get("sp_def", 0),
+            get("speed", 0),
+            [LearnsetEntry.from_dict(move) for move in get("moves", ())],
+            [Evolution.from_dict(evo) for evo in get("evolutions", ())],
+            get("growth_rate", 100),
+            get("gender_rate", 50),
+            get("base_xp", 30),
+            get("weight", 0.0),
+            get("height", 0.0),
+            get("pokedex_num", 0),
+            get("pokedex", ""),
+            extra_fields(entry, cls.KEYS),
+        )
+
+    def to_dict(self) -> dict[str, Any]:
+        entry = {
+            "name": self.name,
+            "type1": self.type1,
+            "type2": self.type2,
+            "first": self.first,
+            "second": self.second,
+            "hidden": self.hidden,
+            "hp": self.hp,
+            "atk": self.atk,
+            "def": self.defense,
+            "sp_atk": self.sp_atk,
+            "sp_def": self.sp_def,
+            "speed": self.speed,
+            "moves": [move.to_dict() for move in self.moves],
+            "evolutions": [evo.to_dict() for evo in self.evolutions],
+            "growth_rate": self.growth_rate,
+            "gender_rate": self.gender_rate,
+            "base_xp": self.base_xp,
+            "weight": self.weight,
+            "height": self.height,
+            "pokedex_num": self.pokedex_num,
+            "pokedex": self.pokedex,
+        }
+        return entry | self.extra if self.extra else entry
+
+
+class Record(Protocol):
+    def to_dict(self) -> dict[str, Any]:
+        ...
+
+
+R = TypeVar("R", Move, Pokemon)
+
+# Table holding the entries of each record type in its database file
+TABLES: dict[type, tuple[str, ...]] = {Move: ("Moves",), Pokemon: ()}
+
+
+def from_table(cls: type[R], table: Mapping[str, Mapping[str, Any]]) -> dict[str, R]:
+    return {key: cls.from_dict(entry) for key, entry in table.items()}
+
+
+def to_table(records: Mapping[str, Record]) -> dict[str, dict[str, Any]]:
+    return {key: record.to_dict() for key, record in records.items()}
+
+
+def load_records(cls: type[R], path: Path, codec: Codec) -> dict[str, R]:
+    return from_table(cls, get_table(codec.load(path), TABLES[cls]))
+
+
+def save_records(cls: type[R], path: Path, records: Mapping[str, R], codec: Codec):
+    # Rewrites the entries of the file, keeping anything else it holds
+    document = load_base(codec.load(path)) if path.exists() else {}
+    table = get_table(document, TABLES[cls])
+    table.clear()
+    table.update(to_table(records))
+    atomic_dump(codec.dump, path, document)
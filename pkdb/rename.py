@@ -0,0 +1,213 @@
+"""Renames an entry and every name referring to it in the other entries.
+
+A reverse index maps each name to the keys of the entries naming it, built
+in one pass over the Pokemon and moves, so a rename only reads and rewrites
+the entries that refer to it. The changed databases are saved together: every
+TOML file is written next to its target before any of them is replaced, then
+split and SQLite databases save their changed entries.
+
+Usage: python -m pkdb.rename {pokemon,moves,items,abilities,types} OLD NEW
+       [DIRECTORY]
+"""
+import argparse
+from collections import defaultdict
+from collections.abc import Iterable, Mapping
+from pathlib import Path
+from typing import Any, NamedTuple
+
+from pkdb.codec import Codec, get_codec
+from pkdb.dirty import DirtyTable
+from pkdb.files import atomic_dump_all
+from pkdb.integrity import FILES, SCHEMAS, references
+from pkdb.loader import ENTRY_STORES, database_exists
+from pkdb.sqlite import SqliteTable
+from pkdb.transfer import open_database
+
+# Codec each database is read and written with by default
+CODECS = {"moves": "rtoml"}
+
+
+def name_key(name: str) -> str:
+    return name.replace(" ", "_")
+
+
+class ReverseIndex:
+    """Keys of the entries naming each entry, by database."""
+
+    def __init__(self):
+        # (target, key of the name) to an ordered set of (database, key)
+        self.referrers: defaultdict[tuple[str, str], dict[tuple[str, str], None]]
+        self.referrers = defaultdict(dict)
+
+    def add_table(self, kind: str, table: Mapping[str, Mapping[str, Any]]):
+        for key, entry in table.items():
+            self.add(kind, key, entry)
+
+    def add(self, kind: str, key: str, entry: Mapping[str, Any]):
+        # Items, abilities and types name nothing
+        if kind not in SCHEMAS:
+            return
+        for _, value, target in references(kind, entry):
+            if value and isinstance(value, str):
+                self.referrers[(target, name_key(value))][(kind, key)] = None
+
+    def remove(self, kind: str, key: str, entry: Mapping[str, Any]):
+        if kind not in SCHEMAS:
+            return
+        for _, value, target in references(kind, entry):
+            if value and isinstance(value, str):
+                self.referrers[(target, name_key(value))].pop((kind, key), None)
+
+    def find(self, target: str, name: str) -> list[tuple[str, str]]:
+        return list(self.referrers.get((target, name_key(name)), ()))
+
+
+def replace_name(
+    kind: str, entry: dict[str, Any], target: str, old: str, new: str
+) -> dict[str, Any] | None:
+    # The entry with every reference to ``old`` naming ``new`` instead, None
+    # when it has none. Names keep their spelling, key or shown name
+    (old_key, new_key) = (name_key(old), name_key(new))
+
+    def replace_row(row: Mapping[str, Any], fields: dict[str, str]) -> dict | None:
+        replaced = {}
+        for field, field_target in fields.items():
+            value = row.get(field)
+            if field_target != target or not isinstance(value, str):
+                continue
+            if value == old_key.replace("_", " "):
+                replaced[field] = new
+            elif value == old_key:
+                replaced[field] = new_key
+        return {**row, **replaced} if replaced else None
+
+    (fields, lists) = SCHEMAS[kind]
+    new_entry = replace_row(entry, fields)
+    for name, row_fields in lists.items():
+        rows = entry.get(name) or []
+        replaced_rows = [replace_row(row, row_fields(row)) for row in rows]
+        if any(replaced_rows):
+            new_entry = new_entry or dict(entry)
+            new_entry[name] = [new or row for row, new in zip(rows, replaced_rows)]
+    return new_entry
+
+
+def rename(
+    tables: Mapping[str, DirtyTable],
+    index: ReverseIndex,
+    target: str,
+    old: str,
+    new: str,
+) -> dict[str, dict[str, dict[str, Any] | None]]:
+    # Renames the entry in its own table when it is one of ``tables``, and the
+    # references to it in all of them. Returns the changed entries as they
+    # were by database and key, None for the new key. Raises ValueError
+    (old_key, new_key) = (name_key(old), name_key(new))
+    if not new_key or new_key == old_key:
+        raise ValueError(f"{new!r} is not a new name")
+    changed: dict[str, dict[str, dict[str, Any] | None]] = {kind: {} for kind in tables}
+    if table := tables.get(target):
+        if old_key not in table:
+            raise ValueError(f"No {target} entry named {old!r}")
+        if new_key in table:
+            raise ValueError(f"{new!r} already exists")
+        entry = table[old_key]
+        # Entries of some tables, such as types, are plain values
+        has_name = isinstance(entry, dict) and "name" in entry
+        renamed = {**entry, "name": new} if has_name else entry
+        index.remove(target, old_key, entry)
+        table.rename(old_key, new_key, renamed)
+        index.add(target, new_key, renamed)
+        changed[target] = {old_key: entry, new_key: None}
+    for kind, key in index.find(target, old):
+        if kind not in tables:
+            continue
+        entry = tables[kind][key]
+        if (new_entry := replace_name(kind, entry, target, old, new)) is None:
+            continue
+        index.remove(kind, key, entry)
+        tables[kind][key] = new_entry
+        index.add(kind, key, new_entry)
+        changed[kind].setdefault(key, entry)
+    return changed
+
+
+class Database(NamedTuple):
+    path: Path
+    codec: Codec
+    # The whole document, holding the table of ``entries`` unless they are
+    # stored in a split or SQLite database
+    document: dict[str, Any]
+    entries: DirtyTable
+
+    @classmethod
+    def open(cls, path: Path, table: tuple[str, ...], codec: Codec) -> "Database":
+        (document, entries) = open_database(path, table, codec)
+        # Only ever saved by save_all
+        return cls(path, codec, document, DirtyTable(entries, lambda keys: None))
+
+    def stored(self) -> bool:
+        return isinstance(self.entries.table, ENTRY_STORES)
+
+    def save_entries(self, keys: list[str]) -> int | None:
+        # Whole files are written by save_all before the entries are flushed
+        if self.stored():
+            return self.entries.table.save_entries(keys)
+        return None
+
+    def close(self):
+        if isinstance(self.entries.table, SqliteTable):
+            self.entries.table.close()
+
+
+def save_all(databases: Iterable[Database]):
+    databases = list(databases)
+    files = [db for db in databases if db.entries.dirty and not db.stored()]
+    atomic_dump_all((db.codec.dump, db.path, db.document) for db in files)
+    for db in databases:
+        db.entries.flush(db.save_entries)
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m pkdb.rename")
+    parser.add_argument("target", choices=list(FILES), help="database of the entry")
+    parser.add_argument("old", help="current name")
+    parser.add_argument("new", help="new name")
+    parser.add_argument(
+        "directory", nargs="?", type=Path, default=Path("."), help="database folder"
+    )
+    args = parser.parse_args()
+    # Pokemon and moves refer to the others, which are only opened to rename
+    # one of their entries
+    kinds = ["pokemon", "moves"] + [args.target] * (args.target not in SCHEMAS)
+    databases = {}
+    for kind in kinds:
+        (file, table) = FILES[kind]
+        path = args.directory / file
+        if not database_exists(path):
+            parser.error(f"{file} not found in {args.directory}")
+        codec = get_codec(CODECS.get(kind, "tomli"))
+        databases[kind] = Database.open(path, table, codec)
+    try:
+        index = ReverseIndex()
+        for kind in SCHEMAS:
+            index.add_table(kind, databases[kind].entries)
+        tables = {kind: db.entries for kind, db in databases.items()}
+        try:
+            changed = rename(tables, index, args.target, args.old, args.new)
+        except ValueError as error:
+            parser.error(str(error))
+        save_all(databases.values())
+    finally:
+        for db in databases.values():
+            db.close()
+    counts = ", ".join(
+        f"{len(keys) - (kind == args.target)} in {FILES[kind][0]}"
+        for kind, keys in changed.items()
+        if keys
+    )
+    print(f"Renamed {args.old} to {args.new} ({counts or 'nothing changed'})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""Keys-only scanner for the reference databases.
+
+The Pokemon editor only needs the names of moves, items, abilities and types,
+so they are read from table headers and key/value lines without building any
+of the values.
+"""
+import bisect
+import mmap
+import re
+from pathlib import Path
+
+from pkdb.index import IndexingError, Loads, iter_headers, parse_header, parse_key
+from pkdb.index import string_spans
+from pkdb.shards import MANIFEST, shard_dir
+from pkdb.sqlite import SqliteTable, sqlite_path
+
+# Start of a "key = value" or "dotted.key = value" line
+KEY_LINE = re.compile(rb"^[ \t]*([A-Za-z0-9_\"'-][^\n=]*)=", re.M)
+
+
+def scan_keys(path: Path, table: tuple[str, ...]) -> list[str]:
+    with open(path, "rb") as file:
+        if not file.seek(0, 2):
+            return []
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            return scan_data(data, table)
+
+
+def scan_data(data: bytes | mmap.mmap, table: tuple[str, ...]) -> list[str]:
+    # (offset, key) of every definition, sorted at the end to keep file order
+    found: list[tuple[int, str]] = []
+    depth = len(table)
+    # Regions between headers, with the table path their key/value lines use
+    regions: list[tuple[tuple[str, ...], int, int]] = []
+    path: tuple[str, ...] = ()
+    region_start = 0
+    spans = string_spans(data)
+    for start, end, text in iter_headers(data, spans):
+        regions.append((path, region_start, start))
+        path, _ = parse_header(text)
+        region_start = end
+        if len(path) > depth and path[:depth] == table:
+            found.append((start, path[depth]))
+    regions.append((path, region_start, len(data)))
+    starts = [span[0] for span in spans]
+    for path, start, end in regions:
+        # Only tables enclosing the wanted one can hold its keys inline
+        if len(path) > depth or table[: len(path)] != path:
+            continue
+        for match in KEY_LINE.finditer(data, start, end):
+            # Skip lines inside multi-line strings
+            i = bisect.bisect_right(starts, match.start()) - 1
+            if i >= 0 and spans[i][1] > match.start():
+                continue
+            text = match.group(1).decode("utf-8").strip()
+            try:
+                key, pos = parse_key(text)
+            except IndexingError:
+                continue
+            if pos != len(text):
+                continue
+            key = path + key
+            if len(key) > depth and key[:depth] == table:
+                found.append((match.start(), key[depth]))
+    found.sort()
+    return list(dict.fromkeys(key for _, key in found))
+
+
+def load_keys(path: Path, table: tuple[str, ...], loads: Loads) -> list[str]:
+    # The manifest of a split database lists its keys
+    if shard_dir(path).is_dir():
+        manifest = (shard_dir(path) / MANIFEST).read_text(encoding="utf-8")
+        return list(loads(manifest)["entries"])
+    if sqlite_path(path).exists():
+        rows = SqliteTable(sqlite_path(path))
+        rows.close()
+        return list(rows)
+    # Falls back to a full parse for files the scanner cannot read
+    try:
+        return scan_keys(path, table)
+    except IndexingError:
+        with open(path, "rb") as file:
+            data = loads(file.read().decode("utf-8"))
+        for part in table:
+            data = data.get(part, {})
+        return list(data)
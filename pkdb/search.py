@@ -0,0 +1,110 @@
+"""Incremental name search for the editors' name boxes.
+
+Names are kept in a sorted array of case-folded keys, so prefix matches are
+found by bisection. Substring and fuzzy (in order, with gaps) matches scan
+for the rest only while fewer than ``limit`` results were found: substrings
+with ``str.find`` over all keys joined in one string, fuzzy matches key by
+key until the time budget is spent.
+"""
+import bisect
+import itertools
+import time
+from typing import Iterable, Iterator
+
+from pkdb.config import get_int, get_str
+
+MODES = ("prefix", "substring", "fuzzy")
+# Names checked between two looks at the clock
+CHUNK = 2048
+
+
+def fold(name: str) -> str:
+    return name.replace("_", " ").replace("\n", " ").casefold()
+
+
+def is_subsequence(query: str, text: str) -> bool:
+    position = 0
+    for char in query:
+        position = text.find(char, position) + 1
+        if not position:
+            return False
+    return True
+
+
+class SearchIndex:
+    def __init__(self, names: Iterable[str] = ()):
+        self.keys = sorted((fold(name), name) for name in set(names))
+        # Every key on its own line, with the offset where each one starts
+        self.text: str | None = None
+        self.starts: list[int] = []
+        self.mode = get_str("SEARCH", "substring")
+        if self.mode not in MODES:
+            raise ValueError(f"Unknown search mode {self.mode!r}, expected {MODES}")
+        self.limit = get_int("SEARCH_LIMIT", 50)
+        self.budget = get_int("SEARCH_BUDGET_MS", 10) / 1000
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def add(self, name: str):
+        key = (fold(name), name)
+        i = bisect.bisect_left(self.keys, key)
+        if i == len(self.keys) or self.keys[i] != key:
+            self.keys.insert(i, key)
+            self.text = None
+
+    def remove(self, name: str):
+        key = (fold(name), name)
+        i = bisect.bisect_left(self.keys, key)
+        if i < len(self.keys) and self.keys[i] == key:
+            del self.keys[i]
+            self.text = None
+
+    def prefix(self, query: str, limit: int) -> list[str]:
+        query = fold(query)
+        i = bisect.bisect_left(self.keys, (query, ""))
+        found = []
+        for key, name in self.keys[i : i + limit]:
+            if not key.startswith(query):
+                break
+            found.append(name)
+        return found
+
+    def search(self, query: str) -> list[str]:
+        # Prefix matches first, then the other matches in name order
+        found = self.prefix(query, self.limit)
+        if self.mode == "prefix" or len(found) >= self.limit or not query:
+            return found
+        query = fold(query)
+        seen = set(found)
+        if self.mode == "fuzzy":
+            hits = self.fuzzy(query)
+        else:
+            hits = self.substring(query)
+        for name in hits:
+            if name not in seen:
+                found.append(name)
+                if len(found) >= self.limit:
+                    break
+        return found
+
+    def substring(self, query: str) -> Iterator[str]:
+        if self.text is None:
+            self.starts = list(
+                itertools.accumulate((len(key) + 1 for key, _ in self.keys), initial=0)
+            )
+            self.text = "\n".join(key for key, _ in self.keys)
+        position = self.text.find(query)
+        while position != -1:
+            i = bisect.bisect_right(self.starts, position) - 1
+            yield self.keys[i][1]
+            # Continue with the next key
+            position = self.text.find(query, self.starts[i + 1])
+
+    def fuzzy(self, query: str) -> Iterator[str]:
+        deadline = time.perf_counter() + self.budget
+        for start in range(0, len(self.keys), CHUNK):
+            chunk = self.keys[start : start + CHUNK]
+            yield from (name for key, name in chunk if is_subsequence(query, key))
+            if time.perf_counter() > deadline:
+                return
@@ -0,0 +1,209 @@
+"""Sharded database layout: one TOML file per entry plus a manifest.
+
+``moves.toml.bytes`` is split into ``moves.toml.bytes.d/``, holding one file
+per move and ``manifest.toml``. The manifest keeps the entry order, the file
+each entry lives in and the rest of the original document, so joining the
+shards writes back exactly what a full save of the monolithic file would.
+
+Usage: python -m pkdb.shards {split,join} FILE [--table TABLE] [--codec NAME]
+"""
+import argparse
+import os
+import re
+import shutil
+from collections.abc import MutableMapping
+from pathlib import Path
+from typing import Any, Iterable, Iterator
+
+from pkdb.codec import CODECS, Codec, load_codec
+from pkdb.config import get_str
+from pkdb.files import atomic_dump
+
+MANIFEST = "manifest.toml"
+MANIFEST_VERSION = 1
+UNSAFE = re.compile(r"[^A-Za-z0-9_.-]")
+# File names Windows refuses, whatever the extension
+RESERVED = {"CON", "PRN", "AUX", "NUL"} | {
+    f"{p}{i}" for p in ("COM", "LPT") for i in range(10)
+}
+
+
+def shard_dir(path: Path) -> Path:
+    return path.with_name(path.name + ".d")
+
+
+def shard_name(key: str, used: set[str]) -> str:
+    # A file name that is safe everywhere and unique ignoring case
+    stem = UNSAFE.sub("_", key).strip(".") or "_"
+    if stem.upper() in RESERVED:
+        stem += "_"
+    name = f"{stem}.toml"
+    i = 1
+    while name.lower() in used:
+        i += 1
+        name = f"{stem}~{i}.toml"
+    used.add(name.lower())
+    return name
+
+
+def nest(table: tuple[str, ...], value: Any) -> Any:
+    for part in reversed(table):
+        value = {part: value}
+    return value
+
+
+def get_table(document: dict[str, Any], table: tuple[str, ...]) -> dict[str, Any]:
+    for part in table:
+        document = document.setdefault(part, {})
+    return document
+
+
+class ShardedTable(MutableMapping[str, dict[str, Any]]):
+    """Mapping of entries stored one per file, each read when first needed."""
+
+    def __init__(self, directory: Path, codec: Codec):
+        self.directory = directory
+        self.codec = codec
+        manifest = codec.load(directory / MANIFEST)
+        if manifest.get("version") != MANIFEST_VERSION:
+            raise ValueError(f"{directory}: unsupported manifest version")
+        self.table: tuple[str, ...] = tuple(manifest["table"])
+        self.base: dict[str, Any] = manifest.get("base", {})
+        self.files: dict[str, str] = manifest["entries"]
+        self.used = {name.lower() for name in self.files.values()}
+        # Unread entries are None
+        self.entries: dict[str, dict[str, Any] | None] = dict.fromkeys(self.files)
+        self.removed: dict[str, str] = {}
+        self.manifest_changed = False
+
+    def __getitem__(self, key: str) -> dict[str, Any]:
+        entry = self.entries[key]
+        if entry is None:
+            entry = self.entries[key] = self.codec.load(self.path(key))
+        return entry
+
+    def __setitem__(self, key: str, entry: dict[str, Any]):
+        if key not in self.files:
+            name = self.removed.pop(key, None)
+            self.files[key] = name or shard_name(key, self.used)
+            self.manifest_changed = True
+        self.entries[key] = entry
+
+    def __delitem__(self, key: str):
+        del self.entries[key]
+        self.removed[key] = self.files.pop(key)
+        self.manifest_changed = True
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.entries)
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def path(self, key: str) -> Path:
+        return self.directory / self.files[key]
+
+    def save_entries(self, keys: Iterable[str]) -> int:
+        # Only the given entries are written, the manifest when keys changed.
+        # Returns the number of bytes written
+        keys = list(keys)
+        written = 0
+        for key in keys:
+            if (entry := self.entries.get(key)) is not None:
+                atomic_dump(self.codec.dump, self.path(key), entry)
+                written += self.path(key).stat().st_size
+        if self.manifest_changed:
+            manifest_path = self.directory / MANIFEST
+            atomic_dump(self.codec.dump, manifest_path, self.manifest())
+            written += manifest_path.stat().st_size
+            self.manifest_changed = False
+        # Files are only removed once the manifest no longer lists them
+        for key in [key for key in keys if key in self.removed]:
+            (self.directory / self.removed.pop(key)).unlink(missing_ok=True)
+        return written
+
+    def unload(self, keys: Iterable[str]):
+        # Saved entries are read again from disk when next needed
+        self.entries.update((key, None) for key in keys if key in self.entries)
+
+    def manifest(self) -> dict[str, Any]:
+        return {
+            "version": MANIFEST_VERSION,
+            "table": list(self.table),
+            "base": self.base,
+            "entries": self.files,
+        }
+
+    def materialize(self) -> dict[str, Any]:
+        # Read every shard and return the monolithic document
+        document = load_base(self.base)
+        table = get_table(document, self.table)
+        table.update((key, self[key]) for key in self.entries)
+        return document
+
+
+def load_base(base: dict[str, Any]) -> dict[str, Any]:
+    # Copy the nested tables, as the entries are merged into them
+    return {
+        key: load_base(value) if isinstance(value, dict) else value
+        for key, value in base.items()
+    }
+
+
+def split(path: Path, table: tuple[str, ...], codec: Codec) -> Path:
+    directory = shard_dir(path)
+    if directory.exists():
+        raise FileExistsError(f"{directory} already exists")
+    document = codec.load(path)
+    entries = get_table(document, table)
+    base = load_base(document)
+    # The table stays in the base, empty, to keep its position in the document
+    get_table(base, table).clear()
+    used: set[str] = set()
+    files = {key: shard_name(key, used) for key in entries}
+    # Build the whole directory first so a failed split leaves nothing behind
+    tmp_dir = directory.with_name(directory.name + ".tmp")
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    tmp_dir.mkdir()
+    for key, name in files.items():
+        codec.dump(tmp_dir / name, entries[key])
+    manifest = {
+        "version": MANIFEST_VERSION,
+        "table": list(table),
+        "base": base,
+        "entries": files,
+    }
+    codec.dump(tmp_dir / MANIFEST, manifest)
+    os.replace(tmp_dir, directory)
+    return directory
+
+
+def join(path: Path, codec: Codec):
+    # Regenerate the monolithic file the game reads from its shards
+    document = ShardedTable(shard_dir(path), codec).materialize()
+    atomic_dump(codec.dump, path, document)
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m pkdb.shards")
+    parser.add_argument("command", choices=["split", "join"])
+    parser.add_argument("file", type=Path, help="monolithic database file")
+    parser.add_argument("--table", default="", help="table holding the entries")
+    parser.add_argument("--codec", choices=CODECS, default=get_str("CODEC", "tomli"))
+    args = parser.parse_args()
+    codec = load_codec(args.codec)
+    match args.command:
+        case "split":
+            table = tuple(args.table.split(".")) if args.table else ()
+            try:
+                directory = split(args.file, table, codec)
+            except FileExistsError as error:
+                parser.error(str(error))
+            print(f"Split {args.file.name} into {directory}")
+        case "join":
+            join(args.file, codec)
+            print(f"Joined {shard_dir(args.file)} into {args.file.name}")
+
+
+if __name__ == "__main__":
+    main()
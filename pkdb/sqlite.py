@@ -0,0 +1,264 @@
+"""SQLite storage for the moves and Pokemon databases.
+
+``moves.toml.bytes`` is imported into ``moves.toml.bytes.sqlite``, with one
+row per entry holding it as JSON. Rows keep the file order and are indexed by
+key and Pokedex number, so opening the database only reads the keys and a
+save updates a single row in one transaction. ``export`` streams the rows
+back into the TOML file the game reads, written exactly like a full save.
+
+Usage: python -m pkdb.sqlite {import,export} FILE [--table TABLE] [--codec NAME]
+"""
+import argparse
+import itertools
+import json
+import sqlite3
+from collections.abc import MutableMapping
+from pathlib import Path
+from typing import Any, Iterable, Iterator
+
+from pkdb.codec import CODECS, Codec, load_codec
+from pkdb.config import get_str
+from pkdb.files import atomic_dump
+from pkdb.shards import get_table, load_base, nest
+
+SCHEMA_VERSION = 1
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS entries (
+    id INTEGER PRIMARY KEY,
+    key TEXT NOT NULL UNIQUE,
+    pokedex_num INTEGER,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_pokedex_num ON entries (pokedex_num);
+"""
+UPSERT = """
+INSERT INTO entries (key, pokedex_num, data) VALUES (?, ?, ?)
+ON CONFLICT (key) DO UPDATE SET pokedex_num = excluded.pokedex_num, data = excluded.data
+"""
+# Entries serialized by each TOML dump while exporting
+EXPORT_CHUNK = 512
+
+
+def sqlite_path(path: Path) -> Path:
+    return path.with_name(path.name + ".sqlite")
+
+
+def encode(entry: dict[str, Any]) -> str:
+    return json.dumps(entry, ensure_ascii=False, separators=(",", ":"))
+
+
+def row(key: str, entry: dict[str, Any]) -> tuple[str, Any, str]:
+    pokedex_num = entry.get("pokedex_num")
+    return (key, pokedex_num if isinstance(pokedex_num, int) else None, encode(entry))
+
+
+def connect(path: Path) -> sqlite3.Connection:
+    connection = sqlite3.connect(path)
+    # The write-ahead log makes single-row commits cheap and crash safe
+    connection.execute("PRAGMA journal_mode = WAL")
+    connection.executescript(SCHEMA)
+    return connection
+
+
+def read_meta(connection: sqlite3.Connection) -> dict[str, Any]:
+    meta = {
+        name: json.loads(value)
+        for name, value in connection.execute("SELECT name, value FROM meta")
+    }
+    if meta.get("version") != SCHEMA_VERSION:
+        raise ValueError("Unsupported SQLite database version")
+    return meta
+
+
+class SqliteTable(MutableMapping[str, dict[str, Any]]):
+    """Mapping of entries stored as SQLite rows, each read when first needed."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.connection = connect(path)
+        meta = read_meta(self.connection)
+        self.table: tuple[str, ...] = tuple(meta["table"])
+        self.base: dict[str, Any] = meta["base"]
+        # Unread entries are None
+        keys = self.connection.execute("SELECT key FROM entries ORDER BY id")
+        self.entries: dict[str, dict[str, Any] | None] = dict.fromkeys(
+            key for (key,) in keys
+        )
+
+    def __getitem__(self, key: str) -> dict[str, Any]:
+        entry = self.entries[key]
+        if entry is None:
+            (data,) = self.connection.execute(
+                "SELECT data FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+            entry = self.entries[key] = json.loads(data)
+        return entry
+
+    def __setitem__(self, key: str, entry: dict[str, Any]):
+        self.entries[key] = entry
+
+    def __delitem__(self, key: str):
+        del self.entries[key]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.entries)
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def preload(self, keys: Iterable[str]):
+        # Reads the given unread entries in one query, for a few hundred keys
+        unread = [key for key in keys if self.entries.get(key, {}) is None]
+        if not unread:
+            return
+        marks = ",".join("?" * len(unread))
+        query = f"SELECT key, data FROM entries WHERE key IN ({marks})"
+        for key, data in self.connection.execute(query, unread):
+            self.entries[key] = json.loads(data)
+
+    def find_pokedex(self, pokedex_num: int) -> list[str]:
+        rows = self.connection.execute(
+            "SELECT key FROM entries WHERE pokedex_num = ? ORDER BY id", (pokedex_num,)
+        )
+        # Entries changed since the last save are not in the index yet
+        return [key for (key,) in rows if key in self.entries]
+
+    def save_entries(self, keys: Iterable[str]) -> int:
+        # All given entries are written in a single transaction. Returns the
+        # number of bytes of entry data written
+        keys = list(keys)
+        rows = [row(key, self[key]) for key in keys if key in self.entries]
+        with self.connection:
+            self.connection.executemany(UPSERT, rows)
+            self.connection.executemany(
+                "DELETE FROM entries WHERE key = ?",
+                ((key,) for key in keys if key not in self.entries),
+            )
+        return sum(len(data.encode("utf-8")) for _, _, data in rows)
+
+    def unload(self, keys: Iterable[str]):
+        # Saved entries are read again from disk when next needed
+        self.entries.update((key, None) for key in keys if key in self.entries)
+
+    def materialize(self) -> dict[str, Any]:
+        document = load_base(self.base)
+        get_table(document, self.table).update((key, self[key]) for key in self)
+        return document
+
+    def close(self):
+        self.connection.close()
+
+
+def import_toml(path: Path, table: tuple[str, ...], codec: Codec) -> Path:
+    database = sqlite_path(path)
+    if database.exists():
+        raise FileExistsError(f"{database} already exists")
+    document = codec.load(path)
+    entries = get_table(document, table)
+    base = load_base(document)
+    # The table stays in the base, empty, to keep its position in the document
+    get_table(base, table).clear()
+    tmp_path = database.with_name(database.name + ".tmp")
+    tmp_path.unlink(missing_ok=True)
+    connection = sqlite3.connect(tmp_path)
+    try:
+        connection.executescript(SCHEMA)
+        with connection:
+            meta = {"version": SCHEMA_VERSION, "table": list(table), "base": base}
+            connection.executemany(
+                "INSERT INTO meta VALUES (?, ?)",
+                ((name, json.dumps(value)) for name, value in meta.items()),
+            )
+            connection.executemany(UPSERT, itertools.starmap(row, entries.items()))
+    finally:
+        connection.close()
+    tmp_path.replace(database)
+    return database
+
+
+def iter_rows(connection: sqlite3.Connection) -> Iterator[tuple[str, dict[str, Any]]]:
+    for key, data in connection.execute("SELECT key, data FROM entries ORDER BY id"):
+        yield (key, json.loads(data))
+
+
+def can_stream(
+    codec: Codec, table: tuple[str, ...], base: dict[str, Any], first: dict[str, Any]
+) -> bool:
+    # Chunks dumped on their own and joined by a blank line must read exactly
+    # like one dump, which holds when the entries are the only tables around
+    if base != nest(table, {}):
+        return False
+    if len(first) < 2 or not all(isinstance(v, dict) for v in first.values()):
+        return False
+    pair = [{key: value} for key, value in first.items()]
+    chunks = [codec.dumps(nest(table, entry)) for entry in pair]
+    return "\n".join(chunks) == codec.dumps(nest(table, first))
+
+
+def export_toml(path: Path, codec: Codec):
+    # Regenerate the file the game reads without holding every entry at once
+    connection = sqlite3.connect(sqlite_path(path))
+    try:
+        meta = read_meta(connection)
+        table, base = (tuple(meta["table"]), meta["base"])
+        dump_entries(path, codec, table, base, iter_rows(connection))
+    finally:
+        connection.close()
+
+
+def dump_entries(
+    path: Path,
+    codec: Codec,
+    table: tuple[str, ...],
+    base: dict[str, Any],
+    rows: Iterator[tuple[str, dict[str, Any]]],
+):
+    # Writes the document with the rows as its table, a chunk of rows at a
+    # time when the codec allows it
+    first = dict(itertools.islice(rows, 2))
+    if not can_stream(codec, table, base, first):
+        document = load_base(base)
+        get_table(document, table).update(first)
+        get_table(document, table).update(rows)
+        atomic_dump(codec.dump, path, document)
+        return
+
+    def dump(tmp_path: Path, _: Any):
+        with open(tmp_path, "wb") as file:
+            chunks = itertools.chain([first.items()], batched(rows))
+            for i, chunk in enumerate(chunks):
+                text = codec.dumps(nest(table, dict(chunk)))
+                file.write((f"\n{text}" if i else text).encode("utf-8"))
+
+    atomic_dump(dump, path, {})
+
+
+def batched(rows: Iterator[Any]) -> Iterator[list[Any]]:
+    while chunk := list(itertools.islice(rows, EXPORT_CHUNK)):
+        yield chunk
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m pkdb.sqlite")
+    parser.add_argument("command", choices=["import", "export"])
+    parser.add_argument("file", type=Path, help="monolithic database file")
+    parser.add_argument("--table", default="", help="table holding the entries")
+    parser.add_argument("--codec", choices=CODECS, default=get_str("CODEC", "tomli"))
+    args = parser.parse_args()
+    codec = load_codec(args.codec)
+    match args.command:
+        case "import":
+            table = tuple(args.table.split(".")) if args.table else ()
+            try:
+                database = import_toml(args.file, table, codec)
+            except FileExistsError as error:
+                parser.error(str(error))
+            print(f"Imported {args.file.name} into {database}")
+        case "export":
+            export_toml(args.file, codec)
+            print(f"Exported {sqlite_path(args.file)} into {args.file.name}")
+
+
+if __name__ == "__main__":
+    main()
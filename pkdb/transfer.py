@@ -0,0 +1,391 @@
+"""Imports and exports moves and Pokemon as CSV or JSON.
+
+Rows have the fields the editors save: ``flags`` is the bit mask of the move
+flags, and a Pokemon's ``moves`` and ``evolutions`` are lists, written in CSV
+cells as JSON (``[{"lvl":1,"move":"Tackle"}]``). Each row is keyed by its
+``key``, or by its name like a save from the editor, and updates the entry
+with that key: fields a row leaves out, or CSV cells left empty, keep their
+current value. New entries get every field, with defaults for missing ones.
+
+Rows are read and written as a stream in chunks. Split and SQLite databases
+save and drop each chunk before reading the next, so their memory use does
+not grow with the number of rows. A TOML file is loaded and written in one
+go, so an invalid row leaves it untouched.
+
+Usage: python -m pkdb.transfer {import,export} {moves,pokemon} DATABASE FILE
+       [--format {csv,json,jsonl}] [--codec NAME]
+"""
+import argparse
+import contextlib
+import csv
+import json
+import re
+import sys
+import time
+from collections.abc import Iterable, Iterator, MutableMapping
+from pathlib import Path
+from typing import IO, Any, Callable
+
+from pkdb.bulk import parse_value
+from pkdb.codec import CODECS, Codec, load_codec
+from pkdb.config import get_str
+from pkdb.files import atomic_dump
+from pkdb.journal import Journal
+from pkdb.loader import ENTRY_STORES, load_document
+from pkdb.records import TABLES, Evolution, LearnsetEntry, Move, Pokemon
+from pkdb.shards import get_table, shard_dir
+from pkdb.sqlite import SqliteTable, batched, sqlite_path
+
+# Record type and default codec of each database
+KINDS: dict[str, tuple[type, str]] = {
+    "moves": (Move, "rtoml"),
+    "pokemon": (Pokemon, "tomli"),
+}
+FORMATS = ("csv", "json", "jsonl")
+# Record type of the rows of each list field
+LIST_ROWS: dict[str, type] = {"moves": LearnsetEntry, "evolutions": Evolution}
+# Characters of JSON read from a file at a time
+READ_SIZE = 1 << 16
+WHITESPACE = re.compile(r"[ \t\n\r]*")
+
+
+def defaults(cls: type) -> dict[str, Any]:
+    # Column names in file order, with the default values of their fields
+    return {"key": ""} | cls().to_dict()
+
+
+def parse_int(text: str) -> int:
+    try:
+        return int(text)
+    except ValueError:
+        pass
+    # Spreadsheets may write integers as "50.0"
+    try:
+        number = float(text)
+    except ValueError:
+        number = None
+    if number is None or not number.is_integer():
+        raise ValueError(f"{text!r} is not a whole number")
+    return int(number)
+
+
+def parse_float(text: str) -> float:
+    try:
+        return float(text)
+    except ValueError:
+        raise ValueError(f"{text!r} is not a number") from None
+
+
+def cell_parser(default: Any) -> Callable[[str], Any]:
+    match default:
+        case list():
+            return json.loads
+        case int():
+            return parse_int
+        case float():
+            return parse_float
+        case str():
+            return str
+    # Fields the record types do not know
+    return parse_value
+
+
+def coerce(field: str, default: Any, value: Any) -> Any:
+    # The value as the type of the field's default, checking the rows of
+    # lists. Fields the record types do not know are kept as they are.
+    # Raises ValueError
+    match default:
+        case list():
+            if not isinstance(value, list):
+                raise ValueError(f"{value!r} is not a list")
+            if row_cls := LIST_ROWS.get(field):
+                known = row_cls().to_dict()
+                value = [coerce_row(i, known, row) for i, row in enumerate(value)]
+        case int() if not isinstance(value, bool):
+            if isinstance(value, str):
+                return parse_int(value)
+            if isinstance(value, float) and value.is_integer():
+                return int(value)
+            if not isinstance(value, int):
+                raise ValueError(f"{value!r} is not a whole number")
+        case float() if not isinstance(value, bool):
+            if isinstance(value, str):
+                return parse_float(value)
+            if isinstance(value, (int, float)):
+                return float(value)
+            raise ValueError(f"{value!r} is not a number")
+        case str():
+            if not isinstance(value, str):
+                raise ValueError(f"{value!r} is not text")
+        case int() | float():
+            raise ValueError(f"{value!r} is not a number")
+    return value
+
+
+def coerce_row(i: int, known: dict[str, Any], row: Any) -> dict[str, Any]:
+    if not isinstance(row, dict):
+        raise ValueError(f"[{i}]: {row!r} is not an object")
+    try:
+        return coerce_fields(known, row)
+    except ValueError as error:
+        raise ValueError(f"[{i}].{error}") from error
+
+
+def coerce_fields(known: dict[str, Any], fields: dict[str, Any]) -> dict[str, Any]:
+    # Raises ValueError starting with the name of the invalid field
+    coerced = {}
+    for field, value in fields.items():
+        try:
+            coerced[field] = coerce(field, known.get(field), value)
+        except ValueError as error:
+            raise ValueError(f"{field}: {error}") from error
+    return coerced
+
+
+def to_cells(entry: dict[str, Any]) -> dict[str, Any]:
+    return {
+        key: json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+        if isinstance(value, (list, dict))
+        else value
+        for key, value in entry.items()
+    }
+
+
+def read_csv(file: IO[str], cls: type) -> Iterator[dict[str, Any]]:
+    known = defaults(cls)
+    reader = csv.reader(file)
+    header = next(reader, [])
+    # Parsers are picked once per column, and empty cells are left out so
+    # their fields keep the current value
+    columns = [(column, cell_parser(known.get(column))) for column in header]
+    for cells in reader:
+        if not cells:
+            continue
+        if len(cells) > len(columns):
+            raise ValueError(f"line {reader.line_num}: more cells than columns")
+        fields = {}
+        for (column, parse), text in zip(columns, cells):
+            if not text:
+                continue
+            try:
+                fields[column] = coerce(column, known.get(column), parse(text))
+            except ValueError as error:
+                raise ValueError(
+                    f"line {reader.line_num}: {column}: {error}"
+                ) from error
+        yield fields
+
+
+def read_json_lines(file: IO[str]) -> Iterator[Any]:
+    for number, line in enumerate(file, 1):
+        if line.strip():
+            try:
+                yield json.loads(line)
+            except ValueError as error:
+                raise ValueError(f"line {number}: {error}") from error
+
+
+def read_json_array(file: IO[str]) -> Iterator[Any]:
+    # The items of a top-level array, decoded as they are read
+    decoder = json.JSONDecoder()
+    buffer = file.read(READ_SIZE)
+    pos = WHITESPACE.match(buffer).end()
+    if buffer[pos : pos + 1] != "[":
+        raise ValueError("expected a JSON array")
+    (pos, number) = (pos + 1, 0)
+    while True:
+        pos = WHITESPACE.match(buffer, pos).end()
+        if pos == len(buffer):
+            if not (buffer := file.read(READ_SIZE)):
+                raise ValueError("unterminated JSON array")
+            pos = 0
+            continue
+        if buffer[pos] == "]":
+            return
+        start = pos
+        if number:
+            if buffer[pos] != ",":
+                raise ValueError(f"item {number + 1}: expected ',' or ']'")
+            start = WHITESPACE.match(buffer, pos + 1).end()
+        try:
+            (item, end) = decoder.raw_decode(buffer, start)
+        except ValueError as error:
+            # An item split across reads, objects cannot end early
+            if not (more := file.read(READ_SIZE)):
+                raise ValueError(f"item {number + 1}: {error}") from error
+            (buffer, pos) = (buffer[pos:] + more, 0)
+            continue
+        number += 1
+        yield item
+        pos = end
+
+
+def read_rows(file: IO[str], format: str, cls: type) -> Iterator[dict[str, Any]]:
+    if format == "csv":
+        yield from read_csv(file, cls)
+        return
+    # JSON values are checked like CSV cells, so no row writes a value the
+    # editors and the game cannot read
+    known = defaults(cls)
+    items = read_json_lines(file) if format == "jsonl" else read_json_array(file)
+    for number, item in enumerate(items, 1):
+        if not isinstance(item, dict):
+            raise ValueError(f"item {number} is not an object")
+        try:
+            fields = coerce_fields(known, item)
+        except ValueError as error:
+            raise ValueError(f"item {number}: {error}") from error
+        yield fields
+
+
+def write_rows(
+    file: IO[str], format: str, cls: type, entries: Iterable[tuple[str, dict]]
+) -> int:
+    # Returns the number of entries with fields a CSV file has no column for
+    if format == "csv":
+        known = defaults(cls)
+        writer = csv.DictWriter(file, list(known), extrasaction="ignore")
+        writer.writeheader()
+        dropped = 0
+        for key, entry in entries:
+            dropped += not entry.keys() <= known.keys()
+            writer.writerow({"key": key} | to_cells(entry))
+        return dropped
+    lines = format == "jsonl"
+    file.write("" if lines else "[")
+    for i, (key, entry) in enumerate(entries):
+        row = {"key": key} | entry
+        text = json.dumps(row, ensure_ascii=False, separators=(",", ":"))
+        file.write(f"{text}\n" if lines else f"{',' if i else ''}\n{text}")
+    file.write("" if lines else "\n]\n")
+    return 0
+
+
+def open_database(
+    path: Path, table: tuple[str, ...], codec: Codec
+) -> tuple[dict[str, Any], MutableMapping[str, dict[str, Any]]]:
+    # The document and its table of entries, which is the whole database or
+    # a split or SQLite one reading each entry when it is needed
+    if shard_dir(path).is_dir() or sqlite_path(path).exists():
+        document = load_document(path, table, codec)
+    else:
+        # Saves still waiting in the Pokemon editor's journal come first
+        Journal(path, codec.load, codec.dump).compact(block=True)
+        document = codec.load(path) if path.exists() else {}
+    return (document, get_table(document, table))
+
+
+def import_rows(
+    rows: Iterable[dict[str, Any]],
+    cls: type,
+    entries: MutableMapping[str, dict[str, Any]],
+) -> tuple[int, int]:
+    # Returns the number of entries added and changed
+    (added, changed) = (0, 0)
+    stored = isinstance(entries, ENTRY_STORES)
+    for chunk in batched(enumerate(rows, 1)):
+        keyed = []
+        for number, fields in chunk:
+            key = fields.pop("key", None) or key_of(fields.get("name"))
+            if not isinstance(key, str) or not key:
+                raise ValueError(f"row {number} has no key or name")
+            keyed.append((key, fields))
+        if isinstance(entries, SqliteTable):
+            entries.preload(key for key, _ in keyed)
+        keys = []
+        for key, fields in keyed:
+            if (old := entries.get(key)) is None:
+                new = cls.from_dict(fields).to_dict()
+            else:
+                new = old | fields
+            if new != old:
+                entries[key] = new
+                keys.append(key)
+                added += old is None
+                changed += old is not None
+        # Each chunk is saved in one go and dropped from memory
+        if stored:
+            entries.save_entries(keys)
+            entries.unload(key for key, _ in keyed)
+    return (added, changed)
+
+
+def key_of(name: Any) -> str | None:
+    return name.replace(" ", "_") if isinstance(name, str) else None
+
+
+def iter_entries(
+    entries: MutableMapping[str, dict[str, Any]]
+) -> Iterator[tuple[str, dict[str, Any]]]:
+    stored = isinstance(entries, ENTRY_STORES)
+    for chunk in batched(iter(list(entries))):
+        if isinstance(entries, SqliteTable):
+            entries.preload(chunk)
+        yield from ((key, entries[key]) for key in chunk)
+        if stored:
+            entries.unload(chunk)
+
+
+def open_file(name: str, mode: str) -> contextlib.AbstractContextManager[IO[str]]:
+    # "-" is the standard input or output. Spreadsheets may start the files
+    # they write with a byte order mark, which is skipped when reading
+    if name == "-":
+        return contextlib.nullcontext(sys.stdin if mode == "r" else sys.stdout)
+    encoding = "utf-8-sig" if mode == "r" else "utf-8"
+    return open(name, mode, encoding=encoding, newline="")
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m pkdb.transfer")
+    parser.add_argument("command", choices=["import", "export"])
+    parser.add_argument("kind", choices=list(KINDS))
+    parser.add_argument(
+        "database", type=Path, help="moves.toml.bytes or pokemon.toml.bytes"
+    )
+    parser.add_argument("file", help="CSV or JSON file, - for stdin or stdout")
+    parser.add_argument(
+        "--format", choices=FORMATS, help="by default the file extension"
+    )
+    parser.add_argument("--codec", choices=CODECS)
+    args = parser.parse_args()
+    (cls, default_codec) = KINDS[args.kind]
+    codec = load_codec(args.codec or get_str("CODEC", default_codec) or default_codec)
+    format = args.format or Path(args.file).suffix.lstrip(".").lower()
+    if format not in FORMATS:
+        parser.error(f"unknown format of {args.file}, use --format")
+
+    start = time.perf_counter()
+    (document, entries) = open_database(args.database, TABLES[cls], codec)
+    try:
+        match args.command:
+            case "import":
+                with open_file(args.file, "r") as file:
+                    try:
+                        (added, changed) = import_rows(
+                            read_rows(file, format, cls), cls, entries
+                        )
+                    except ValueError as error:
+                        parser.error(f"{args.file}: {error}")
+                if not isinstance(entries, ENTRY_STORES) and (added or changed):
+                    atomic_dump(codec.dump, args.database, document)
+                summary = f"{added} added, {changed} changed"
+            case "export":
+                with open_file(args.file, "w") as file:
+                    dropped = write_rows(file, format, cls, iter_entries(entries))
+                summary = args.file
+                if dropped:
+                    summary += f", {dropped} with fields CSV has no column for"
+        count = len(entries)
+    finally:
+        if isinstance(entries, SqliteTable):
+            entries.close()
+    elapsed = time.perf_counter() - start
+    print(
+        f"{args.command.capitalize()}ed {args.kind}: {summary} "
+        f"({count} entries, {elapsed:.2f}s)",
+        file=sys.stderr,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,194 @@
+"""Undo history keeping only what each edit changed.
+
+Every step stores, for each entry it touched, the fields whose value
+changed, with their old and new values, instead of copies of the entries or
+of the table. Undoing or redoing a step patches just those entries, so it
+costs the same whatever the size of the database. The history is bounded by
+``PKDB_UNDO_STEPS`` and by an estimate of its size, ``PKDB_UNDO_KIB``; the
+oldest steps are dropped first.
+"""
+import sys
+from collections import deque
+from collections.abc import Mapping, MutableMapping
+from typing import Any, NamedTuple
+
+from pkdb.config import get_int
+from pkdb.dirty import DirtyTable, rename_key
+
+
+class Missing:
+    # Value of a field the entry does not have
+    def __repr__(self) -> str:
+        return "MISSING"
+
+
+MISSING: Any = Missing()
+
+
+class EntryDiff(NamedTuple):
+    existed: bool
+    exists: bool
+    # Field name to (old value, new value)
+    fields: dict[str, tuple[Any, Any]]
+
+
+class Step(NamedTuple):
+    label: str
+    diffs: dict[str, EntryDiff]
+    size: int
+
+
+def diff(old: Mapping[str, Any] | None, new: Mapping[str, Any] | None) -> EntryDiff:
+    old_fields = old or {}
+    new_fields = new or {}
+    # Fields in entry order, those only the new entry has last
+    names = [*old_fields, *(name for name in new_fields if name not in old_fields)]
+    fields = {
+        name: (old_fields.get(name, MISSING), new_fields.get(name, MISSING))
+        for name in names
+        if old_fields.get(name, MISSING) != new_fields.get(name, MISSING)
+    }
+    return EntryDiff(old is not None, new is not None, fields)
+
+
+def patch(
+    entry: Mapping[str, Any] | None, change: EntryDiff, forward: bool
+) -> dict[str, Any] | None:
+    # The entry with the change applied (or reverted), None if it is removed
+    if not (change.exists if forward else change.existed):
+        return None
+    patched = dict(entry or {})
+    for name, values in change.fields.items():
+        value = values[1] if forward else values[0]
+        if value is MISSING:
+            patched.pop(name, None)
+        else:
+            patched[name] = value
+    return patched
+
+
+def estimate_size(diffs: dict[str, EntryDiff]) -> int:
+    # Rough bytes held by a step, counting each stored value once
+    size = sys.getsizeof(diffs)
+    for key, change in diffs.items():
+        size += sys.getsizeof(key) + sys.getsizeof(change.fields)
+        for name, (old, new) in change.fields.items():
+            size += sys.getsizeof(name) + value_size(old) + value_size(new)
+    return size
+
+
+def value_size(value: Any) -> int:
+    match value:
+        case dict():
+            items = value.items()
+            return sys.getsizeof(value) + sum(
+                value_size(k) + value_size(v) for k, v in items
+            )
+        case list() | tuple():
+            return sys.getsizeof(value) + sum(map(value_size, value))
+    return sys.getsizeof(value)
+
+
+class UndoStack:
+    """Undo and redo steps over a table of entries.
+
+    Edits are made as usual and recorded afterwards with the entries as they
+    were before, so the table itself never depends on the history.
+    """
+
+    def __init__(self, table: MutableMapping[str, dict[str, Any]]):
+        self.table = table
+        self.max_steps = get_int("UNDO_STEPS", 1000)
+        self.max_size = get_int("UNDO_KIB", 4096) * 1024
+        self.undo_steps: deque[Step] = deque()
+        self.redo_steps: list[Step] = []
+        # Estimated bytes held by both stacks
+        self.size = 0
+
+    def record(self, label: str, old: Mapping[str, dict[str, Any] | None]):
+        # ``old`` maps each changed key to its entry before the edit, or None
+        # when the edit created it. The new entries are read from the table
+        diffs = {}
+        for key, entry in old.items():
+            change = diff(entry, self.table.get(key))
+            if change.fields or change.existed != change.exists:
+                diffs[key] = change
+        if not diffs:
+            return
+        self.size -= sum(step.size for step in self.redo_steps)
+        self.redo_steps.clear()
+        step = Step(label, diffs, estimate_size(diffs))
+        self.undo_steps.append(step)
+        self.size += step.size
+        self.trim()
+
+    def clear(self):
+        self.undo_steps.clear()
+        self.redo_steps.clear()
+        self.size = 0
+
+    def trim(self):
+        # Keep the newest step even when it is larger than the limit
+        while len(self.undo_steps) > 1 and (
+            len(self.undo_steps) > self.max_steps or self.size > self.max_size
+        ):
+            self.size -= self.undo_steps.popleft().size
+
+    def can_undo(self) -> bool:
+        return bool(self.undo_steps)
+
+    def can_redo(self) -> bool:
+        return bool(self.redo_steps)
+
+    def undo(self) -> list[str]:
+        # Returns the keys of the entries changed back
+        if not self.undo_steps:
+            return []
+        step = self.undo_steps.pop()
+        self.apply(step, forward=False)
+        self.redo_steps.append(step)
+        return list(step.diffs)
+
+    def redo(self) -> list[str]:
+        if not self.redo_steps:
+            return []
+        step = self.redo_steps.pop()
+        self.apply(step, forward=True)
+        self.undo_steps.append(step)
+        return list(step.diffs)
+
+    def apply(self, step: Step, forward: bool):
+        entries = {
+            key: patch(self.table.get(key), change, forward)
+            for key, change in step.diffs.items()
+        }
+        # A key removed and another created by the same step, as by a rename,
+        # swap places so the table keeps its order
+        removed = [key for key in entries if entries[key] is None]
+        created = [key for key in entries if key not in self.table]
+        removed = [key for key in removed if key in self.table]
+        created = [key for key in created if entries[key] is not None]
+        for old, new in zip(removed, created):
+            entry = entries.pop(new)
+            del entries[old]
+            if isinstance(self.table, DirtyTable):
+                self.table.rename(old, new, entry)
+            else:
+                rename_key(self.table, old, new, entry)
+        for key, entry in entries.items():
+            if entry is None:
+                self.table.pop(key, None)
+            else:
+                self.table[key] = entry
+
+    def undo_label(self) -> str:
+        return self.undo_steps[-1].label if self.undo_steps else ""
+
+    def redo_label(self) -> str:
+        return self.redo_steps[-1].label if self.redo_steps else ""
+
+    def summary(self) -> str:
+        return (
+            f"{len(self.undo_steps)} undo, {len(self.redo_steps)} redo steps, "
+            f"{self.size / 1024:.1f} KiB"
+        )
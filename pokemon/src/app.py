@@ -1,52 +1,125 @@
 from ctypes import cast
+import multiprocessing
 import sys
 from os.path import dirname, abspath
-from typing import Any, Sequence, Tuple, KeysView
+from typing import Any, Callable, Tuple
 from pathlib import Path
 
-import tomli as toml
-import tomli_w as toml_w
-from PySide6.QtCore import Qt
 from PySide6.QtWidgets import (
     QApplication,
     QMainWindow,
     QFileDialog,
-    QTreeWidget,
-    QTreeWidgetItem,
-    QTreeWidgetItemIterator,
-    QSpinBox,
-    QComboBox,
+    QTreeView,
     QWidget,
 )
 from PySide6 import QtGui
 from window import Ui_MainWindow
 
+# Make the shared pkdb package importable when running from source
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+from pkdb.codec import Codec, get_codec
+from pkdb.config import get_flag, get_int
+from pkdb.dirty import DirtyTable
+from pkdb.files import atomic_dump
+from pkdb.integrity import References
+from pkdb.index import LazyTable
+from pkdb.journal import Journal
+from pkdb.loader import ENTRY_STORES, Job, database_exists, format_timings
+from pkdb.loader import load_all, load_document
+from pkdb.qt.autosave import Autosave
+from pkdb.qt.bulk import BulkEditDialog
+from pkdb.qt.completer import SearchCompleter
+from pkdb.qt.form import EntryLoader, signals_blocked
+from pkdb.qt.integrity import ReferenceCheck
+from pkdb.qt.latency import RenderLatency
+from pkdb.qt.names import NameList
+from pkdb.qt.rename import ask_new_name, rename_action
+from pkdb.qt.undo import UndoActions
+from pkdb.records import Pokemon
+from pkdb.rename import ReverseIndex, rename
+from pkdb.scan import load_keys
+from pkdb.undo import UndoStack
+from tables import EvolutionDelegate, EvolutionModel, LearnsetDelegate
+from tables import LearnsetModel, evolution_row
+
 
 def under_to_space(text: str) -> str:
     return text.replace("_", " ")
 
 
-class SpinBox(QSpinBox, QWidget):
-    def wheelEvent(self, event: QtGui.QWheelEvent):
-        event.ignore()
-
-
-class ComboBox(QComboBox, QWidget):
-    def wheelEvent(self, event: QtGui.QWheelEvent):
-        event.ignore()
-
-
 class Window(QMainWindow, Ui_MainWindow):
     root_path: Path
     pkm_path: Path
-    pkm: dict[str, dict[str, Any]]
-    pkm_items: Sequence[str]
-    move_items: Sequence[str]
-    item_items: Sequence[str]
+    pkm: DirtyTable
+    codec: Codec
+    journal: Journal
+    autosave: Autosave
+    undo: UndoActions
+    latency: RenderLatency
+    loader: EntryLoader
+    learnset: LearnsetModel
+    evolutions: EvolutionModel
+    pkm_names: NameList
+    move_names: NameList
+    item_names: NameList
+    references: References
+    check: ReferenceCheck
+    rename_action: QtGui.QAction
+    tab_fillers: dict[QWidget, Callable[[Pokemon], None]]
+    built_tabs: set[QWidget]
+    stale_tabs: set[QWidget]
+    shown: Pokemon | None
 
     def __init__(self):
         super().__init__()
         self.setupUi(self)
+        # Learnset and evolutions are edited through models, editor widgets
+        # only exist for the cell being edited
+        self.learnset = LearnsetModel(self)
+        self.evolutions = EvolutionModel(self)
+        # The widgets of every tab are built by the generated setupUi above.
+        # Only their models and delegates wait until a tab is first opened,
+        # and tabs only show the selected Pokemon when visible (or when it
+        # is saved)
+        self.tab_fillers = {
+            self.tab_moves: self.show_learnset,
+            self.tab_evolutions: self.show_evolutions,
+            self.tab_misc: self.show_misc,
+        }
+        self.built_tabs = set()
+        self.stale_tabs = set()
+        self.shown = None
+        # Time from selecting a Pokemon until it is on screen
+        self.latency = RenderLatency("Pokémon shown", self, self)
+        if get_flag("LATENCY"):
+            self.latency.measured.connect(lambda: self.statusBar().showMessage(self.latency.summary()))  # type: ignore
+        # Show the Pokemon named in the "Name" entry once typing stops
+        self.loader = EntryLoader(
+            self.combo_name,
+            lambda text: self.pkm.get(text.replace(" ", "_")),
+            self.show_pokemon,
+            [
+                self.combo_type1,
+                self.combo_type2,
+                self.combo_ability1,
+                self.combo_ability2,
+                self.combo_ability3,
+                self.spin_hp,
+                self.spin_atk,
+                self.spin_def,
+                self.spin_sp_atk,
+                self.spin_sp_def,
+                self.spin_spd,
+                self.spin_growth,
+                self.spin_gender,
+                self.spin_xp,
+                self.spin_weight,
+                self.spin_height,
+                self.spin_pokedex,
+                self.text_description,
+            ],
+            self,
+        )
         self.connect_slots()
 
         # Get root path based on type of executable
@@ -57,263 +130,284 @@ class Window(QMainWindow, Ui_MainWindow):
 
         # If path does not exist, ask the user to select it
         (self.root_path, self.pkm_path) = self.get_file_path("pokemon.toml.bytes")
+        moves_path = self.get_file_path("moves.toml.bytes")[1]
+        items_path = self.get_file_path("items.toml.bytes")[1]
+        abilities_path = self.get_file_path("abilities.toml.bytes")[1]
+        types_path = self.get_file_path("types.toml.bytes")[1]
 
-        # Load pokemon.toml
-        self.pkm = self.load_toml(self.pkm_path)
+        # Load every database at once (only the names of the reference ones)
+        self.codec = get_codec("tomli")
+        loads = self.codec.loads
+        (loaded, timings) = load_all(
+            {
+                "pokemon": Job(load_document, self.pkm_path, ((), self.codec)),
+                "moves": Job(load_keys, moves_path, (("Moves",), loads)),
+                "items": Job(load_keys, items_path, (("Items",), loads)),
+                "abilities": Job(load_keys, abilities_path, (("Abilities",), loads)),
+                "types": Job(load_keys, types_path, (("Types",), loads)),
+            }
+        )
+        self.statusBar().showMessage(format_timings(timings), 5000)
+
+        # Replay saves still waiting in the journal (split and SQLite
+        # databases save single Pokemon themselves and never use it)
+        self.pkm = DirtyTable(loaded["pokemon"], self.write_pokemon)
+        self.journal = Journal(self.pkm_path, self.codec.load, self.codec.dump)
+        if not isinstance(self.pkm.table, ENTRY_STORES):
+            self.journal.replay(self.pkm.table)
+            self.journal.compact()
+        # Saved Pokemon are written when the autosave mode says so
+        self.autosave = Autosave(self.pkm, self)
+        self.autosave.flushed.connect(lambda: self.statusBar().showMessage(f"Saved ({self.pkm.stats.summary()})", 3000))  # type: ignore
+        self.autosave.failed.connect(lambda error: self.statusBar().showMessage(f"Save failed: {error}"))  # type: ignore
+        # Saved Pokemon can be undone, the history only keeps changed fields
+        self.undo = UndoActions(UndoStack(self.pkm), self)
+        self.undo.applied.connect(self.undone)  # type: ignore
+        toolbar = self.addToolBar("Edit")
+        toolbar.addActions([self.undo.undo_action, self.undo.redo_action])
+
+        # Every combo box choosing from the same names shares one list
+        self.pkm_names = NameList(map(under_to_space, self.pkm.keys()), self)
+        self.move_names = NameList(map(under_to_space, loaded["moves"]), self)
+        self.item_names = NameList(map(under_to_space, loaded["items"]), self)
 
         # Add existing Pokemon to the "Name" entry
-        self.pkm_items = list(map(under_to_space, self.pkm.keys()))
-        self.combo_name.addItems([under_to_space(p) for p in self.pkm.keys()])
-
-        # Save existing moves for later entries
-        moves_path = self.get_file_path("moves.toml.bytes")[1]
-        moves: KeysView[str] = self.load_toml(moves_path).get("Moves", {}).keys()
-        self.move_items = [under_to_space(move) for move in moves]
-
-        # Save existing items for later entries
-        items_path = self.get_file_path("items.toml.bytes")[1]
-        items: KeysView[str] = self.load_toml(items_path).get("Items", {}).keys()
-        self.item_items = [under_to_space(item) for item in items]
+        self.pkm_names.attach(self.combo_name)
+        # Typing a name only searches an index of the names
+        SearchCompleter(self.pkm_names.search_index(), self).attach(self.combo_name)
 
         # Add existing abilities to the corresponding entries
-        abilities_path = self.get_file_path("abilities.toml.bytes")[1]
-        abilities = [
-            under_to_space(a)
-            for a in self.load_toml(abilities_path).get("Abilities", {}).keys()
-        ]
-        self.combo_ability1.addItems(abilities)
-        self.combo_ability2.addItems(abilities)
-        self.combo_ability3.addItems(abilities)
+        abilities = NameList(map(under_to_space, loaded["abilities"]), self)
+        abilities.attach(self.combo_ability1, self.combo_ability2, self.combo_ability3)
 
         # Add existing types to the "Type 1" and "Type 2" entries
-        types_path = self.get_file_path("types.toml.bytes")[1]
-        if types := self.load_toml(types_path).get("Types"):
-            self.combo_type1.addItems(types.keys())
-            self.combo_type2.addItems(types.keys())
+        types = NameList(loaded["types"], self)
+        if types.names:
+            types.attach(self.combo_type1, self.combo_type2)
+
+        # Names that do not exist are counted in the status bar and shown in
+        # red in the tables, the name lists are the indexes
+        self.references = References(
+            {
+                "pokemon": self.pkm_names,
+                "moves": self.move_names,
+                "items": self.item_names,
+                "abilities": abilities,
+                "types": types,
+            }
+        )
+        self.learnset.references = self.evolutions.references = self.references
+        self.check = ReferenceCheck(
+            self.references,
+            self.pkm_path.name,
+            self.pkm,
+            self.references.check_pokemon,
+            self,
+        )
+        toolbar.addAction(self.check.action)
+        # Renaming a Pokemon renames it in every evolution too
+        self.rename_action = rename_action(self)
+        self.rename_action.triggered.connect(self.rename_pokemon)  # type: ignore
+        toolbar.addAction(self.rename_action)
 
     def connect_slots(self):
-        self.combo_name.currentTextChanged.connect(self.name_changed)  # type: ignore
+        self.tabWidget.currentChanged.connect(self.fill_current_tab)  # type: ignore
         self.button_save.clicked.connect(self.save_poke)  # type: ignore
+        self.button_bulk.clicked.connect(self.bulk_edit)  # type: ignore
         self.button_cancel.clicked.connect(self.close)  # type: ignore
         self.button_add_move.clicked.connect(self.add_move_item)  # type: ignore
-        self.button_remove_move.clicked.connect(lambda: self.remove_tree_item(self.tree_moves))  # type: ignore
+        self.button_remove_move.clicked.connect(lambda: self.remove_tree_item(self.tree_moves, self.learnset))  # type: ignore
         self.button_add_evolution.clicked.connect(self.add_evolution_item)  # type: ignore
-        self.button_remove_evolution.clicked.connect(lambda: self.remove_tree_item(self.tree_evolutions))  # type: ignore
-
-    def name_changed(self):
-        text = self.combo_name.currentText()
-        # If move is found in dictionary
-        if pkm := self.pkm.get(text.replace(" ", "_")):
-            # Add types
-            self.combo_type1.setCurrentText(pkm["type1"])
-            self.combo_type2.setCurrentText(pkm["type2"])
-            # Add abilities
-            self.combo_ability1.setCurrentText(pkm["first"])
-            self.combo_ability2.setCurrentText(pkm["second"])
-            self.combo_ability3.setCurrentText(pkm["hidden"])
-            # Add stats
-            self.spin_hp.setValue(pkm.get("hp", 0))
-            self.spin_atk.setValue(pkm.get("atk", 0))
-            self.spin_def.setValue(pkm.get("def", 0))
-            self.spin_sp_atk.setValue(pkm.get("sp_atk", 0))
-            self.spin_sp_def.setValue(pkm.get("sp_def", 0))
-            self.spin_spd.setValue(pkm.get("speed", 0))
-            # Add miscellaneous
-            self.spin_growth.setValue(pkm.get("growth", 100))
-            self.spin_gender.setValue(pkm.get("gender", 50))
-            self.spin_xp.setValue(pkm.get("base_xp", 30))
-            self.spin_weight.setValue(pkm.get("weight", 0))
-            self.spin_height.setValue(pkm.get("height", 0))
-            self.spin_pokedex.setValue(pkm.get("pokedex_num", 0))
-            self.text_description.setText(pkm.get("pokedex", ""))
-            # Remove current moves
-            for _ in range(self.tree_moves.topLevelItemCount()):
-                self.tree_moves.takeTopLevelItem(0)
-            # Add new moves
-            for move in pkm["moves"]:
-                self.add_move_item(move["lvl"], move["move"])
-            # Remove current evolutions
-            for _ in range(self.tree_evolutions.topLevelItemCount()):
-                self.tree_evolutions.takeTopLevelItem(0)
-            # Add new evolutions
-            for evo in pkm["evolutions"]:
-                self.add_evolution_item(evo["pkm"], evo["method"], evo.get("value"))
-
-    def add_move_item(self, level: int = 1, move: str | None = None):
-        # Get current item
-        i = self.tree_moves.topLevelItemCount()
-        # Create level spinbox with the needed properties
-        spin_level = SpinBox()
-        spin_level.setMaximum(100)
-        spin_level.setMinimum(0)
-        spin_level.setValue(level)
-        spin_level.setFocusPolicy(Qt.FocusPolicy.ClickFocus)
-        # Create move combobox with the needed properties
-        combo_move = ComboBox()
-        combo_move.setEditable(True)
-        combo_move.setFocusPolicy(Qt.FocusPolicy.ClickFocus)
-        combo_move.setInsertPolicy(QComboBox.InsertPolicy.InsertAtBottom)
-        combo_move.setPlaceholderText("Select move")
-        if move:
-            combo_move.setCurrentText(move)
-        combo_move.addItems(self.move_items)
-        # Add both to the tree
-        self.tree_moves.insertTopLevelItem(i, QTreeWidgetItem())
-        self.tree_moves.setItemWidget(self.tree_moves.topLevelItem(i), 0, spin_level)
-        self.tree_moves.setItemWidget(self.tree_moves.topLevelItem(i), 1, combo_move)
-
-    def add_evolution_item(
-        self,
-        pkm: str | None = None,
-        evo_method: str | None = None,
-        value: str | None = None,
-    ):
-        # Get current item
-        i = self.tree_evolutions.topLevelItemCount()
-        # Create pokemon combobox with the needed properties
-        combo_pkm = ComboBox()
-        combo_pkm.setFocusPolicy(Qt.FocusPolicy.ClickFocus)
-        combo_pkm.setEditable(True)
-        combo_pkm.setFocusPolicy(Qt.FocusPolicy.ClickFocus)
-        combo_pkm.setInsertPolicy(QComboBox.InsertPolicy.InsertAtBottom)
-        combo_pkm.setPlaceholderText("Select Pokémon")
-        combo_pkm.addItems(self.pkm_items)
-        if pkm:
-            combo_pkm.setCurrentText(pkm)
-        # Create evolution method combobox with the needed properties
-        combo_method = ComboBox()
-        combo_method.setEditable(True)
-        combo_method.setFocusPolicy(Qt.FocusPolicy.ClickFocus)
-        combo_method.setInsertPolicy(QComboBox.InsertPolicy.InsertAtBottom)
-        combo_method.setPlaceholderText("Select move")
-        combo_method.addItems(["Level", "Item", "Custom"])
-        if evo_method:
-            combo_method.setCurrentText(evo_method)
-        else:
-            combo_method.setCurrentText("Level")
-        combo_method.currentTextChanged.connect(self.update_evolution_tree)  # type: ignore
-        # Add both to the tree
-        tree_item = QTreeWidgetItem()
-        self.tree_evolutions.insertTopLevelItem(i, tree_item)
-        self.tree_evolutions.setItemWidget(tree_item, 0, combo_pkm)
-        self.tree_evolutions.setItemWidget(tree_item, 1, combo_method)
-        widget_value = self.get_evo_method_widget(combo_method.currentText(), value)
-        if widget_value:
-            self.tree_evolutions.setItemWidget(tree_item, 2, widget_value)
-
-    def get_evo_method_widget(
-        self, method: str, value: int | str | None = None
-    ) -> QWidget | None:
-        widget_value: QWidget | None = None
-        match method:
-            case "Level":
-                widget_value = SpinBox()
-                widget_value.setMinimum(0)
-                widget_value.setMaximum(100)
-                widget_value.setFocusPolicy(Qt.FocusPolicy.ClickFocus)
-                if value is not None:
-                    widget_value.setValue(int(value))
-                else:
-                    widget_value.setValue(1)
-            case "Item":
-                widget_value = ComboBox()
-                widget_value.setEditable(True)
-                widget_value.setFocusPolicy(Qt.FocusPolicy.ClickFocus)
-                widget_value.setInsertPolicy(QComboBox.InsertPolicy.InsertAtBottom)
-                widget_value.addItems(self.item_items)
-                if value is not None:
-                    widget_value.setCurrentText(str(value))
-                else:
-                    widget_value.setCurrentText("None")
-        return widget_value
-
-    def update_evolution_tree(self):
-        current_item = self.tree_evolutions.currentItem()
-        # Get current evolution method index (0 => level, 1 => item, 2 => custom)
-        method: str = self.tree_evolutions.itemWidget(current_item, 1).currentText()  # type: ignore
-        # Get corresponding widget based on the method
-        widget: QWidget | None = self.get_evo_method_widget(method)
-        # If function returns a widget, add it to the tree
-        if widget:
-            self.tree_evolutions.setItemWidget(current_item, 2, widget)
-        else:
-            self.tree_evolutions.removeItemWidget(current_item, 2)
-
-    def get_evolutions(self):
-        tree_evolutions_items: list[QTreeWidgetItem] = [
-            self.tree_evolutions.topLevelItem(i)
-            for i in range(self.tree_evolutions.topLevelItemCount())
-        ]
-        evolutions = []
-        for item in tree_evolutions_items:
-            pkm = self.tree_evolutions.itemWidget(item, 0).currentText()  # type: ignore
-            method = self.tree_evolutions.itemWidget(item, 1).currentText()  # type: ignore
-            value = None
-            match method:
-                case "Level":
-                    value = self.tree_evolutions.itemWidget(item, 2).value()  # type: ignore
-                case "Item":
-                    value = self.tree_evolutions.itemWidget(item, 2).currentText()  # type: ignore
-            evo = {"pkm": pkm, "method": method}
-            if value:
-                evo["value"] = value
-            evolutions.append(evo)
-        return evolutions
-
-    def remove_tree_item(self, tree: QTreeWidget):
-        i = tree.currentIndex().row()
-        if i == -1:
-            tree.takeTopLevelItem(tree.topLevelItemCount() - 1)
-        else:
-            tree.takeTopLevelItem(tree.currentIndex().row())
+        self.button_remove_evolution.clicked.connect(lambda: self.remove_tree_item(self.tree_evolutions, self.evolutions))  # type: ignore
+
+    def show_pokemon(self, entry: dict[str, Any]):
+        # Qt paints every changed field together once control returns
+        self.latency.start()
+        pkm = Pokemon.from_dict(entry)
+        # Add types
+        self.combo_type1.setCurrentText(pkm.type1)
+        self.combo_type2.setCurrentText(pkm.type2)
+        # Add abilities
+        self.combo_ability1.setCurrentText(pkm.first)
+        self.combo_ability2.setCurrentText(pkm.second)
+        self.combo_ability3.setCurrentText(pkm.hidden)
+        # Add stats
+        self.spin_hp.setValue(pkm.hp)
+        self.spin_atk.setValue(pkm.atk)
+        self.spin_def.setValue(pkm.defense)
+        self.spin_sp_atk.setValue(pkm.sp_atk)
+        self.spin_sp_def.setValue(pkm.sp_def)
+        self.spin_spd.setValue(pkm.speed)
+        # Tabs out of sight are filled once they are opened
+        self.shown = pkm
+        self.stale_tabs = set(self.tab_fillers)
+        self.fill_current_tab()
+        self.check.show_entry(self.combo_name.currentText().replace(" ", "_"), entry)
+
+    def fill_current_tab(self):
+        self.fill_tab(self.tabWidget.currentWidget())
+
+    def fill_tab(self, tab: QWidget):
+        if tab not in self.built_tabs:
+            self.build_tab(tab)
+        if tab in self.stale_tabs and self.shown is not None:
+            self.stale_tabs.discard(tab)
+            with signals_blocked(self.loader.widgets):
+                self.tab_fillers[tab](self.shown)
+
+    def build_tab(self, tab: QWidget):
+        self.built_tabs.add(tab)
+        if tab is self.tab_moves:
+            self.tree_moves.setModel(self.learnset)
+            self.tree_moves.setItemDelegate(LearnsetDelegate(self.move_names, self))
+        elif tab is self.tab_evolutions:
+            self.tree_evolutions.setModel(self.evolutions)
+            self.tree_evolutions.setItemDelegate(
+                EvolutionDelegate(self.pkm_names, self.item_names, self)
+            )
+
+    def show_learnset(self, pkm: Pokemon):
+        # Rows are copies, the entry is only replaced when the Pokemon is saved
+        self.learnset.set_rows([move.to_dict() for move in pkm.moves])
+
+    def show_evolutions(self, pkm: Pokemon):
+        self.evolutions.set_rows(
+            [evolution_row(evo.pkm, evo.method, evo.value) for evo in pkm.evolutions]
+        )
+
+    def show_misc(self, pkm: Pokemon):
+        self.spin_growth.setValue(pkm.growth_rate)
+        self.spin_gender.setValue(pkm.gender_rate)
+        self.spin_xp.setValue(pkm.base_xp)
+        self.spin_weight.setValue(pkm.weight)
+        self.spin_height.setValue(pkm.height)
+        self.spin_pokedex.setValue(pkm.pokedex_num)
+        self.text_description.setText(pkm.pokedex)
+
+    def add_move_item(self):
+        self.learnset.append_row({"lvl": 1, "move": ""})
+
+    def add_evolution_item(self):
+        self.evolutions.append_row(evolution_row())
+
+    def remove_tree_item(self, tree: QTreeView, model: LearnsetModel | EvolutionModel):
+        model.remove_row(tree.currentIndex().row())
 
     def save_poke(self):
+        # Every field is read back, so hidden tabs must show the Pokemon too
+        for tab in list(self.stale_tabs):
+            self.fill_tab(tab)
+        pkm = Pokemon(
+            name=self.combo_name.currentText(),
+            type1=self.combo_type1.currentText(),
+            type2=self.combo_type2.currentText(),
+            first=self.combo_ability1.currentText(),
+            second=self.combo_ability2.currentText(),
+            hidden=self.combo_ability3.currentText(),
+            hp=self.spin_hp.value(),
+            atk=self.spin_atk.value(),
+            defense=self.spin_def.value(),
+            sp_atk=self.spin_sp_atk.value(),
+            sp_def=self.spin_sp_def.value(),
+            speed=self.spin_spd.value(),
+            moves=self.learnset.moves(),
+            evolutions=self.evolutions.evolutions(),
+            growth_rate=self.spin_growth.value(),
+            gender_rate=self.spin_gender.value(),
+            base_xp=self.spin_xp.value(),
+            weight=self.spin_weight.value(),
+            height=self.spin_height.value(),
+            pokedex_num=self.spin_pokedex.value(),
+            pokedex=self.text_description.toPlainText(),
+        )
         # Update Pokemon definition (if it does not exist it will be created)
-        self.pkm.update(
-            {
-                self.combo_name.currentText().replace(" ", "_"): {
-                    "name": self.combo_name.currentText(),
-                    "type1": self.combo_type1.currentText(),
-                    "type2": self.combo_type2.currentText(),
-                    "first": self.combo_ability1.currentText(),
-                    "second": self.combo_ability2.currentText(),
-                    "hidden": self.combo_ability3.currentText(),
-                    "hp": self.spin_hp.value(),
-                    "atk": self.spin_atk.value(),
-                    "def": self.spin_def.value(),
-                    "sp_atk": self.spin_sp_atk.value(),
-                    "sp_def": self.spin_sp_def.value(),
-                    "speed": self.spin_spd.value(),
-                    "moves": [
-                        {
-                            "lvl": spin_level.value(),
-                            "move": combo_move.currentText(),
-                        }
-                        for spin_level, combo_move in zip(
-                            self.tree_moves.findChildren(SpinBox),
-                            self.tree_moves.findChildren(ComboBox),
-                        )
-                    ],
-                    "evolutions": self.get_evolutions(),
-                    "growth_rate": self.spin_growth.value(),
-                    "gender_rate": self.spin_growth.value(),
-                    "base_xp": self.spin_xp.value(),
-                    "weight": self.spin_weight.value(),
-                    "height": self.spin_height.value(),
-                    "pokedex_num": self.spin_pokedex.value(),
-                    "pokedex": self.text_description.toPlainText(),
-                }
-            }
+        key = pkm.name.replace(" ", "_")
+        old = {key: self.pkm.get(key)}
+        self.pkm[key] = pkm.to_dict()
+        self.undo.record(f"save {self.combo_name.currentText()}", old)
+        # New Pokemon can be picked as evolutions right away
+        self.pkm_names.add(self.combo_name.currentText())
+        self.check.show_entry(key, self.pkm[key])
+        self.autosave.changed()
+
+    def bulk_edit(self):
+        dialog = BulkEditDialog(self.pkm, Pokemon().to_dict(), parent=self)
+        if not dialog.exec() or not dialog.changed:
+            return
+        self.undo.record(f"bulk edit of {len(dialog.changed)} Pokémon", dialog.changed)
+        # Every edited Pokemon is written by a single save
+        self.autosave.flush()
+        self.loader.load()
+
+    def rename_pokemon(self):
+        old = self.combo_name.currentText()
+        if old.replace(" ", "_") not in self.pkm:
+            self.statusBar().showMessage(f"No Pokémon named {old}", 3000)
+            return
+        if (new := ask_new_name(self, "Pokémon", old)) is None:
+            return
+        # Evolutions are the only names of Pokemon, all in this database
+        index = ReverseIndex()
+        index.add_table("pokemon", self.pkm)
+        try:
+            changed = rename({"pokemon": self.pkm}, index, "pokemon", old, new)
+        except ValueError as error:
+            self.statusBar().showMessage(f"Rename failed: {error}", 3000)
+            return
+        self.undo.record(f"rename of {old} to {new}", changed["pokemon"])
+        self.pkm_names.remove(old)
+        self.pkm_names.add(new)
+        self.combo_name.setCurrentText(new)
+        self.loader.load()
+        # Every changed Pokemon is written by a single save
+        self.autosave.flush()
+        evolutions = len(changed["pokemon"]) - 2
+        self.statusBar().showMessage(
+            f"Renamed {old} to {new} in {evolutions} Pokémon evolutions", 3000
         )
-        # Save Pokemon to file
-        print(toml_w.dumps(self.pkm))
-        with open(self.pkm_path, "wb") as file:
-            toml_w.dump(self.pkm, file)
-            file.close()
+
+    def undone(self, keys: list[str], message: str):
+        for key in keys:
+            if key in self.pkm:
+                self.pkm_names.add(under_to_space(key))
+            else:
+                self.pkm_names.remove(under_to_space(key))
+        self.autosave.changed()
+        self.loader.load()
+        self.statusBar().showMessage(f"{message} ({self.undo.stack.summary()})", 3000)
+
+    def write_pokemon(self, keys: list[str]) -> int:
+        # Writes the changed Pokemon, returning the number of bytes written
+        table = self.pkm.table
+        # Split and SQLite databases only write the edited Pokemon
+        if isinstance(table, ENTRY_STORES):
+            return table.save_entries(keys)
+        # In journal mode only the edited Pokemon are written
+        if get_flag("JOURNAL"):
+            written = sum(self.journal.append(key, table.get(key)) for key in keys)
+            if self.journal.size() >= get_int("JOURNAL_COMPACT_BYTES", 256 * 1024):
+                self.journal.compact()
+            return written
+        # Save Pokemon to file (a running compaction must not overwrite it)
+        self.journal.wait()
+        if isinstance(table, LazyTable):
+            self.pkm.table = table = table.materialize()
+        atomic_dump(self.codec.dump, self.pkm_path, table)
+        return self.pkm_path.stat().st_size
+
+    def closeEvent(self, event: QtGui.QCloseEvent):
+        # Write pending saves and fold the journal into pokemon.toml so the
+        # game sees every save (the window may be closed before the database
+        # was ever opened)
+        if autosave := getattr(self, "autosave", None):
+            autosave.close()
+        if journal := getattr(self, "journal", None):
+            journal.compact(block=True)
+        super().closeEvent(event)
 
     def get_file_path(self, file_name: str) -> Tuple[Path, Path]:
         path = self.root_path / file_name
-        if not path.exists():
+        if not database_exists(path):
             # Ask the user to select the moves.toml file
             selected: str = QFileDialog.getOpenFileName(
                 self, caption=f"Select {file_name}", filter=file_name
@@ -325,12 +419,10 @@ class Window(QMainWindow, Ui_MainWindow):
             path = Path(selected)
         return (path.parent, path)
 
-    def load_toml(self, path: Path) -> dict[str, Any]:
-        with open(path, "rb") as file:
-            return toml.load(file)
-
 
 if __name__ == "__main__":
+    # Database loading may run in worker processes, also when frozen
+    multiprocessing.freeze_support()
     app = QApplication(sys.argv)
     ui = Window()
     ui.show()
@@ -0,0 +1,279 @@
+"""Models and delegates of the learnset and evolution tables.
+
+Rows are plain dicts shaped like the ones saved in pokemon.toml. Editor
+widgets are only created for the cell being edited, so selecting a Pokemon
+costs the same whatever the size of its learnset.
+"""
+from typing import Any
+
+from PySide6 import QtGui
+from PySide6.QtCore import (
+    QAbstractItemModel,
+    QAbstractTableModel,
+    QModelIndex,
+    QObject,
+    QPersistentModelIndex,
+    Qt,
+)
+from PySide6.QtWidgets import (
+    QComboBox,
+    QSpinBox,
+    QStyledItemDelegate,
+    QStyleOptionViewItem,
+    QWidget,
+)
+
+from pkdb.integrity import FILES, References, evolution_fields, learnset_fields
+from pkdb.qt.names import NameList
+from pkdb.records import EVOLUTION_METHODS, Evolution, LearnsetEntry, has_value
+
+Index = QModelIndex | QPersistentModelIndex
+
+
+class SpinBox(QSpinBox, QWidget):
+    def wheelEvent(self, event: QtGui.QWheelEvent):
+        event.ignore()
+
+
+class ComboBox(QComboBox, QWidget):
+    def wheelEvent(self, event: QtGui.QWheelEvent):
+        event.ignore()
+
+
+def level_box(parent: QWidget) -> SpinBox:
+    spin = SpinBox(parent)
+    spin.setMinimum(0)
+    spin.setMaximum(100)
+    return spin
+
+
+def name_box(parent: QWidget, names: NameList, placeholder: str) -> ComboBox:
+    combo = ComboBox(parent)
+    combo.setEditable(True)
+    combo.setPlaceholderText(placeholder)
+    names.attach_editor(combo)
+    return combo
+
+
+class RowsModel(QAbstractTableModel):
+    """Table over a list of dicts, one column per field."""
+
+    fields: tuple[str, ...] = ()
+    headers: tuple[str, ...] = ()
+    # Names the cells refer to, those that do not exist are shown in red
+    references: References | None = None
+
+    def __init__(self, parent: QObject | None = None):
+        super().__init__(parent)
+        self.rows: list[dict[str, Any]] = []
+
+    def rowCount(self, parent: Index = QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self.rows)
+
+    def columnCount(self, parent: Index = QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self.fields)
+
+    def headerData(
+        self, section: int, orientation: Qt.Orientation, role: int = Qt.DisplayRole
+    ) -> Any:
+        if orientation == Qt.Horizontal and role == Qt.DisplayRole:
+            return self.headers[section]
+        return None
+
+    def data(self, index: Index, role: int = Qt.DisplayRole) -> Any:
+        if not index.isValid():
+            return None
+        row = self.rows[index.row()]
+        field = self.fields[index.column()]
+        match role:
+            case Qt.DisplayRole | Qt.EditRole:
+                return row.get(field)
+            case Qt.ForegroundRole if self.dangling(row, field):
+                return QtGui.QColor(Qt.red)
+            case Qt.ToolTipRole if target := self.dangling(row, field):
+                return f"Not in {FILES[target][0]}"
+        return None
+
+    def reference_fields(self, row: dict[str, Any]) -> dict[str, str]:
+        # Fields of the row naming an entry of another database
+        return {}
+
+    def dangling(self, row: dict[str, Any], field: str) -> str | None:
+        # The database a field refers to, if the name is not in it
+        target = self.reference_fields(row).get(field)
+        if target is None or self.references is None:
+            return None
+        return None if self.references.resolves(target, row.get(field)) else target
+
+    def setData(self, index: Index, value: Any, role: int = Qt.EditRole) -> bool:
+        if not index.isValid() or role != Qt.EditRole:
+            return False
+        self.rows[index.row()][self.fields[index.column()]] = value
+        self.dataChanged.emit(index, index)
+        return True
+
+    def flags(self, index: Index) -> Qt.ItemFlag:
+        return super().flags(index) | Qt.ItemIsEditable
+
+    def set_rows(self, rows: list[dict[str, Any]]):
+        # The rows already shown are updated in place, only the difference in
+        # length is inserted or removed, so the view keeps its row layout
+        old, new = (len(self.rows), len(rows))
+        if new < old:
+            self.beginRemoveRows(QModelIndex(), new, old - 1)
+            del self.rows[new:]
+            self.endRemoveRows()
+        common = min(old, new)
+        self.rows[:common] = rows[:common]
+        if common:
+            last = self.index(common - 1, len(self.fields) - 1)
+            self.dataChanged.emit(self.index(0, 0), last)
+        if new > old:
+            self.beginInsertRows(QModelIndex(), old, new - 1)
+            self.rows.extend(rows[old:])
+            self.endInsertRows()
+
+    def append_row(self, row: dict[str, Any]):
+        i = len(self.rows)
+        self.beginInsertRows(QModelIndex(), i, i)
+        self.rows.append(row)
+        self.endInsertRows()
+
+    def remove_row(self, i: int):
+        # Removes the given row, or the last one when none is selected
+        if i == -1:
+            i = len(self.rows) - 1
+        if not 0 <= i < len(self.rows):
+            return
+        self.beginRemoveRows(QModelIndex(), i, i)
+        del self.rows[i]
+        self.endRemoveRows()
+
+
+class LearnsetModel(RowsModel):
+    fields = ("lvl", "move")
+    headers = ("Level", "Move")
+
+    def reference_fields(self, row: dict[str, Any]) -> dict[str, str]:
+        return learnset_fields(row)
+
+    def moves(self) -> list[LearnsetEntry]:
+        return [LearnsetEntry(row["lvl"], row["move"]) for row in self.rows]
+
+
+class EvolutionModel(RowsModel):
+    fields = ("pkm", "method", "value")
+    headers = ("Pokémon", "Method", "Value")
+
+    def setData(self, index: Index, value: Any, role: int = Qt.EditRole) -> bool:
+        row = self.rows[index.row()] if index.isValid() else None
+        if row is None or index.column() != 1 or value == row["method"]:
+            return super().setData(index, value, role)
+        # A new method starts from its default value
+        row["method"] = value
+        row["value"] = default_value(value)
+        self.dataChanged.emit(index, index.siblingAtColumn(2))
+        return True
+
+    def flags(self, index: Index) -> Qt.ItemFlag:
+        flags = super().flags(index)
+        # Only "Level" and "Item" evolutions have a value
+        if index.column() == 2 and not has_value(self.rows[index.row()]["method"]):
+            flags &= ~Qt.ItemIsEditable
+        return flags
+
+    def reference_fields(self, row: dict[str, Any]) -> dict[str, str]:
+        return evolution_fields(row)
+
+    def evolutions(self) -> list[Evolution]:
+        # Evolution.to_dict only saves the value of methods that have one
+        return [Evolution(row["pkm"], row["method"], row["value"]) for row in self.rows]
+
+
+def default_value(method: str) -> int | str | None:
+    match method:
+        case "Level":
+            return 1
+        case "Item":
+            return "None"
+    return None
+
+
+def evolution_row(
+    pkm: str | None = None, method: str | None = None, value: Any = None
+) -> dict[str, Any]:
+    method = method or "Level"
+    if value is None:
+        value = default_value(method)
+    elif method == "Level":
+        value = int(value)
+    elif method == "Item":
+        value = str(value)
+    return {"pkm": pkm or "", "method": method, "value": value}
+
+
+class RowsDelegate(QStyledItemDelegate):
+    """Creates spin and combo boxes for the cell being edited only."""
+
+    def setEditorData(self, editor: QWidget, index: QModelIndex):
+        value = index.data(Qt.EditRole)
+        if isinstance(editor, QSpinBox):
+            editor.setValue(int(value or 0))
+        elif isinstance(editor, QComboBox):
+            editor.setCurrentText("" if value is None else str(value))
+        else:
+            super().setEditorData(editor, index)
+
+    def setModelData(
+        self, editor: QWidget, model: QAbstractItemModel, index: QModelIndex
+    ):
+        if isinstance(editor, QSpinBox):
+            model.setData(index, editor.value(), Qt.EditRole)
+        elif isinstance(editor, QComboBox):
+            model.setData(index, editor.currentText(), Qt.EditRole)
+        else:
+            super().setModelData(editor, model, index)
+
+    def commit_now(self, editor: QWidget):
+        # Let the row react to a new choice before the editor is closed
+        self.commitData.emit(editor)
+
+
+class LearnsetDelegate(RowsDelegate):
+    def __init__(self, move_names: NameList, parent: QObject | None = None):
+        super().__init__(parent)
+        self.move_names = move_names
+
+    def createEditor(
+        self, parent: QWidget, option: QStyleOptionViewItem, index: QModelIndex
+    ) -> QWidget:
+        if index.column() == 0:
+            return level_box(parent)
+        return name_box(parent, self.move_names, "Select move")
+
+
+class EvolutionDelegate(RowsDelegate):
+    def __init__(
+        self,
+        pkm_names: NameList,
+        item_names: NameList,
+        parent: QObject | None = None,
+    ):
+        super().__init__(parent)
+        self.pkm_names = pkm_names
+        self.item_names = item_names
+        self.method_names = NameList(EVOLUTION_METHODS, self)
+
+    def createEditor(
+        self, parent: QWidget, option: QStyleOptionViewItem, index: QModelIndex
+    ) -> QWidget:
+        match index.column():
+            case 0:
+                return name_box(parent, self.pkm_names, "Select Pokémon")
+            case 1:
+                combo = name_box(parent, self.method_names, "Select method")
+                combo.activated.connect(lambda: self.commit_now(combo))  # type: ignore
+                return combo
+        if index.siblingAtColumn(1).data() == "Level":
+            return level_box(parent)
+        return name_box(parent, self.item_names, "Select item")
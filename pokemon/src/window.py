@@ -56,8 +56,7 @@ from PySide6.QtWidgets import (
     QSpinBox,
     QTabWidget,
     QTextEdit,
-    QTreeWidget,
-    QTreeWidgetItem,
+    QTreeView,
     QVBoxLayout,
     QWidget,
 )
@@ -406,10 +405,11 @@ class Ui_MainWindow(object):
         self.tab_moves.setObjectName("tab_moves")
         self.verticalLayout = QVBoxLayout(self.tab_moves)
         self.verticalLayout.setObjectName("verticalLayout")
-        self.tree_moves = QTreeWidget(self.tab_moves)
+        self.tree_moves = QTreeView(self.tab_moves)
         self.tree_moves.setObjectName("tree_moves")
         self.tree_moves.setHorizontalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
         self.tree_moves.setSizeAdjustPolicy(QAbstractScrollArea.AdjustToContents)
+        self.tree_moves.setEditTriggers(QAbstractItemView.AllEditTriggers)
         self.tree_moves.setProperty("showDropIndicator", False)
         self.tree_moves.setSelectionBehavior(QAbstractItemView.SelectItems)
         self.tree_moves.setRootIsDecorated(False)
@@ -455,10 +455,11 @@ class Ui_MainWindow(object):
         self.tab_evolutions.setObjectName("tab_evolutions")
         self.verticalLayout_14 = QVBoxLayout(self.tab_evolutions)
         self.verticalLayout_14.setObjectName("verticalLayout_14")
-        self.tree_evolutions = QTreeWidget(self.tab_evolutions)
+        self.tree_evolutions = QTreeView(self.tab_evolutions)
         self.tree_evolutions.setObjectName("tree_evolutions")
         self.tree_evolutions.setHorizontalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
         self.tree_evolutions.setSizeAdjustPolicy(QAbstractScrollArea.AdjustToContents)
+        self.tree_evolutions.setEditTriggers(QAbstractItemView.AllEditTriggers)
         self.tree_evolutions.setProperty("showDropIndicator", False)
         self.tree_evolutions.setSelectionBehavior(QAbstractItemView.SelectItems)
         self.tree_evolutions.setRootIsDecorated(False)
@@ -618,6 +619,13 @@ class Ui_MainWindow(object):
 
         self.horizontalLayout_3 = QHBoxLayout()
         self.horizontalLayout_3.setObjectName("horizontalLayout_3")
+        self.button_bulk = QPushButton(self.centralwidget)
+        self.button_bulk.setObjectName("button_bulk")
+        self.button_bulk.setMaximumSize(QSize(91, 32))
+        self.button_bulk.setAutoDefault(False)
+
+        self.horizontalLayout_3.addWidget(self.button_bulk)
+
         self.button_cancel = QPushButton(self.centralwidget)
         self.button_cancel.setObjectName("button_cancel")
         self.button_cancel.setMaximumSize(QSize(91, 32))
@@ -745,13 +753,6 @@ class Ui_MainWindow(object):
         self.z_label_10.setText(
             QCoreApplication.translate("MainWindow", "Sp. Atk", None)
         )
-        ___qtreewidgetitem = self.tree_moves.headerItem()
-        ___qtreewidgetitem.setText(
-            1, QCoreApplication.translate("MainWindow", "Move", None)
-        )
-        ___qtreewidgetitem.setText(
-            0, QCoreApplication.translate("MainWindow", "Level", None)
-        )
         self.button_add_move.setText(
             QCoreApplication.translate("MainWindow", "+", None)
         )
@@ -762,16 +763,6 @@ class Ui_MainWindow(object):
             self.tabWidget.indexOf(self.tab_moves),
             QCoreApplication.translate("MainWindow", "Moves", None),
         )
-        ___qtreewidgetitem1 = self.tree_evolutions.headerItem()
-        ___qtreewidgetitem1.setText(
-            2, QCoreApplication.translate("MainWindow", "Value", None)
-        )
-        ___qtreewidgetitem1.setText(
-            1, QCoreApplication.translate("MainWindow", "Method", None)
-        )
-        ___qtreewidgetitem1.setText(
-            0, QCoreApplication.translate("MainWindow", "Pok\u00e9mon", None)
-        )
         self.button_add_evolution.setText(
             QCoreApplication.translate("MainWindow", "+", None)
         )
@@ -806,6 +797,9 @@ class Ui_MainWindow(object):
             self.tabWidget.indexOf(self.tab_misc),
             QCoreApplication.translate("MainWindow", "Misc", None),
         )
+        self.button_bulk.setText(
+            QCoreApplication.translate("MainWindow", "Bulk edit", None)
+        )
         self.button_cancel.setText(
             QCoreApplication.translate("MainWindow", "Close", None)
         )
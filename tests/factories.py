@@ -0,0 +1,42 @@
+"""Entries and databases for the tests, built from the record types."""
+from pathlib import Path
+from typing import Any
+
+from pkdb.codec import Codec, load_codec
+from pkdb.records import TABLES, Evolution, LearnsetEntry, Move, Pokemon
+
+CODEC = load_codec("tomli")
+
+
+def move(name: str, **fields: Any) -> dict[str, Any]:
+    return Move(name=name, type1="Normal", category="Physical", **fields).to_dict()
+
+
+def pokemon(
+    name: str, moves: dict[str, int] | None = None, **fields: Any
+) -> dict[str, Any]:
+    # ``moves`` maps the moves learned to their level
+    learnset = [LearnsetEntry(lvl, move) for move, lvl in (moves or {}).items()]
+    return Pokemon(name=name, type1="Grass", moves=learnset, **fields).to_dict()
+
+
+def evolution(pkm: str, level: int = 16) -> Evolution:
+    return Evolution(pkm, "Level", level)
+
+
+def key(name: str) -> str:
+    return name.replace(" ", "_")
+
+
+def write_database(
+    path: Path, cls: type, entries: list[dict[str, Any]], codec: Codec = CODEC
+) -> dict[str, Any]:
+    # Writes the entries keyed by name as the editors save them
+    table = {key(entry["name"]): entry for entry in entries}
+    document: dict[str, Any] = {}
+    parent = document
+    for part in TABLES[cls]:
+        parent = parent.setdefault(part, {})
+    parent.update(table)
+    codec.dump(path, document)
+    return table
@@ -0,0 +1,86 @@
+import pytest
+
+from pkdb.codec import CODECS, Codec, CodecMismatch, check_round_trip, load_codec
+
+CORPUS = r'''
+[Moves.Tackle]
+name = "Tackle"
+description = "Quote \" backslash \\ tab \t newline \n unicode é"
+power = 40
+accuracy = 1.0
+ratio = -0.25
+
+[Moves.Fake_Header]
+name = "Fake"
+description = """
+[Moves.Not_A_Table]
+name = "inside a string"
+"""
+
+[Moves.Empty]
+
+[Pokemon.Bulbasaur]
+name = "Bulbasaur"
+weight = 6.9
+moves = [{lvl = 1, move = "Tackle"}, {lvl = 3, move = "Growl"}]
+evolutions = [{pkm = "Ivysaur", method = "Level", value = 16}]
+'''
+
+
+def installed() -> list[Codec]:
+    codecs = []
+    for name in CODECS:
+        try:
+            codecs.append(load_codec(name))
+        except ImportError:
+            pass
+    return codecs
+
+
+@pytest.fixture
+def codecs() -> list[Codec]:
+    if not (codecs := installed()):
+        pytest.skip("no TOML backend installed")
+    return codecs
+
+
+def test_every_backend_reads_every_output(codecs: list[Codec]):
+    outputs = check_round_trip(codecs, CORPUS)
+    assert set(outputs) == {codec.name for codec in codecs}
+    data = codecs[0].loads(CORPUS)
+    assert data["Moves"]["Empty"] == {}
+    assert "Not_A_Table" not in data["Moves"]
+    assert data["Moves"]["Fake_Header"]["description"].startswith("[Moves.")
+    assert data["Moves"]["Tackle"]["accuracy"] == 1.0
+    assert isinstance(data["Moves"]["Tackle"]["accuracy"], float)
+    assert data["Pokemon"]["Bulbasaur"]["moves"][1] == {"lvl": 3, "move": "Growl"}
+
+
+@pytest.mark.parametrize("name", CODECS)
+def test_backend_round_trips_alone(name: str):
+    try:
+        codec = load_codec(name)
+    except ImportError:
+        pytest.skip(f"{name} is not installed")
+    data = codec.loads(CORPUS)
+    assert codec.loads(codec.dumps(data)) == data
+
+
+def test_mismatch_is_raised(codecs: list[Codec]):
+    # A backend writing a different value than it was given
+    lossy = Codec(
+        "lossy", codecs[0].loads, lambda data: codecs[0].dumps(data).replace("é", "e")
+    )
+    with pytest.raises(CodecMismatch, match="lossy"):
+        check_round_trip([codecs[0], lossy], CORPUS)
+
+
+def test_misread_file_is_raised(codecs: list[Codec]):
+    blind = Codec("blind", lambda text: {}, codecs[0].dumps)
+    with pytest.raises(CodecMismatch, match="blind misreads the file"):
+        check_round_trip([codecs[0], blind], CORPUS)
+
+
+def test_unknown_codec():
+    with pytest.raises(ValueError, match="Unknown TOML codec"):
+        load_codec("yaml")
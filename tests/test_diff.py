@@ -0,0 +1,99 @@
+from pkdb.diff import (
+    Conflict,
+    change_lines,
+    change_record,
+    diff_tables,
+    merge_entry,
+    merge_tables,
+    open_table,
+)
+from pkdb.records import Move
+from pkdb.undo import MISSING
+
+from tests.factories import CODEC, move, write_database
+
+BASE = move("Tackle", power=40, pp=35)
+
+
+def test_merge_takes_changes_of_either_side():
+    ours = {**BASE, "power": 50}
+    theirs = {**BASE, "pp": 30}
+    assert merge_entry("Tackle", BASE, ours, theirs) == ({**ours, "pp": 30}, [])
+
+
+def test_merge_takes_the_same_change_once():
+    ours = {**BASE, "power": 50}
+    assert merge_entry("Tackle", BASE, ours, dict(ours)) == (ours, [])
+
+
+def test_merge_conflict_keeps_ours():
+    ours = {**BASE, "power": 50}
+    theirs = {**BASE, "power": 60}
+    (merged, conflicts) = merge_entry("Tackle", BASE, ours, theirs)
+    assert merged == ours
+    assert conflicts == [Conflict("Tackle", "power", 40, 50, 60)]
+
+
+def test_merge_field_added_and_removed():
+    ours = {key: value for key, value in BASE.items() if key != "pp"}
+    theirs = {**BASE, "extra": 1}
+    (merged, conflicts) = merge_entry("Tackle", BASE, ours, theirs)
+    assert "pp" not in merged and merged["extra"] == 1
+    assert not conflicts
+    # A field removed on one side and changed on the other
+    (merged, conflicts) = merge_entry("Tackle", BASE, ours, {**BASE, "pp": 1})
+    assert conflicts == [Conflict("Tackle", "pp", 35, MISSING, 1)]
+
+
+def test_merge_removed_entries():
+    assert merge_entry("Tackle", BASE, None, BASE) == (None, [])
+    assert merge_entry("Tackle", BASE, BASE, None) == (None, [])
+    changed = {**BASE, "power": 1}
+    (merged, conflicts) = merge_entry("Tackle", BASE, None, changed)
+    assert merged is None
+    assert conflicts == [Conflict("Tackle", None, BASE, None, changed)]
+
+
+def test_merge_entry_added_on_both_sides():
+    ours = move("Growl")
+    assert merge_entry("Growl", None, ours, dict(ours)) == (ours, [])
+    (_, conflicts) = merge_entry("Growl", None, ours, move("Growl", power=1))
+    assert [conflict.field for conflict in conflicts] == ["power"]
+
+
+def test_merge_tables_keeps_the_order_of_ours():
+    base = {"A": move("A"), "B": move("B")}
+    ours = {"B": move("B"), "A": move("A", pp=1)}
+    theirs = {"A": move("A"), "B": move("B"), "C": move("C")}
+    conflicts: list[Conflict] = []
+    merged = dict(merge_tables(base, ours, theirs, conflicts))
+    assert list(merged) == ["B", "A", "C"]
+    assert merged["A"]["pp"] == 1 and not conflicts
+
+
+def test_diff_ignores_order_and_formatting(tmp_path):
+    (old_path, new_path) = (tmp_path / "old.toml", tmp_path / "new.toml")
+    write_database(old_path, Move, [move("Tackle"), move("Growl"), move("Ember")])
+    write_database(new_path, Move, [move("Growl", pp=5), move("Tackle"), move("Cut")])
+    old = open_table(old_path, ("Moves",), CODEC)
+    new = open_table(new_path, ("Moves",), CODEC)
+    changes = {key: change_record(key, change) for key, change in diff_tables(old, new)}
+    assert list(changes) == ["Cut", "Ember", "Growl"]
+    assert [record["status"] for record in changes.values()] == [
+        "added",
+        "removed",
+        "changed",
+    ]
+    assert changes["Growl"]["fields"] == {"pp": {"old": 0, "new": 5}}
+
+
+def test_change_lines_follow_entry_order():
+    old = move("Tackle")
+    new = {**old, "target": "All", "name": "Slam", "extra": [1]}
+    (_, change) = next(diff_tables({"T": old}, {"T": new}))
+    assert list(change_lines("T", change)) == [
+        "~ T",
+        '    name: "Tackle" -> "Slam"',
+        '    target: "" -> "All"',
+        "    extra: [1]",
+    ]
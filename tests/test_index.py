@@ -0,0 +1,110 @@
+import pytest
+
+from pkdb.index import IndexingError, LazyTable, TableIndex, parse_header, scan_entries
+from pkdb.records import Move, Pokemon
+from pkdb.scan import scan_data, scan_keys
+
+from tests.factories import CODEC, move, pokemon, write_database
+
+MOVES = b"""\
+# Comment before the entries
+[Moves.Tackle]
+name = "Tackle"
+power = 40
+
+[Moves.Fake]
+description = \"\"\"
+[Moves.Hidden]
+name = "not a table"
+\"\"\"
+
+[Moves."Quoted Key"]
+name = "Quoted"
+
+[Other]
+x = 1
+"""
+
+
+def ranges_text(data: bytes, table: tuple[str, ...]) -> dict[str, bytes]:
+    return {
+        key: data[start:end] for key, (start, end) in scan_entries(data, table).items()
+    }
+
+
+def test_headers_inside_multi_line_strings_are_skipped():
+    entries = ranges_text(MOVES, ("Moves",))
+    assert list(entries) == ["Tackle", "Fake", "Quoted Key"]
+    assert entries["Fake"].count(b"[Moves.Hidden]") == 1
+
+
+def test_ranges_end_at_the_next_table():
+    entries = ranges_text(MOVES, ("Moves",))
+    assert entries["Tackle"].startswith(b"[Moves.Tackle]")
+    assert b"[Moves.Fake]" not in entries["Tackle"]
+    assert b"[Other]" not in entries["Quoted Key"]
+
+
+def test_sub_tables_belong_to_their_entry():
+    data = b"[Bulbasaur]\nname = 'Bulbasaur'\n[[Bulbasaur.moves]]\nlvl = 1\n"
+    data += b"[Ivysaur]\nname = 'Ivysaur'\n"
+    entries = ranges_text(data, ())
+    assert list(entries) == ["Bulbasaur", "Ivysaur"]
+    assert b"[[Bulbasaur.moves]]" in entries["Bulbasaur"]
+
+
+def test_inline_entries_cannot_be_indexed():
+    with pytest.raises(IndexingError):
+        scan_entries(b"[Moves]\nTackle = { name = 'Tackle' }\n", ("Moves",))
+
+
+def test_split_entries_cannot_be_indexed():
+    data = b"[A.x]\nv = 1\n[B]\n[A.x.y]\nv = 2\n"
+    with pytest.raises(IndexingError):
+        scan_entries(data, ("A",))
+
+
+def test_parse_header():
+    assert parse_header("[Moves.Tackle]") == (("Moves", "Tackle"), False)
+    assert parse_header("[[a.b]]") == (("a", "b"), True)
+    assert parse_header('[ Moves . "Fire Punch" ] # x') == (
+        ("Moves", "Fire Punch"),
+        False,
+    )
+    with pytest.raises(IndexingError):
+        parse_header("[Moves.Tackle] trailing")
+
+
+def test_scan_keys_finds_headers_and_inline_keys():
+    data = MOVES + b"[Moves]\nInline = { name = 'Inline' }\n"
+    assert scan_data(data, ("Moves",)) == ["Tackle", "Fake", "Quoted Key", "Inline"]
+    assert scan_data(b"[Types]\nGrass = 1\nFire = 2\n", ("Types",)) == ["Grass", "Fire"]
+
+
+def test_scan_keys_matches_the_parser(tmp_path):
+    path = tmp_path / "moves.toml.bytes"
+    write_database(path, Move, [move("Tackle"), move("Fire Punch"), move("Growl")])
+    assert scan_keys(path, ("Moves",)) == list(CODEC.load(path)["Moves"])
+
+
+def test_lazy_table_parses_entries_when_read(tmp_path):
+    path = tmp_path / "pokemon.toml.bytes"
+    entries = [pokemon("Bulbasaur", {"Tackle": 1}), pokemon("Ivysaur")]
+    table = write_database(path, Pokemon, entries)
+    lazy = LazyTable(TableIndex(path, (), CODEC.loads))
+    assert list(lazy) == ["Bulbasaur", "Ivysaur"]
+    assert lazy.entries["Bulbasaur"] is None
+    assert lazy["Bulbasaur"] == table["Bulbasaur"]
+    lazy["Venusaur"] = pokemon("Venusaur")
+    document = lazy.materialize()
+    assert list(document) == ["Bulbasaur", "Ivysaur", "Venusaur"]
+    assert document["Ivysaur"] == table["Ivysaur"]
+
+
+def test_index_rescans_a_rewritten_file(tmp_path):
+    path = tmp_path / "moves.toml.bytes"
+    write_database(path, Move, [move("Tackle")])
+    index = TableIndex(path, ("Moves",), CODEC.loads)
+    write_database(path, Move, [move("Growl", power=5), move("Tackle", power=50)])
+    assert index.load_entry("Tackle")["power"] == 50
+    assert index.keys() == ["Growl", "Tackle"]
@@ -0,0 +1,78 @@
+import os
+
+from pkdb.journal import Journal, JournalReader, apply_records, read_records
+from pkdb.records import Pokemon
+
+from tests.factories import CODEC, pokemon, write_database
+
+
+def open_journal(tmp_path) -> Journal:
+    path = tmp_path / "pokemon.toml.bytes"
+    write_database(path, Pokemon, [pokemon("Bulbasaur"), pokemon("Ivysaur")])
+    return Journal(path, CODEC.load, CODEC.dump)
+
+
+def test_replay_applies_saves_and_removals(tmp_path):
+    journal = open_journal(tmp_path)
+    journal.append("Bulbasaur", pokemon("Bulbasaur", hp=45))
+    journal.append("Ivysaur", None)
+    journal.append("Venusaur", pokemon("Venusaur"))
+    journal.append("Bulbasaur", pokemon("Bulbasaur", hp=50))
+    data = journal.replay(CODEC.load(journal.path))
+    assert list(data) == ["Bulbasaur", "Venusaur"]
+    assert data["Bulbasaur"]["hp"] == 50
+
+
+def test_compaction_folds_the_journal_into_the_file(tmp_path):
+    journal = open_journal(tmp_path)
+    journal.append("Ivysaur", pokemon("Ivysaur", hp=60))
+    journal.compact(block=True)
+    assert not journal.pending()
+    assert CODEC.load(journal.path)["Ivysaur"]["hp"] == 60
+    assert not list(tmp_path.glob("*.tmp"))
+
+
+def test_interrupted_compaction_is_finished(tmp_path):
+    journal = open_journal(tmp_path)
+    journal.append("Ivysaur", pokemon("Ivysaur", hp=60))
+    # The log was rotated, then the editor stopped before folding it
+    os.replace(journal.log_path, journal.compacting_path)
+    journal.append("Bulbasaur", None)
+    data = journal.replay(CODEC.load(journal.path))
+    assert list(data) == ["Ivysaur"] and data["Ivysaur"]["hp"] == 60
+    journal.compact(block=True)
+    assert CODEC.load(journal.path) == data
+
+
+def test_unfinished_last_line_is_ignored(tmp_path):
+    journal = open_journal(tmp_path)
+    journal.append("Ivysaur", None)
+    with open(journal.log_path, "a", encoding="utf-8") as file:
+        file.write('{"key": "Bulbasaur", "entry": nu')
+    assert list(read_records(journal.log_path)) == [("Ivysaur", None)]
+
+
+def test_reader_follows_appends_across_compactions(tmp_path):
+    journal = open_journal(tmp_path)
+    reader = JournalReader(journal)
+    assert reader.read_new() == []
+    journal.append("Ivysaur", None)
+    assert reader.read_new() == [("Ivysaur", None)]
+    assert reader.read_new() == []
+    # Rotated but not folded yet: the rest of the old log, then the new one
+    journal.append("Bulbasaur", None)
+    os.replace(journal.log_path, journal.compacting_path)
+    journal.append("Venusaur", pokemon("Venusaur"))
+    records = reader.read_new()
+    assert [key for key, _ in records] == ["Bulbasaur", "Venusaur"]
+    # Folded into the file since, the reader cannot tell what it missed
+    journal.append("Oddish", pokemon("Oddish"))
+    journal.compact(block=True)
+    journal.append("Gloom", pokemon("Gloom"))
+    assert reader.read_new() is None
+
+
+def test_apply_records():
+    data = {"a": 1, "b": 2}
+    apply_records(data, [("a", None), ("c", {"x": 1}), ("missing", None)])
+    assert data == {"b": 2, "c": {"x": 1}}
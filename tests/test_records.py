@@ -0,0 +1,57 @@
+from pkdb.records import Evolution, Move, Pokemon, from_table, load_records
+from pkdb.records import save_records, to_table
+
+from tests.factories import CODEC, evolution, move, pokemon
+
+
+def test_move_round_trip():
+    entry = move("Tackle", power=40, accuracy=100, pp=35)
+    assert Move.from_dict(entry).to_dict() == entry
+
+
+def test_unknown_fields_are_kept_after_known_ones():
+    entry = {"secret": 1, **move("Tackle")}
+    saved = Move.from_dict(entry).to_dict()
+    assert saved == entry
+    assert list(saved)[-1] == "secret"
+
+
+def test_pokemon_round_trip():
+    entry = pokemon(
+        "Bulbasaur",
+        {"Tackle": 1, "Vine Whip": 3},
+        evolutions=[evolution("Ivysaur")],
+        weight=6.9,
+    )
+    record = Pokemon.from_dict(entry)
+    assert record.moves[1].move == "Vine Whip"
+    assert entry["evolutions"] == [{"pkm": "Ivysaur", "method": "Level", "value": 16}]
+    assert record.to_dict() == entry
+
+
+def test_defense_is_saved_as_def():
+    assert Pokemon(defense=49).to_dict()["def"] == 49
+    assert Pokemon.from_dict({"def": 49}).defense == 49
+
+
+def test_evolution_value_only_for_methods_having_one():
+    assert "value" not in Evolution("Ivysaur", "Custom", 16).to_dict()
+    assert Evolution("Ivysaur", "Item", "Leaf Stone").to_dict()["value"] == "Leaf Stone"
+
+
+def test_tables():
+    table = {"Tackle": move("Tackle"), "Growl": move("Growl")}
+    records = from_table(Move, table)
+    assert list(records) == ["Tackle", "Growl"]
+    assert to_table(records) == table
+
+
+def test_save_records_keeps_the_rest_of_the_file(tmp_path):
+    path = tmp_path / "moves.toml.bytes"
+    CODEC.dump(path, {"Version": 2, "Moves": {"Tackle": move("Tackle")}})
+    records = load_records(Move, path, CODEC)
+    records["Growl"] = Move(name="Growl", power=0)
+    save_records(Move, path, records, CODEC)
+    document = CODEC.load(path)
+    assert document["Version"] == 2
+    assert list(document["Moves"]) == ["Tackle", "Growl"]
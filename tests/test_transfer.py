@@ -0,0 +1,143 @@
+import io
+import json
+import sys
+
+import pytest
+
+from pkdb import transfer
+from pkdb.records import Move, Pokemon
+from pkdb.transfer import import_rows, read_csv, read_json_array, read_rows, write_rows
+
+from tests.factories import move, pokemon, write_database
+
+ITEMS = [
+    {"key": "Tackle", "name": "Tackle", "power": 40},
+    {"key": "Fire_Punch", "description": 'Brackets ] and [ and "quotes", commas'},
+    {"key": "Empty", "list": [], "nested": {"a": [1, {"b": "]"}]}},
+]
+
+
+def json_array(items: list, indent: int | None = None) -> str:
+    return json.dumps(items, indent=indent, ensure_ascii=False)
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 7, 16, 1 << 16])
+@pytest.mark.parametrize("indent", [None, 2])
+def test_json_array_items_split_across_reads(monkeypatch, size: int, indent):
+    monkeypatch.setattr(transfer, "READ_SIZE", size)
+    text = json_array(ITEMS, indent)
+    assert list(read_json_array(io.StringIO(text))) == ITEMS
+
+
+@pytest.mark.parametrize("text", ["[]", "  [ ]  ", "\n[\n]\n"])
+def test_empty_json_array(text: str):
+    assert list(read_json_array(io.StringIO(text))) == []
+
+
+@pytest.mark.parametrize(
+    ("text", "error"),
+    [
+        ("{}", "expected a JSON array"),
+        ('[{"a": 1}', "unterminated JSON array"),
+        ('[{"a": 1} {"b": 2}]', "item 2: expected ',' or ']'"),
+        ('[{"a": }]', "item 1"),
+    ],
+)
+def test_invalid_json_array(monkeypatch, text: str, error: str):
+    monkeypatch.setattr(transfer, "READ_SIZE", 4)
+    with pytest.raises(ValueError, match=error):
+        list(read_json_array(io.StringIO(text)))
+
+
+def test_rows_must_be_objects():
+    with pytest.raises(ValueError, match="item 2 is not an object"):
+        list(read_rows(io.StringIO('[{"key": "a"}, 1]'), "json", Move))
+
+
+def test_csv_cells_are_parsed_by_field_type():
+    text = "key,name,power,description\r\nTackle,Tackle,40.0,\r\n"
+    assert list(read_csv(io.StringIO(text), Move)) == [
+        {"key": "Tackle", "name": "Tackle", "power": 40}
+    ]
+    with pytest.raises(ValueError, match="line 2: power"):
+        list(read_csv(io.StringIO("key,power\r\nTackle,abc\r\n"), Move))
+
+
+@pytest.mark.parametrize("format", ["csv", "json", "jsonl"])
+def test_export_then_import_changes_nothing(format: str):
+    entries = {
+        "Bulbasaur": pokemon("Bulbasaur", {"Tackle": 1, "Vine Whip": 3}),
+        "Mr._Mime": pokemon("Mr. Mime", pokedex='Text, with "quotes"\n'),
+    }
+    file = io.StringIO()
+    write_rows(file, format, Pokemon, entries.items())
+    file.seek(0)
+    imported = {key: dict(entry) for key, entry in entries.items()}
+    rows = read_rows(file, format, Pokemon)
+    assert import_rows(rows, Pokemon, imported) == (0, 0)
+    assert imported == entries
+
+
+def test_import_updates_and_adds_entries():
+    entries = {"Tackle": move("Tackle", power=40)}
+    rows = [{"key": "Tackle", "power": 50}, {"name": "Fire Punch", "power": 75}]
+    assert import_rows(rows, Move, entries) == (1, 1)
+    assert entries["Tackle"] == move("Tackle", power=50)
+    assert entries["Fire_Punch"] == Move(name="Fire Punch", power=75).to_dict()
+
+
+def test_import_needs_a_key():
+    with pytest.raises(ValueError, match="row 1 has no key or name"):
+        import_rows([{"power": 1}], Move, {})
+
+
+def test_empty_csv_cells_keep_their_value(tmp_path):
+    path = tmp_path / "moves.csv"
+    # Spreadsheets start their UTF-8 files with a byte order mark
+    path.write_bytes(b"\xef\xbb\xbfkey,name,power\r\nTackle,,77\r\n")
+    entries = {"Tackle": move("Tackle", power=40)}
+    with transfer.open_file(str(path), "r") as file:
+        import_rows(read_rows(file, "csv", Move), Move, entries)
+    assert entries["Tackle"] == move("Tackle", power=77)
+
+
+def test_json_fields_are_coerced_by_field_type():
+    text = '{"name": "Tackle", "power": "40", "accuracy": 90.0, "new": [1]}\n'
+    assert list(read_rows(io.StringIO(text), "jsonl", Move)) == [
+        {"name": "Tackle", "power": 40, "accuracy": 90, "new": [1]}
+    ]
+
+
+@pytest.mark.parametrize(
+    ("row", "error"),
+    [
+        ({"name": "Tackle", "power": "abc"}, "item 1: power: 'abc' is not a whole"),
+        ({"weight": "heavy"}, "item 1: weight: 'heavy' is not a number"),
+        ({"name": "Tackle", "power": True}, "item 1: power: True is not a number"),
+        ({"name": None}, "item 1: name: None is not text"),
+        ({"moves": {"Tackle": 1}}, r"item 1: moves: \{'Tackle': 1\} is not a list"),
+        ({"moves": [{"lvl": 1}, 1]}, r"item 1: moves: \[1\]: 1 is not an object"),
+        ({"moves": [{"lvl": "x"}]}, r"item 1: moves: \[0\]\.lvl"),
+        ({"evolutions": [{"pkm": 1}]}, r"item 1: evolutions: \[0\]\.pkm"),
+    ],
+)
+def test_invalid_json_fields(row: dict, error: str):
+    cls = Move if "power" in row or "name" in row else Pokemon
+    with pytest.raises(ValueError, match=error):
+        list(read_rows(io.StringIO(json.dumps(row)), "jsonl", cls))
+
+
+def test_invalid_row_aborts_the_import(tmp_path, monkeypatch, capsys):
+    database = tmp_path / "moves.toml.bytes"
+    write_database(database, Move, [move("Tackle", power=40)])
+    before = database.read_bytes()
+    rows = tmp_path / "moves.json"
+    rows.write_text(
+        json_array([{"key": "Tackle", "power": 50}, {"key": "Tackle", "pp": "x"}])
+    )
+    argv = ["transfer", "import", "moves", str(database), str(rows), "--codec"]
+    monkeypatch.setattr(sys, "argv", argv + ["tomli"])
+    with pytest.raises(SystemExit):
+        transfer.main()
+    assert "item 2: pp" in capsys.readouterr().err
+    assert database.read_bytes() == before
@@ -0,0 +1,85 @@
+from pkdb.dirty import DirtyTable
+from pkdb.records import Pokemon
+from pkdb.undo import MISSING, UndoStack, diff, patch
+
+from tests.factories import evolution, move, pokemon
+
+
+def test_diff_keeps_only_changed_fields():
+    old = move("Tackle", power=40)
+    new = {**old, "power": 50, "extra": 1}
+    del new["pp"]
+    change = diff(old, new)
+    assert (change.existed, change.exists) == (True, True)
+    assert change.fields == {
+        "pp": (0, MISSING),
+        "power": (40, 50),
+        "extra": (MISSING, 1),
+    }
+    assert list(change.fields) == ["power", "pp", "extra"]
+
+
+def test_patch_forward_and_back():
+    old = pokemon("Bulbasaur", {"Tackle": 1})
+    new = Pokemon.from_dict(old)
+    new.evolutions.append(evolution("Ivysaur"))
+    new = new.to_dict()
+    change = diff(old, new)
+    assert list(change.fields) == ["evolutions"]
+    assert patch(old, change, forward=True) == new
+    assert patch(new, change, forward=False) == old
+
+
+def test_patch_created_and_removed_entries():
+    entry = move("Growl")
+    created = diff(None, entry)
+    assert patch(None, created, forward=True) == entry
+    assert patch(entry, created, forward=False) is None
+    assert patch(entry, diff(entry, None), forward=True) is None
+
+
+def test_undo_and_redo():
+    table = {"Tackle": move("Tackle")}
+    stack = UndoStack(table)
+    old = table["Tackle"]
+    table["Tackle"] = {**old, "power": 50}
+    table["Growl"] = move("Growl")
+    stack.record("edit", {"Tackle": old, "Growl": None})
+    assert stack.undo() == ["Tackle", "Growl"]
+    assert table == {"Tackle": old}
+    stack.redo()
+    assert table["Tackle"]["power"] == 50 and "Growl" in table
+
+
+def test_recording_nothing_adds_no_step():
+    table = {"Tackle": move("Tackle")}
+    stack = UndoStack(table)
+    stack.record("no-op", {"Tackle": table["Tackle"]})
+    assert not stack.can_undo()
+
+
+def test_undoing_a_rename_keeps_the_order():
+    table = DirtyTable({key: move(key) for key in "ABC"}, lambda keys: None)
+    stack = UndoStack(table)
+    old = table["B"]
+    table.rename("B", "X", {**old, "name": "X"})
+    stack.record("rename", {"B": old, "X": None})
+    stack.undo()
+    assert list(table) == ["A", "B", "C"] and table["B"] == old
+    stack.redo()
+    assert list(table) == ["A", "X", "C"]
+    assert set(table.dirty) == {"B", "X"}
+
+
+def test_history_is_bounded(monkeypatch):
+    monkeypatch.setenv("PKDB_UNDO_STEPS", "2")
+    table = {"Tackle": move("Tackle")}
+    stack = UndoStack(table)
+    for power in range(1, 5):
+        old = table["Tackle"]
+        table["Tackle"] = {**old, "power": power}
+        stack.record(f"power {power}", {"Tackle": old})
+    assert len(stack.undo_steps) == 2
+    stack.undo()
+    stack.undo()
+    assert table["Tackle"]["power"] == 2 and not stack.can_undo()